@@ -0,0 +1,69 @@
+"""
+Benchmark streaming anomaly detector throughput
+
+Feeds synthetic readings for many (station, parameter) series through
+StreamingAnomalyDetector.ingest_batch, one batch per tick, and reports samples/s,
+per-batch latency and array memory per series.
+
+Usage:
+    python scripts/benchmark_anomaly_detector.py --series 10000 --ticks 200
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from agents.anomaly_detector import StreamingAnomalyDetector  # noqa: E402
+
+PARAMETERS = ["ecoli", "ph", "turbidity", "chlorine", "pm25"]
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--series", type=int, default=10000)
+    parser.add_argument("--ticks", type=int, default=200)
+    parser.add_argument("--window", type=int, default=60)
+    args = parser.parse_args()
+
+    stations = [f"ST-{i // len(PARAMETERS):05d}" for i in range(args.series)]
+    parameters = [PARAMETERS[i % len(PARAMETERS)] for i in range(args.series)]
+    detector = StreamingAnomalyDetector(window=args.window, max_series=args.series)
+
+    rng = np.random.default_rng(42)
+    baseline = rng.uniform(1, 50, args.series)
+    started_at = time.time()
+
+    latencies = []
+    flagged = 0
+    for tick in range(args.ticks):
+        values = baseline + rng.normal(0, 1, args.series)
+        timestamps = np.full(args.series, started_at + tick * 60.0)
+        started = time.perf_counter()
+        flagged += len(detector.ingest_batch(stations, parameters, values, timestamps))
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    total_seconds = sum(latencies) / 1000
+    stats = detector.get_statistics()
+    print(f"series:            {args.series}")
+    print(f"ticks:             {args.ticks}")
+    print(f"samples/s:         {args.series * args.ticks / total_seconds:,.0f}")
+    print(f"batch p50 ms:      {percentile(latencies, 50):.2f}")
+    print(f"batch p99 ms:      {percentile(latencies, 99):.2f}")
+    print(f"batch mean ms:     {statistics.mean(latencies):.2f}")
+    print(f"bytes per series:  {stats['bytes_per_series']}")
+    print(f"flags raised:      {flagged}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Benchmark recall latency across embedding backends
+
+Loads synthetic incidents into an in-memory Chroma collection per backend and
+reports recall p50/p99 (embedding + vector query) for each.
+
+Usage:
+    python scripts/benchmark_embedding_backends.py --backends hashing local openai --incidents 2000 --queries 200
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import chromadb  # noqa: E402
+
+from agents.embedding_backends import create_embedding_function  # noqa: E402
+
+INCIDENT_TYPES = ["WATER_CONTAMINATION", "AIR_QUALITY_VIOLATION", "EQUIPMENT_FAILURE"]
+FACILITIES = ["Atlanta_WTP", "Decatur_Plant", "Marietta_WWTP", "Savannah_Air_Station"]
+CONTEXTS = ["heavy rain yesterday", "upstream construction", "power outage", "heat wave", "routine"]
+
+
+def synthetic_text(rng: random.Random) -> str:
+    return (
+        f"Type: {rng.choice(INCIDENT_TYPES)} | Facility: {rng.choice(FACILITIES)} | "
+        f"Sensors: ecoli={rng.randint(0, 10)}, ph={rng.uniform(6, 9):.1f}, turbidity={rng.uniform(0, 3):.1f} | "
+        f"Context: {rng.choice(CONTEXTS)}"
+    )
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def run_backend(backend: str, incidents: int, queries: int, top_k: int):
+    function, model = create_embedding_function(backend, openai_api_key=os.getenv("OPENAI_API_KEY"))
+    client = chromadb.EphemeralClient()
+    collection = client.get_or_create_collection(f"bench_{backend}", embedding_function=function)
+
+    rng = random.Random(42)
+    documents = [synthetic_text(rng) for _ in range(incidents)]
+    for start in range(0, incidents, 500):
+        chunk = documents[start:start + 500]
+        collection.add(ids=[f"INC-{start + i}" for i in range(len(chunk))], documents=chunk)
+
+    latencies = []
+    for _ in range(queries):
+        query = synthetic_text(rng)
+        started = time.perf_counter()
+        collection.query(query_texts=[query], n_results=top_k)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    return {
+        "backend": backend,
+        "model": model,
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "mean_ms": round(statistics.mean(latencies), 2)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--backends", nargs="+", default=["hashing", "local", "openai"])
+    parser.add_argument("--incidents", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'backend':<10} {'model':<36} {'p50 ms':>8} {'p99 ms':>8} {'mean ms':>8}")
+    for backend in args.backends:
+        try:
+            result = run_backend(backend, args.incidents, args.queries, args.top_k)
+            print(
+                f"{result['backend']:<10} {result['model']:<36} "
+                f"{result['p50_ms']:>8} {result['p99_ms']:>8} {result['mean_ms']:>8}"
+            )
+        except Exception as e:
+            print(f"{backend:<10} skipped: {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Local stub of the ChainSync platform API for offline testing of the live data tools
+
+Serves GET /api/environmental-facilities/{facilityId}, /api/environmental-data/{stationId},
+/api/environmental-service-vehicles and /api/health from the RAML examples in
+src/main/resources/api/examples. Any facility/station ID is answered with the example
+re-keyed to that ID unless --strict is given (then unknown IDs get the RAML 404 body).
+--latency-ms delays every response, which makes request coalescing visible in
+GET /api/agents/reasoning/stats (chainsync_api.coalesced).
+
+Usage:
+    python scripts/chainsync_stub_server.py --port 8081 --latency-ms 200
+    CHAINSYNC_API_URL=http://localhost:8081/api uvicorn main:app --app-dir src
+"""
+
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import argparse
+import copy
+import json
+import os
+import threading
+import time
+import urllib.parse
+
+EXAMPLES_DIR = os.path.join(
+    os.path.dirname(__file__), "..", "..", "src", "main", "resources", "api", "examples"
+)
+BASE_PATH = "/api"
+
+
+def load_example(name):
+    with open(os.path.join(EXAMPLES_DIR, name), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def error_body(code, message):
+    return {"error": {"code": code, "message": message, "timestamp": datetime.utcnow().isoformat() + "Z"}}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    facility = load_example("EnvironmentalFacilitySingle.json")
+    station = load_example("EnvironmentalStationSingle.json")
+    vehicles = load_example("EnvironmentalServiceVehicle.json")
+    health = load_example("PlatformHealth.json")
+
+    strict = False
+    latency_ms = 0.0
+    counts_lock = threading.Lock()
+    counts = {}
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_GET(self):
+        url = urllib.parse.urlsplit(self.path)
+        query = dict(urllib.parse.parse_qsl(url.query))
+        path = url.path[len(BASE_PATH):] if url.path.startswith(BASE_PATH) else url.path
+        parts = [urllib.parse.unquote(part) for part in path.strip("/").split("/")]
+
+        with self.counts_lock:
+            self.counts[parts[0]] = self.counts.get(parts[0], 0) + 1
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+
+        if parts == ["health"]:
+            with self.counts_lock:
+                counts = dict(self.counts)
+            return self.respond(200, {**self.health, "stubRequests": counts})
+        if len(parts) == 2 and parts[0] == "environmental-facilities":
+            return self.respond_entity(self.facility, "facilityId", parts[1], "FACILITY_NOT_FOUND", "Environmental facility")
+        if len(parts) == 2 and parts[0] == "environmental-data":
+            return self.respond_entity(self.station, "stationId", parts[1], "STATION_NOT_FOUND", "Monitoring station")
+        if parts == ["environmental-service-vehicles"]:
+            return self.respond(200, [vehicle for vehicle in self.vehicles if self.matches(vehicle, query)])
+
+        self.respond(404, error_body("NOT_FOUND", f"No stub for {url.path}"))
+
+    def respond_entity(self, example, id_field, entity_id, error_code, label):
+        if self.strict and entity_id != example[id_field]:
+            return self.respond(404, error_body(error_code, f"{label} not found: {entity_id}"))
+        body = copy.deepcopy(example)
+        body[id_field] = entity_id
+        body["timestamp"] = datetime.utcnow().isoformat() + "Z"
+        self.respond(200, body)
+
+    @staticmethod
+    def matches(vehicle, query):
+        capability = vehicle.get("emergencyCapability") or {}
+        if query.get("vehicleType") and vehicle.get("vehicleType") != query["vehicleType"]:
+            return False
+        if query.get("availabilityStatus") and capability.get("availabilityStatus") != query["availabilityStatus"]:
+            return False
+        if query.get("emergencyCapable") == "true" and not capability.get("emergencyResponse"):
+            return False
+        return True
+
+    def respond(self, status, body):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--strict", action="store_true", help="404 for IDs other than the RAML examples'")
+    args = parser.parse_args()
+
+    StubHandler.latency_ms = args.latency_ms
+    StubHandler.strict = args.strict
+    server = ThreadingHTTPServer((args.host, args.port), StubHandler)
+    print(f"ChainSync API stub on http://{args.host}:{args.port}{BASE_PATH} (latency {args.latency_ms} ms)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""
+Migrate stored incidents to the typed metadata schema
+
+Adds cost_usd, resolution_hours and timestamp_epoch (numbers) to incidents stored
+before metadata schema version 2, so time-range filters and pattern aggregates run
+inside the store. Only metadata is updated; nothing is re-embedded. Safe to re-run.
+
+Usage:
+    CHROMA_PERSIST_DIR=./data/chroma_db python scripts/migrate_incident_metadata.py --batch-size 1000
+"""
+
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from agents.memory_agent import MemoryEnabledAgent  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--persist-dir", default=os.getenv("CHROMA_PERSIST_DIR", "./data/chroma_db"))
+    parser.add_argument("--batch-size", type=int, default=MemoryEnabledAgent.WRITE_BATCH_SIZE)
+    args = parser.parse_args()
+
+    # The embedding backend is only opened, never called: migration does not re-embed
+    agent = MemoryEnabledAgent(
+        persist_directory=args.persist_dir,
+        openai_api_key=os.getenv("OPENAI_API_KEY"),
+        embedding_backend=os.getenv("EMBEDDING_BACKEND", "openai"),
+        embedding_model=os.getenv("EMBEDDING_MODEL") or None
+    )
+    print(json.dumps(agent.migrate_metadata(batch_size=args.batch_size), indent=2))
+
+
+if __name__ == "__main__":
+    main()
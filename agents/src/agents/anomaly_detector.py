@@ -0,0 +1,299 @@
+"""
+Streaming Anomaly Detector for ChainSync
+Incremental per-series rolling statistics (EWMA, rolling z-score, rate of change) over sensor time series
+"""
+
+from typing import Dict, List, Optional, Sequence
+import logging
+import threading
+
+import numpy as np
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Flag bits
+FLAG_SPIKE = 1          # |rolling z-score| above threshold
+FLAG_RISING_TREND = 2   # fast EWMA pulling away above slow EWMA while still rising
+FLAG_FALLING_TREND = 4  # fast EWMA pulling away below slow EWMA while still falling
+
+FLAG_NAMES = {
+    FLAG_SPIKE: "SPIKE",
+    FLAG_RISING_TREND: "RISING_TREND",
+    FLAG_FALLING_TREND: "FALLING_TREND"
+}
+
+
+class StreamingAnomalyDetector:
+    """
+    Tracks rolling statistics for many (station, parameter) series in array-backed ring buffers
+
+    Every series owns one row in a set of preallocated NumPy arrays: a ring buffer
+    of the last `window` values plus running sums and EWMA state. Memory per series
+    is fixed (window * 8 bytes plus ~100 bytes of state), and the number of series is
+    capped at `max_series`; beyond that the least recently updated series is recycled,
+    never one the current batch uses (a new series that would need one is skipped).
+    A batch is applied in vectorized rounds, one update per series per round.
+    """
+
+    def __init__(
+        self,
+        window: int = 60,
+        max_series: int = 50000,
+        fast_alpha: float = 0.3,
+        slow_alpha: float = 0.05,
+        z_threshold: float = 3.0,
+        trend_threshold: float = 1.5,
+        min_samples: int = 10
+    ):
+        """
+        Initialize the detector
+
+        Args:
+            window: Readings kept per series for the rolling mean/std
+            max_series: Maximum tracked series (memory bound)
+            fast_alpha: Smoothing factor of the fast EWMA
+            slow_alpha: Smoothing factor of the slow (baseline) EWMA
+            z_threshold: |z-score| at which a reading is flagged as a spike
+            trend_threshold: Fast/slow EWMA gap, in rolling std units, flagged as a trend
+            min_samples: Readings required before a series can be flagged
+        """
+        self.window = window
+        self.max_series = max_series
+        self.fast_alpha = fast_alpha
+        self.slow_alpha = slow_alpha
+        self.z_threshold = z_threshold
+        self.trend_threshold = trend_threshold
+        self.min_samples = min_samples
+
+        self._lock = threading.Lock()
+        self._slots: Dict[tuple, int] = {}
+        self._keys: List[Optional[tuple]] = []
+        self._sequence = 0
+        self._evictions = 0
+        self._dropped = 0
+        self._allocate(min(1024, max_series))
+
+    def _allocate(self, capacity: int) -> None:
+        """Grow (or create) the per-series arrays to `capacity` rows"""
+        old = getattr(self, "_capacity", 0)
+
+        def grow(name: str, shape: tuple, dtype, fill=0):
+            array = np.full(shape, fill, dtype=dtype)
+            if old:
+                array[:old] = getattr(self, name)
+            setattr(self, name, array)
+
+        grow("_buffer", (capacity, self.window), np.float64)
+        grow("_head", (capacity,), np.int32)
+        grow("_count", (capacity,), np.int32)
+        grow("_seen", (capacity,), np.int64)
+        grow("_sum", (capacity,), np.float64)
+        grow("_sumsq", (capacity,), np.float64)
+        grow("_ewma_fast", (capacity,), np.float64)
+        grow("_ewma_slow", (capacity,), np.float64)
+        grow("_last_value", (capacity,), np.float64, np.nan)
+        grow("_last_ts", (capacity,), np.float64, np.nan)
+        grow("_last_z", (capacity,), np.float64)
+        grow("_last_roc", (capacity,), np.float64)
+        grow("_flags", (capacity,), np.uint8)
+        grow("_updated", (capacity,), np.int64)
+
+        self._keys.extend([None] * (capacity - old))
+        self._capacity = capacity
+
+    def _slot_for(self, key: tuple, batch_start: int) -> int:
+        """
+        Slot of a series, allocating or recycling one if new (caller holds the lock)
+
+        Lookups and allocations both count as use, so every slot the current batch
+        touches is newer than `batch_start` and is never recycled for a later key of
+        the same batch. Returns -1 if all slots are in use by the batch.
+        """
+        slot = self._slots.get(key)
+        if slot is None:
+            if len(self._slots) >= self._capacity and self._capacity < self.max_series:
+                self._allocate(min(self._capacity * 2, self.max_series))
+
+            if len(self._slots) < self._capacity:
+                slot = len(self._slots)
+            else:
+                # Recycle the least recently updated series
+                slot = int(np.argmin(self._updated))
+                if self._updated[slot] > batch_start:
+                    return -1
+                del self._slots[self._keys[slot]]
+                self._evictions += 1
+                self._reset(slot)
+
+            self._slots[key] = slot
+            self._keys[slot] = key
+
+        self._sequence += 1
+        self._updated[slot] = self._sequence
+        return slot
+
+    def _reset(self, slot: int) -> None:
+        for name in ("_head", "_count", "_seen", "_sum", "_sumsq", "_ewma_fast",
+                     "_ewma_slow", "_last_z", "_last_roc", "_flags"):
+            getattr(self, name)[slot] = 0
+        self._last_value[slot] = np.nan
+        self._last_ts[slot] = np.nan
+
+    def ingest_batch(
+        self,
+        station_ids: Sequence[str],
+        parameters: Sequence[str],
+        values: Sequence[float],
+        timestamps: Sequence[float]
+    ) -> List[Dict]:
+        """
+        Apply a batch of readings
+
+        Args:
+            station_ids: Station of each reading
+            parameters: Parameter name of each reading
+            values: Reading values
+            timestamps: Reading times as epoch seconds
+
+        Returns:
+            Series flagged by this batch (station_id, parameter, flags and statistics)
+        """
+        values = np.asarray(values, dtype=np.float64)
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+
+        with self._lock:
+            batch_start = self._sequence
+            slots = np.fromiter(
+                (
+                    self._slot_for((station, parameter), batch_start)
+                    for station, parameter in zip(station_ids, parameters)
+                ),
+                dtype=np.int64,
+                count=len(values)
+            )
+
+            # More distinct series than max_series in one batch: the overflow is skipped
+            kept = slots >= 0
+            if not kept.all():
+                self._dropped += int(np.count_nonzero(~kept))
+                slots, values, timestamps = slots[kept], values[kept], timestamps[kept]
+
+            # Readings are applied in order; each round takes one reading per series
+            flagged = set()
+            remaining = np.arange(len(slots))
+            while remaining.size:
+                _, first = np.unique(slots[remaining], return_index=True)
+                batch = remaining[np.sort(first)]
+                self._update(slots[batch], values[batch], timestamps[batch])
+                flagged.update(int(s) for s in slots[batch][self._flags[slots[batch]] > 0])
+                remaining = np.delete(remaining, np.sort(first))
+
+            return [self._describe(slot) for slot in sorted(flagged)]
+
+    def _update(self, s: np.ndarray, x: np.ndarray, t: np.ndarray) -> None:
+        """Vectorized update of distinct series `s` with values `x` at times `t`"""
+        n = self._count[s]
+        seen = self._seen[s]
+        has_window = n > 0
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(has_window, self._sum[s] / n, 0.0)
+            std = np.sqrt(np.maximum(np.where(has_window, self._sumsq[s] / n, 0.0) - mean ** 2, 0.0))
+            z = np.where((n >= self.min_samples) & (std > 1e-9), (x - mean) / std, 0.0)
+
+            dt_hours = (t - self._last_ts[s]) / 3600.0
+            roc = np.where((seen > 0) & (dt_hours > 0), (x - self._last_value[s]) / dt_hours, 0.0)
+
+        first = seen == 0
+        fast = np.where(first, x, self.fast_alpha * x + (1 - self.fast_alpha) * self._ewma_fast[s])
+        slow = np.where(first, x, self.slow_alpha * x + (1 - self.slow_alpha) * self._ewma_slow[s])
+
+        # Ring buffer: drop the oldest value from the running sums once the window is full
+        head = self._head[s]
+        full = n >= self.window
+        evicted = np.where(full, self._buffer[s, head], 0.0)
+        self._sum[s] += x - evicted
+        self._sumsq[s] += x * x - evicted * evicted
+        self._buffer[s, head] = x
+        self._head[s] = (head + 1) % self.window
+        self._count[s] = np.minimum(n + 1, self.window)
+
+        # Resync the running sums once per full revolution so float error cannot accumulate
+        wrapped = s[(self._head[s] == 0) & full]
+        if wrapped.size:
+            self._sum[wrapped] = self._buffer[wrapped].sum(axis=1)
+            self._sumsq[wrapped] = (self._buffer[wrapped] ** 2).sum(axis=1)
+
+        gap = fast - slow
+        scale = np.maximum(std, 1e-9)
+        ready = n >= self.min_samples
+        flags = np.zeros(len(s), dtype=np.uint8)
+        flags |= np.where(ready & (np.abs(z) >= self.z_threshold), FLAG_SPIKE, 0).astype(np.uint8)
+        flags |= np.where(ready & (gap > self.trend_threshold * scale) & (roc > 0), FLAG_RISING_TREND, 0).astype(np.uint8)
+        flags |= np.where(ready & (gap < -self.trend_threshold * scale) & (roc < 0), FLAG_FALLING_TREND, 0).astype(np.uint8)
+
+        self._ewma_fast[s] = fast
+        self._ewma_slow[s] = slow
+        self._last_value[s] = x
+        self._last_ts[s] = t
+        self._last_z[s] = z
+        self._last_roc[s] = roc
+        self._flags[s] = flags
+        self._seen[s] = seen + 1
+        self._sequence += 1
+        self._updated[s] = self._sequence
+
+    def _describe(self, slot: int) -> Dict:
+        """Current statistics for one series (caller holds the lock)"""
+        station_id, parameter = self._keys[slot]
+        n = int(self._count[slot])
+        mean = self._sum[slot] / n if n else 0.0
+        std = float(np.sqrt(max(self._sumsq[slot] / n - mean ** 2, 0.0))) if n else 0.0
+        flags = int(self._flags[slot])
+        return {
+            "station_id": station_id,
+            "parameter": parameter,
+            "last_value": float(self._last_value[slot]),
+            "rolling_mean": round(float(mean), 4),
+            "rolling_std": round(std, 4),
+            "ewma": round(float(self._ewma_fast[slot]), 4),
+            "baseline_ewma": round(float(self._ewma_slow[slot]), 4),
+            "z_score": round(float(self._last_z[slot]), 2),
+            "rate_of_change_per_hour": round(float(self._last_roc[slot]), 4),
+            "samples": int(self._seen[slot]),
+            "flags": [name for bit, name in FLAG_NAMES.items() if flags & bit]
+        }
+
+    def get_station_trends(self, station_id: str, flagged_only: bool = False) -> List[Dict]:
+        """Statistics for every tracked parameter of a station"""
+        with self._lock:
+            slots = [slot for (station, _), slot in self._slots.items() if station == station_id]
+            trends = [self._describe(slot) for slot in slots]
+        return [t for t in trends if t["flags"]] if flagged_only else trends
+
+    def get_flagged(self, limit: int = 100) -> List[Dict]:
+        """Series whose latest reading raised a flag"""
+        with self._lock:
+            slots = np.nonzero(self._flags[:len(self._keys)] > 0)[0][:limit]
+            return [self._describe(int(slot)) for slot in slots if self._keys[slot] is not None]
+
+    def get_statistics(self) -> Dict:
+        with self._lock:
+            bytes_used = sum(
+                getattr(self, name).nbytes
+                for name in ("_buffer", "_head", "_count", "_seen", "_sum", "_sumsq", "_ewma_fast",
+                             "_ewma_slow", "_last_value", "_last_ts", "_last_z", "_last_roc",
+                             "_flags", "_updated")
+            )
+            return {
+                "tracked_series": len(self._slots),
+                "capacity": self._capacity,
+                "max_series": self.max_series,
+                "window": self.window,
+                "evictions": self._evictions,
+                "dropped_readings": self._dropped,
+                "array_bytes": bytes_used,
+                "bytes_per_series": bytes_used // self._capacity if self._capacity else 0,
+                "flagged_series": int(np.count_nonzero(self._flags))
+            }
@@ -0,0 +1,147 @@
+"""
+ChainSync Platform API Client for ChainSync AI Agents
+Live facility, station and service-vehicle lookups with request coalescing and a short-TTL cache
+"""
+
+from typing import Any, Dict, List, Optional
+import logging
+import threading
+import time
+import urllib.parse
+
+import httpx
+
+from .coalescing_cache import CoalescingCache
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class ChainSyncAPIError(Exception):
+    """Raised when the platform API returns an error or cannot be reached"""
+
+    def __init__(self, status_code: Optional[int], message: str):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class ChainSyncDataClient:
+    """
+    Read-only client for the ChainSync platform API (Mule) used by the reasoning tools
+
+    Identical GETs in flight at the same time share one upstream request: the first
+    caller fetches, the others wait on the same future (see CoalescingCache).
+    Successful responses are kept for `ttl_seconds`, so concurrent analyses of the
+    same facility share one fetch while readings stay fresh. Errors are shared with
+    waiting callers but never cached.
+    """
+
+    def __init__(self, http_client: httpx.Client, ttl_seconds: float = 15.0, max_entries: int = 1024):
+        """
+        Initialize the client
+
+        Args:
+            http_client: Client whose base_url is the platform API (CHAINSYNC_API_URL)
+            ttl_seconds: Lifetime of a cached response (<= 0 disables caching; coalescing still applies)
+            max_entries: Cached responses kept before LRU eviction
+        """
+        self.http_client = http_client
+        self._cache = CoalescingCache(ttl_seconds, max_entries)
+
+        self._lock = threading.Lock()
+        self._upstream_calls = 0
+        self._upstream_errors = 0
+        self._upstream_ms = 0.0
+
+    def get_facility(self, facility_id: str) -> Dict:
+        """Current monitoring data for a facility (GET /environmental-facilities/{facilityId})"""
+        return self._get(f"/environmental-facilities/{urllib.parse.quote(facility_id, safe='')}")
+
+    def get_station_data(
+        self,
+        station_id: str,
+        start_time: Optional[str] = None,
+        end_time: Optional[str] = None
+    ) -> Dict:
+        """Current environmental data for a monitoring station (GET /environmental-data/{stationId})"""
+        return self._get(
+            f"/environmental-data/{urllib.parse.quote(station_id, safe='')}",
+            {"startTime": start_time, "endTime": end_time}
+        )
+
+    def list_vehicles(
+        self,
+        vehicle_type: Optional[str] = None,
+        availability_status: Optional[str] = None,
+        emergency_capable: Optional[bool] = None,
+        latitude: Optional[float] = None,
+        longitude: Optional[float] = None,
+        radius_km: Optional[float] = None
+    ) -> List[Dict]:
+        """Service vehicles matching the VehicleFilterTrait/GeoFilterTrait filters (GET /environmental-service-vehicles)"""
+        return self._get("/environmental-service-vehicles", {
+            "vehicleType": vehicle_type,
+            "availabilityStatus": availability_status,
+            "emergencyCapable": None if emergency_capable is None else str(emergency_capable).lower(),
+            "latitude": latitude,
+            "longitude": longitude,
+            "radiusKm": radius_km
+        })
+
+    def _get(self, path: str, params: Optional[Dict] = None) -> Any:
+        """GET through the coalescing cache; returns a deep copy of the parsed body"""
+        params = {name: value for name, value in (params or {}).items() if value is not None}
+        key = path + ("?" + urllib.parse.urlencode(sorted(params.items())) if params else "")
+
+        body, _ = self._cache.get_or_compute(key, lambda: self._fetch(path, params))
+        return body
+
+    def _fetch(self, path: str, params: Dict) -> Any:
+        started = time.perf_counter()
+        failed = True
+        try:
+            try:
+                response = self.http_client.get(path.lstrip("/"), params=params)
+                body = response.json() if response.status_code < 400 else None
+            except (httpx.HTTPError, ValueError) as e:
+                raise ChainSyncAPIError(None, f"ChainSync API request failed: {str(e)}")
+            if response.status_code >= 400:
+                raise ChainSyncAPIError(response.status_code, self._error_message(response))
+            failed = False
+            return body
+        finally:
+            with self._lock:
+                self._upstream_calls += 1
+                self._upstream_errors += int(failed)
+                self._upstream_ms += (time.perf_counter() - started) * 1000
+
+    @staticmethod
+    def _error_message(response: httpx.Response) -> str:
+        """Message of the platform's ErrorResponse body, or the raw body"""
+        try:
+            return response.json()["error"]["message"]
+        except (ValueError, KeyError, TypeError):
+            return response.text[:200] or response.reason_phrase
+
+    @property
+    def ttl_seconds(self) -> float:
+        return self._cache.ttl_seconds
+
+    def get_statistics(self) -> Dict:
+        """Cache hits, coalesced lookups and upstream call counts/latency"""
+        cache = self._cache.get_statistics()
+        with self._lock:
+            lookups = cache["hits"] + cache["coalesced"] + self._upstream_calls
+            return {
+                "base_url": str(self.http_client.base_url),
+                "ttl_seconds": self.ttl_seconds,
+                "entries": cache["entries"],
+                "in_flight": cache["in_flight"],
+                "lookups": lookups,
+                "cache_hits": cache["hits"],
+                "coalesced": cache["coalesced"],
+                "upstream_calls": self._upstream_calls,
+                "upstream_errors": self._upstream_errors,
+                "avg_upstream_ms": round(self._upstream_ms / self._upstream_calls, 2) if self._upstream_calls else 0,
+                "upstream_savings_rate": round(1 - self._upstream_calls / lookups, 3) if lookups else 0
+            }
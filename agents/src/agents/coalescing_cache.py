@@ -0,0 +1,140 @@
+"""
+Coalescing Cache for ChainSync
+TTL/LRU cache that computes a missing key once for all concurrent callers
+"""
+
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional, Tuple
+import copy
+import threading
+import time
+
+
+class CoalescingCache:
+    """
+    TTL/LRU cache with in-flight coalescing
+
+    Concurrent lookups of a missing key share one computation: the first caller
+    computes, the others wait on the same future and receive its result or its
+    exception. Exceptions are never cached, and neither is a result whose computation
+    overlapped an invalidate() call. Callers always get deep copies.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        """
+        Initialize the cache
+
+        Args:
+            ttl_seconds: Lifetime of a stored value (<= 0 disables storing; coalescing still applies)
+            max_entries: Maximum stored values before LRU eviction
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._in_flight: Dict[str, Future] = {}
+        # Bumped by every invalidate(); a compute started under an older generation is not stored
+        self._generation = 0
+        self._hits = 0
+        self._misses = 0
+        self._coalesced = 0
+        self._invalidated = 0
+
+    def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Any],
+        should_store: Optional[Callable[[Any], bool]] = None,
+        tags: Optional[Dict] = None
+    ) -> Tuple[Any, str]:
+        """
+        Return a stored value or compute it once for all concurrent callers
+
+        Args:
+            key: Cache key
+            compute: Callable producing the value
+            should_store: Predicate deciding whether a computed value is stored (all if None)
+            tags: Attributes kept with the entry for invalidate() to match on
+
+        Returns:
+            Tuple of (value copy, status: "hit", "miss" or "coalesced")
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry["expires_at"] > time.monotonic():
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return copy.deepcopy(entry["value"]), "hit"
+            if entry is not None:
+                del self._entries[key]
+
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._in_flight[key] = future
+                self._misses += 1
+                generation = self._generation
+            else:
+                self._coalesced += 1
+
+        if not owner:
+            return copy.deepcopy(future.result()), "coalesced"
+
+        try:
+            value = compute()
+        except Exception as e:
+            # Waiting callers get the same error
+            with self._lock:
+                self._in_flight.pop(key, None)
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            self._in_flight.pop(key, None)
+            if (
+                self.ttl_seconds > 0
+                and generation == self._generation
+                and (should_store is None or should_store(value))
+            ):
+                self._entries[key] = {
+                    "value": value,
+                    "tags": tags or {},
+                    "expires_at": time.monotonic() + self.ttl_seconds
+                }
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        future.set_result(value)
+
+        return copy.deepcopy(value), "miss"
+
+    def invalidate(self, match: Optional[Callable[[Dict], bool]] = None) -> int:
+        """
+        Drop stored values whose tags satisfy `match` (all if None)
+
+        Computations in flight are not stored when they finish.
+
+        Returns:
+            Number of entries removed
+        """
+        with self._lock:
+            doomed = [key for key, entry in self._entries.items() if match is None or match(entry["tags"])]
+            for key in doomed:
+                del self._entries[key]
+            self._invalidated += len(doomed)
+            self._generation += 1
+        return len(doomed)
+
+    def get_statistics(self) -> Dict:
+        """Entry count and hit/miss/coalescing counters"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "in_flight": len(self._in_flight),
+                "hits": self._hits,
+                "misses": self._misses,
+                "coalesced": self._coalesced,
+                "invalidated": self._invalidated
+            }
@@ -0,0 +1,112 @@
+"""
+Sensor Compliance Engine for ChainSync
+Vectorized evaluation of sensor readings against regulatory limits
+"""
+
+from typing import Any, Dict, List
+import logging
+
+import numpy as np
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Share of the max limit at which a reading is flagged as approaching it
+WARNING_RATIO = 0.9
+
+
+class SensorComplianceEngine:
+    """
+    Evaluates batches of readings (stations x parameters) against a limit table in one pass
+
+    The limit table is compiled once into column arrays; each batch becomes a value
+    matrix (NaN where a station did not report a parameter) compared against them.
+    """
+
+    def __init__(self, limits: Dict[str, Dict]):
+        """
+        Initialize the engine
+
+        Args:
+            limits: Parameter -> {min?, max?, unit?, regulation} (see RegulatoryRuleStore)
+        """
+        self.limits = limits
+        self.parameters = list(self.limits)
+        self.index = {param: i for i, param in enumerate(self.parameters)}
+
+        self.mins = np.array(
+            [self.limits[p].get('min', np.nan) for p in self.parameters], dtype=float
+        )
+        self.maxs = np.array(
+            [self.limits[p].get('max', np.nan) for p in self.parameters], dtype=float
+        )
+        self.regulations = [self.limits[p].get('regulation', '') for p in self.parameters]
+
+        logger.debug(f"Compliance engine compiled {len(self.parameters)} parameter limits")
+
+    def evaluate(self, reading: Dict[str, Any]) -> Dict:
+        """Evaluate a single reading (see evaluate_batch)"""
+        return self.evaluate_batch([reading])[0]
+
+    def evaluate_batch(self, readings: List[Dict[str, Any]]) -> List[Dict]:
+        """
+        Evaluate many readings at once
+
+        Args:
+            readings: List of parameter -> value dicts, one per station/sample
+
+        Returns:
+            One result per reading with violations, warnings, severity and
+            total_parameters_checked (same shape as the analyze_sensor_data tool)
+        """
+        rows = len(readings)
+        values = np.full((rows, len(self.parameters)), np.nan)
+        invalid: List[List[str]] = [[] for _ in range(rows)]
+
+        for row, reading in enumerate(readings):
+            for param, value in reading.items():
+                col = self.index.get(param)
+                if col is None:
+                    continue
+                try:
+                    values[row, col] = float(value)
+                except (TypeError, ValueError):
+                    invalid[row].append(param)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            above = values > self.maxs
+            # Matches the single-reading rule: a max breach takes precedence over min
+            below = (values < self.mins) & ~above
+            ratio = values / self.maxs
+            near = (ratio > WARNING_RATIO) & (values <= self.maxs)
+
+        results = [
+            {"violations": [], "warnings": [], "severity": "NORMAL", "total_parameters_checked": len(reading)}
+            for reading in readings
+        ]
+
+        for row, col in zip(*np.nonzero(above | below)):
+            param = self.parameters[col]
+            value = readings[row][param]
+            if above[row, col]:
+                message = f"{param}: {value} exceeds max {self.limits[param]['max']} ({self.regulations[col]})"
+            else:
+                message = f"{param}: {value} below min {self.limits[param]['min']} ({self.regulations[col]})"
+            results[row]["violations"].append(message)
+
+        for row, col in zip(*np.nonzero(near)):
+            param = self.parameters[col]
+            value = readings[row][param]
+            results[row]["warnings"].append(
+                f"{param} at {ratio[row, col] * 100:.0f}% of limit ({value}/{self.limits[param]['max']})"
+            )
+
+        for row, result in enumerate(results):
+            if result["violations"]:
+                result["severity"] = "CRITICAL"
+            elif result["warnings"]:
+                result["severity"] = "WARNING"
+            if invalid[row]:
+                result["invalid_parameters"] = invalid[row]
+
+        return results
@@ -0,0 +1,130 @@
+"""
+Embedding Backends for ChainSync Memory Agent
+Selects the embedding function used for incident storage and recall
+"""
+
+from typing import List, Optional, Tuple
+import hashlib
+import logging
+import math
+import re
+
+from .http_clients import HttpClientPool
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Backend name -> default model
+DEFAULT_MODELS = {
+    "openai": "text-embedding-3-small",
+    "local": "all-MiniLM-L6-v2",
+    "hashing": "hashing-512"
+}
+
+
+class HashingEmbeddingFunction:
+    """
+    Deterministic hashing-vectorizer embeddings
+
+    Word unigrams/bigrams and character trigrams are hashed into a fixed number of
+    signed buckets and L2-normalized. Needs no model files or network access, so it
+    is suitable for tests and as a last-resort fallback; semantic quality is lexical only.
+    """
+
+    _token_pattern = re.compile(r"[a-z0-9_.]+")
+
+    def __init__(self, dimensions: int = 512):
+        self.dimensions = dimensions
+
+    def __call__(self, input: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in input]
+
+    def _embed(self, text: str) -> List[float]:
+        vector = [0.0] * self.dimensions
+        tokens = self._token_pattern.findall(text.lower())
+
+        features = list(tokens)
+        features.extend(f"{a} {b}" for a, b in zip(tokens, tokens[1:]))
+        for token in tokens:
+            padded = f"#{token}#"
+            features.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+
+        for feature in features:
+            digest = hashlib.md5(feature.encode("utf-8")).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self.dimensions
+            vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+
+        norm = math.sqrt(sum(v * v for v in vector))
+        return [v / norm for v in vector] if norm else vector
+
+
+class OpenAIEmbeddingFunction:
+    """
+    OpenAI embeddings through a given SDK client
+
+    Same behaviour as Chroma's OpenAIEmbeddingFunction, but the client is passed in so
+    embedding requests can share the process-wide OpenAI connection pool.
+    """
+
+    def __init__(self, client, model_name: str):
+        self._client = client
+        self.model_name = model_name
+
+    def __call__(self, input: List[str]) -> List[List[float]]:
+        response = self._client.embeddings.create(
+            input=[text.replace("\n", " ") for text in input],
+            model=self.model_name
+        )
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+
+def create_embedding_function(
+    backend: str = "openai",
+    model_name: Optional[str] = None,
+    openai_api_key: Optional[str] = None,
+    http_clients: Optional[HttpClientPool] = None
+) -> Tuple[object, str]:
+    """
+    Build the embedding function for the configured backend
+
+    Args:
+        backend: One of "openai", "local" (sentence-transformers on CPU) or "hashing"
+        model_name: Model name/path; defaults per backend
+        openai_api_key: Required for the openai backend
+        http_clients: Shared connection pool for OpenAI requests (SDK default client if None)
+
+    Returns:
+        Tuple of (ChromaDB-compatible embedding function, model identifier)
+    """
+    backend = (backend or "openai").lower()
+    if backend not in DEFAULT_MODELS:
+        raise ValueError(f"Unknown embedding backend '{backend}'. Expected one of {sorted(DEFAULT_MODELS)}")
+
+    model_name = model_name or DEFAULT_MODELS[backend]
+    logger.info(f"Using {backend} embedding backend with model {model_name}")
+
+    if backend == "openai":
+        import openai
+
+        if not openai_api_key:
+            raise ValueError("OPENAI_API_KEY is required for the openai embedding backend")
+        client = http_clients.openai_client(openai_api_key) if http_clients else openai.OpenAI(api_key=openai_api_key)
+        function = OpenAIEmbeddingFunction(client, model_name)
+
+    elif backend == "local":
+        from chromadb.utils import embedding_functions
+
+        # Accepts a model name or a local path, so air-gapped sites can ship the model files.
+        # Raises ValueError if sentence-transformers is not installed.
+        function = embedding_functions.SentenceTransformerEmbeddingFunction(
+            model_name=model_name,
+            device="cpu",
+            normalize_embeddings=True
+        )
+
+    else:
+        # Model name encodes the vector size, e.g. "hashing-512"
+        suffix = model_name.rsplit("-", 1)[-1]
+        function = HashingEmbeddingFunction(dimensions=int(suffix) if suffix.isdigit() else 512)
+
+    return function, f"{backend}:{model_name}"
@@ -0,0 +1,163 @@
+"""
+Embedding Cache for ChainSync Memory Agent
+Content-addressed cache in front of an embedding function so identical texts are embedded once
+"""
+
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Optional
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class CachedEmbeddingFunction:
+    """
+    Wraps a ChromaDB embedding function with an in-memory LRU and an optional on-disk store
+
+    Keys are SHA-256 hashes of the model name and text, so entries from different
+    embedding models never collide. Vectors are held as float32 arrays (about 6 KB per
+    1536-dimension embedding, a quarter of a list of floats' 49 KB) and converted to
+    lists only when returned.
+    """
+
+    def __init__(
+        self,
+        embedding_function,
+        model_name: str,
+        max_entries: int = 10000,
+        disk_path: Optional[str] = None
+    ):
+        """
+        Initialize the embedding cache
+
+        Args:
+            embedding_function: Underlying ChromaDB-compatible embedding function
+            model_name: Embedding model name (part of the cache key)
+            max_entries: Maximum number of embeddings held in memory
+            disk_path: Optional SQLite file for persisting embeddings across restarts
+        """
+        self.embedding_function = embedding_function
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.disk_path = disk_path
+
+        self._lru: "OrderedDict[str, array]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+
+        self._db = None
+        if disk_path:
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(disk_path)), exist_ok=True)
+                self._db = sqlite3.connect(disk_path, check_same_thread=False)
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+                )
+                self._db.commit()
+                logger.info(f"Embedding cache persisted at {disk_path}")
+            except Exception as e:
+                logger.warning(f"Disabling on-disk embedding cache ({disk_path}): {str(e)}")
+                self._db = None
+
+    def __call__(self, input: List[str]) -> List[List[float]]:
+        """Embed texts, only calling the underlying function for cache misses"""
+        keys = [self._key(text) for text in input]
+        embeddings: List[Optional[List[float]]] = [None] * len(input)
+        missing: Dict[str, List[int]] = {}
+
+        with self._lock:
+            for i, key in enumerate(keys):
+                cached = self._lru.get(key)
+                if cached is not None:
+                    self._lru.move_to_end(key)
+                    self._hits += 1
+                    embeddings[i] = cached.tolist()
+                else:
+                    missing.setdefault(key, []).append(i)
+
+        if missing and self._db is not None:
+            for key, vector in self._disk_lookup(list(missing)).items():
+                for i in missing.pop(key):
+                    embeddings[i] = vector.tolist()
+                with self._lock:
+                    self._disk_hits += 1
+                    self._remember(key, vector)
+
+        if missing:
+            # Embed each distinct missing text once, even if repeated in the batch
+            miss_keys = list(missing)
+            texts = [input[missing[key][0]] for key in miss_keys]
+            # Rounded to float32 like cached entries, so a text embeds the same hit or miss
+            vectors = [array('f', v) for v in self.embedding_function(texts)]
+
+            with self._lock:
+                self._misses += len(miss_keys)
+                for key, vector in zip(miss_keys, vectors):
+                    self._remember(key, vector)
+                    for i in missing[key]:
+                        embeddings[i] = vector.tolist()
+
+            if self._db is not None:
+                self._disk_store(dict(zip(miss_keys, vectors)))
+
+        return embeddings
+
+    def get_statistics(self) -> Dict:
+        """Hit/miss counters for the stats endpoint"""
+        with self._lock:
+            lookups = self._hits + self._disk_hits + self._misses
+            return {
+                "entries_in_memory": len(self._lru),
+                "bytes_in_memory": sum(len(vector) * vector.itemsize for vector in self._lru.values()),
+                "max_entries": self.max_entries,
+                "memory_hits": self._hits,
+                "disk_hits": self._disk_hits,
+                "misses": self._misses,
+                "hit_rate": round((self._hits + self._disk_hits) / lookups, 3) if lookups else 0,
+                "disk_path": self.disk_path if self._db is not None else None
+            }
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model_name}\x00{text}".encode("utf-8")).hexdigest()
+
+    def _remember(self, key: str, vector: array) -> None:
+        """Insert into the LRU (caller holds the lock)"""
+        self._lru[key] = vector
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+
+    def _disk_lookup(self, keys: List[str]) -> Dict[str, array]:
+        found = {}
+        try:
+            with self._lock:
+                for start in range(0, len(keys), 500):
+                    chunk = keys[start:start + 500]
+                    rows = self._db.execute(
+                        f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})",
+                        chunk
+                    ).fetchall()
+                    for key, blob in rows:
+                        found[key] = array('f', blob)
+        except Exception as e:
+            logger.warning(f"Embedding cache disk lookup failed: {str(e)}")
+        return found
+
+    def _disk_store(self, entries: Dict[str, array]) -> None:
+        try:
+            with self._lock:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                    [(key, vector.tobytes()) for key, vector in entries.items()]
+                )
+                self._db.commit()
+        except Exception as e:
+            logger.warning(f"Embedding cache disk write failed: {str(e)}")
@@ -0,0 +1,116 @@
+"""
+Executor Pools for ChainSync AI Agents
+Runs blocking agent work (Chroma I/O, LLM calls) off the asyncio event loop
+"""
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict
+import asyncio
+import logging
+import threading
+import time
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class ExecutorPool:
+    """
+    Sized thread pool with queue-depth and latency metrics
+
+    Each kind of blocking work gets its own pool so a burst of slow LLM runs cannot
+    starve Chroma reads/writes (or the event loop serving /health).
+    """
+
+    def __init__(self, name: str, max_workers: int):
+        """
+        Initialize the pool
+
+        Args:
+            name: Pool name used in thread names and metrics
+            max_workers: Number of worker threads
+        """
+        self.name = name
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"{name}-worker")
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._active = 0
+        self._completed = 0
+        self._failed = 0
+        self._cancelled = 0
+        self._max_queue_depth = 0
+        self._total_wait = 0.0
+        self._total_run = 0.0
+
+        logger.info(f"Executor pool '{name}' started with {max_workers} workers")
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """Run a blocking callable in the pool and await its result"""
+        submitted_at = time.perf_counter()
+        with self._lock:
+            self._queued += 1
+            self._max_queue_depth = max(self._max_queue_depth, self._queued)
+
+        try:
+            future = self._executor.submit(self._execute, submitted_at, func, *args, **kwargs)
+        except RuntimeError:
+            # Pool already shut down
+            with self._lock:
+                self._queued -= 1
+            raise
+        future.add_done_callback(self._on_done)
+
+        # Cancelling the awaiting task (e.g. an asyncio.wait_for timeout) cancels the
+        # pool future too, if the call has not started yet
+        return await asyncio.wrap_future(future)
+
+    def _on_done(self, future: Future) -> None:
+        """A call cancelled before it started (timeout, shutdown) never reaches _execute"""
+        if future.cancelled():
+            with self._lock:
+                self._queued -= 1
+                self._cancelled += 1
+
+    def _execute(self, submitted_at: float, func: Callable, *args, **kwargs) -> Any:
+        started_at = time.perf_counter()
+        with self._lock:
+            self._queued -= 1
+            self._active += 1
+            self._total_wait += started_at - submitted_at
+
+        failed = False
+        try:
+            return func(*args, **kwargs)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            with self._lock:
+                self._active -= 1
+                self._total_run += time.perf_counter() - started_at
+                if failed:
+                    self._failed += 1
+                else:
+                    self._completed += 1
+
+    def get_statistics(self) -> Dict:
+        """Pool size, queue depth and timing metrics"""
+        with self._lock:
+            finished = self._completed + self._failed
+            return {
+                "name": self.name,
+                "max_workers": self.max_workers,
+                "active": self._active,
+                "queue_depth": self._queued,
+                "max_queue_depth": self._max_queue_depth,
+                "completed": self._completed,
+                "failed": self._failed,
+                "cancelled": self._cancelled,
+                "avg_wait_ms": round(self._total_wait / finished * 1000, 2) if finished else 0,
+                "avg_run_ms": round(self._total_run / finished * 1000, 2) if finished else 0
+            }
+
+    def shutdown(self, wait: bool = False) -> None:
+        """Stop accepting work and release the worker threads"""
+        self._executor.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,285 @@
+"""
+HTTP Client Pool for ChainSync
+Process-wide keep-alive httpx clients (OpenAI, ChainSync Mule API, webhooks) with pool metrics
+"""
+
+from typing import Dict, List, Optional
+import importlib.util
+import logging
+import threading
+import time
+
+import httpx
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Named clients; each upstream host gets its own pool and limits
+OPENAI_CLIENT = "openai"
+CHAINSYNC_CLIENT = "chainsync"
+CALLBACK_CLIENT = "callbacks"
+
+OPENAI_BASE_URL = "https://api.openai.com/v1"
+
+# HTTP/2 needs the h2 package (httpx[http2]); without it clients fall back to HTTP/1.1
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+class _ClientMetrics:
+    """Request, connection and pool-occupancy counters of one client"""
+
+    def __init__(self, max_connections: int):
+        self.max_connections = max_connections
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.failed = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.pool_waits = 0
+        self.connections_opened = 0
+        self.tls_handshakes = 0
+        self.total_headers_ms = 0.0
+        self.max_headers_ms = 0.0
+        self.http_versions: Dict[str, int] = {}
+
+    def request_started(self) -> None:
+        with self._lock:
+            # Every connection is busy: this request waits for one to free up
+            if self.in_flight >= self.max_connections:
+                self.pool_waits += 1
+            self.requests += 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def headers_received(self, started: float, http_version: str) -> None:
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            self.total_headers_ms += elapsed_ms
+            self.max_headers_ms = max(self.max_headers_ms, elapsed_ms)
+            self.http_versions[http_version] = self.http_versions.get(http_version, 0) + 1
+
+    def request_finished(self, failed: bool = False) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            self.failed += int(failed)
+
+    def trace(self, event_name: str, info: Dict) -> None:
+        """httpcore trace hook: counts new connections and TLS handshakes"""
+        if event_name == "connection.connect_tcp.complete":
+            with self._lock:
+                self.connections_opened += 1
+        elif event_name == "connection.start_tls.complete":
+            with self._lock:
+                self.tls_handshakes += 1
+
+
+class _TrackedStream(httpx.SyncByteStream):
+    """Response body wrapper that releases the in-flight slot when the response closes"""
+
+    def __init__(self, stream: httpx.SyncByteStream, metrics: _ClientMetrics):
+        self._stream = stream
+        self._metrics = metrics
+        self._closed = False
+
+    def __iter__(self):
+        yield from self._stream
+
+    def close(self) -> None:
+        try:
+            self._stream.close()
+        finally:
+            if not self._closed:
+                self._closed = True
+                self._metrics.request_finished()
+
+
+class _InstrumentedTransport(httpx.HTTPTransport):
+    """HTTPTransport that feeds _ClientMetrics"""
+
+    def __init__(self, metrics: _ClientMetrics, **kwargs):
+        super().__init__(**kwargs)
+        self.metrics = metrics
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        self.metrics.request_started()
+        request.extensions["trace"] = self.metrics.trace
+        started = time.perf_counter()
+        try:
+            response = super().handle_request(request)
+        except Exception:
+            self.metrics.request_finished(failed=True)
+            raise
+
+        self.metrics.headers_received(started, response.extensions.get("http_version", b"").decode() or "unknown")
+        response.stream = _TrackedStream(response.stream, self.metrics)
+        return response
+
+    def pool_connections(self) -> Dict[str, int]:
+        """Open and idle connections currently held by the httpcore pool"""
+        connections = list(getattr(getattr(self, "_pool", None), "connections", []))
+        return {
+            "open_connections": len(connections),
+            "idle_connections": sum(1 for connection in connections if connection.is_idle())
+        }
+
+
+class HttpClientPool:
+    """
+    Shared keep-alive httpx clients, one per upstream
+
+    Clients are created once per name and reused by every caller, so TCP/TLS setup
+    happens on the first request to a host (or at warm-up) instead of per call. Each
+    client has its own connection limits and timeouts and records in-flight requests,
+    pool waits (requests started with every connection busy), connections opened and
+    TLS handshakes.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 50,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 60.0,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 60.0,
+        http2: bool = True
+    ):
+        """
+        Initialize the pool (clients are created on first use)
+
+        Args:
+            max_connections: Connection limit per client (per upstream host)
+            max_keepalive_connections: Idle connections kept open per client
+            keepalive_expiry: Seconds an idle connection is kept
+            connect_timeout: Default TCP/TLS connect timeout in seconds
+            read_timeout: Default read/write timeout in seconds
+            http2: Negotiate HTTP/2 where the server supports it (needs h2 installed)
+        """
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.http2 = http2 and HTTP2_AVAILABLE
+        if http2 and not HTTP2_AVAILABLE:
+            logger.warning("HTTP/2 requested but the h2 package is not installed; using HTTP/1.1")
+
+        self._lock = threading.Lock()
+        self._clients: Dict[str, httpx.Client] = {}
+        self._transports: Dict[str, _InstrumentedTransport] = {}
+
+    def client(
+        self,
+        name: str,
+        base_url: str = "",
+        read_timeout: Optional[float] = None,
+        max_connections: Optional[int] = None,
+        headers: Optional[Dict[str, str]] = None
+    ) -> httpx.Client:
+        """
+        Get (or create) the shared client for an upstream
+
+        Args:
+            name: Client name, e.g. OPENAI_CLIENT or CHAINSYNC_CLIENT
+            base_url: Base URL for relative request paths
+            read_timeout: Read/write timeout override in seconds
+            max_connections: Connection limit override
+            headers: Default headers (e.g. Authorization) sent with every request
+
+        Returns:
+            The shared httpx.Client; settings only apply when it is first created
+        """
+        with self._lock:
+            existing = self._clients.get(name)
+            if existing is not None:
+                return existing
+
+            limit = max_connections or self.max_connections
+            transport = _InstrumentedTransport(
+                _ClientMetrics(limit),
+                http2=self.http2,
+                limits=httpx.Limits(
+                    max_connections=limit,
+                    max_keepalive_connections=min(self.max_keepalive_connections, limit),
+                    keepalive_expiry=self.keepalive_expiry
+                )
+            )
+            client = httpx.Client(
+                base_url=base_url,
+                headers=headers,
+                transport=transport,
+                timeout=httpx.Timeout(read_timeout or self.read_timeout, connect=self.connect_timeout)
+            )
+            self._clients[name] = client
+            self._transports[name] = transport
+            logger.info(f"HTTP client '{name}' created (max {limit} connections, http2={self.http2})")
+            return client
+
+    def openai_client(self, api_key: str):
+        """openai.OpenAI SDK client on the shared OpenAI connection pool"""
+        import openai
+
+        client = self.client(OPENAI_CLIENT, base_url=OPENAI_BASE_URL)
+        return openai.OpenAI(api_key=api_key, http_client=client, timeout=client.timeout)
+
+    def warm_up(self, names: Optional[List[str]] = None) -> threading.Thread:
+        """
+        Open a connection per client in the background so the first real request
+        does not pay for TCP/TLS setup
+
+        Any HTTP response (including 401/404) counts as warmed; errors are only logged.
+        """
+        def run():
+            for name in names or list(self._clients):
+                client = self._clients.get(name)
+                if client is None:
+                    continue
+                try:
+                    client.head(str(client.base_url) or "/")
+                except Exception as e:
+                    logger.warning(f"HTTP client '{name}' warm-up failed: {str(e)}")
+
+        thread = threading.Thread(target=run, name="http-warmup", daemon=True)
+        thread.start()
+        return thread
+
+    def close(self) -> None:
+        with self._lock:
+            for client in self._clients.values():
+                client.close()
+            self._clients.clear()
+            self._transports.clear()
+
+    def get_statistics(self) -> Dict:
+        """Per-client requests, pool occupancy, waits and connection reuse"""
+        with self._lock:
+            transports = dict(self._transports)
+            clients = dict(self._clients)
+
+        stats = {}
+        for name, transport in transports.items():
+            metrics = transport.metrics
+            with metrics._lock:
+                requests = metrics.requests
+                stats[name] = {
+                    "base_url": str(clients[name].base_url),
+                    "requests": requests,
+                    "failed": metrics.failed,
+                    "in_flight": metrics.in_flight,
+                    "peak_in_flight": metrics.peak_in_flight,
+                    "max_connections": metrics.max_connections,
+                    "utilization": round(metrics.in_flight / metrics.max_connections, 3),
+                    "pool_waits": metrics.pool_waits,
+                    "connections_opened": metrics.connections_opened,
+                    "tls_handshakes": metrics.tls_handshakes,
+                    "connection_reuse_rate": round(1 - metrics.connections_opened / requests, 3) if requests else 0,
+                    "avg_time_to_headers_ms": round(metrics.total_headers_ms / requests, 2) if requests else 0,
+                    "max_time_to_headers_ms": round(metrics.max_headers_ms, 2),
+                    "http_versions": dict(metrics.http_versions)
+                }
+            stats[name].update(transport.pool_connections())
+
+        return {
+            "http2": self.http2,
+            "keepalive_expiry_seconds": self.keepalive_expiry,
+            "clients": stats
+        }
@@ -0,0 +1,288 @@
+"""
+Incident Archive for ChainSync
+Compressed, on-demand searchable cold tier for incidents moved out of the hot Chroma collection
+"""
+
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+import json
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+
+from .incident_schema import to_epoch
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SEGMENT_PREFIX = "segment-"
+SEGMENT_SUFFIX = ".npz"
+
+# Metadata fields kept as columns so archive searches can filter without parsing JSON
+FILTER_COLUMNS = ("incident_type", "facility_id", "outcome")
+
+
+class IncidentArchive:
+    """
+    Append-only archive of incidents in compressed NumPy segments
+
+    Each retention pass writes one segment (np.savez_compressed) holding ids, documents,
+    metadata JSON, filter columns and float16 embeddings. Searches are on demand: the
+    segments are loaded (and kept until the set of segments changes) and ranked with one
+    vectorized cosine-distance pass, the same distance the hot collection uses. compact()
+    merges segments once there are more than max_segments. The ids of every segment are
+    kept in memory so writes can tell whether an incident is archived.
+    """
+
+    def __init__(self, directory: str, max_segments: int = 8):
+        """
+        Initialize the archive
+
+        Args:
+            directory: Directory holding the segment files (created on first write)
+            max_segments: Segment count above which compact() merges them into one
+        """
+        self.directory = directory
+        self.max_segments = max_segments
+
+        self._lock = threading.Lock()
+        self._ids: Dict[str, Set[str]] = {}
+        self._loaded: Optional[Tuple[Tuple[str, ...], Dict[str, np.ndarray]]] = None
+        self._searches = 0
+        self._merges = 0
+
+        for path in self._segment_paths():
+            try:
+                with np.load(path, allow_pickle=False) as segment:
+                    self._ids[path] = set(segment["ids"].tolist())
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"Skipping unreadable archive segment {path}: {str(e)}")
+
+    @property
+    def count(self) -> int:
+        with self._lock:
+            return sum(len(ids) for ids in self._ids.values())
+
+    def append(self, ids: List[str], documents: List[str], metadatas: List[Dict], embeddings: List) -> str:
+        """
+        Write incidents to a new segment
+
+        Returns:
+            Path of the segment written
+        """
+        path = self._new_segment_path()
+        self._write(path, self._columns(ids, documents, metadatas, embeddings))
+        with self._lock:
+            self._ids[path] = set(ids)
+        logger.info(f"Archived {len(ids)} incidents to {path}")
+        return path
+
+    def contains(self, ids: Iterable[str]) -> Set[str]:
+        """The given ids that are archived"""
+        with self._lock:
+            return {
+                incident_id for incident_id in ids
+                if any(incident_id in segment_ids for segment_ids in self._ids.values())
+            }
+
+    def remove(self, ids: Iterable[str]) -> List[Dict]:
+        """
+        Drop incidents from the archive, rewriting the segments that hold them
+
+        Used when an archived incident is stored again, so that it lives only in the
+        hot collection.
+
+        Returns:
+            Metadata of the incidents removed
+        """
+        wanted = set(ids)
+        with self._lock:
+            paths = [path for path, segment_ids in self._ids.items() if segment_ids & wanted]
+
+        removed = []
+        for path in paths:
+            with np.load(path, allow_pickle=False) as segment:
+                columns = {name: segment[name] for name in segment.files}
+            keep = ~np.isin(columns["ids"], list(wanted))
+            removed.extend(json.loads(str(raw)) for raw in columns["metadata"][~keep])
+            if keep.any():
+                self._write(path, {name: column[keep] for name, column in columns.items()})
+            else:
+                os.remove(path)
+            with self._lock:
+                if keep.any():
+                    self._ids[path] = set(columns["ids"][keep].tolist())
+                else:
+                    self._ids.pop(path, None)
+                # A rewritten segment keeps its path, so the cached arrays are stale
+                self._loaded = None
+
+        if removed:
+            logger.info(f"Removed {len(removed)} incidents from the archive")
+        return removed
+
+    def search(self, query_embedding: List[float], n_results: int, filters: Optional[Dict] = None) -> List[Dict]:
+        """
+        Nearest archived incidents to an embedding
+
+        Args:
+            query_embedding: Embedding of the query text (same model as the hot collection)
+            n_results: Maximum results
+            filters: incident_type, facility_id, outcome (value or list) and since/until
+
+        Returns:
+            List of dicts with id, document, metadata and cosine distance, nearest first
+        """
+        data = self._load_all()
+        if data is None:
+            return []
+        with self._lock:
+            self._searches += 1
+
+        mask = np.ones(len(data["ids"]), dtype=bool)
+        for field in FILTER_COLUMNS:
+            value = (filters or {}).get(field)
+            if value is not None:
+                values = [str(item) for item in value] if isinstance(value, (list, tuple)) else [str(value)]
+                mask &= np.isin(data[field], values)
+        for bound, compare in (("since", np.greater_equal), ("until", np.less_equal)):
+            if (filters or {}).get(bound) is not None:
+                # NaN (no timestamp) compares False, so undated incidents are excluded by a range
+                mask &= compare(data["timestamp_epoch"], to_epoch(filters[bound]))
+
+        candidates = np.flatnonzero(mask)
+        if not len(candidates):
+            return []
+
+        query = np.asarray(query_embedding, dtype=np.float32)
+        embeddings = data["embeddings"][candidates].astype(np.float32)
+        norms = np.linalg.norm(embeddings, axis=1) * np.linalg.norm(query)
+        distances = 1 - (embeddings @ query) / np.where(norms > 0, norms, 1)
+        top = np.argsort(distances, kind="stable")[:n_results]
+
+        return [
+            {
+                "id": str(data["ids"][candidates[i]]),
+                "document": str(data["documents"][candidates[i]]),
+                "metadata": json.loads(str(data["metadata"][candidates[i]])),
+                "distance": float(distances[i])
+            }
+            for i in top
+        ]
+
+    def iter_metadata(self) -> Iterator[Dict]:
+        """Metadata of every archived incident, one segment at a time"""
+        for path in self._segment_paths():
+            with np.load(path, allow_pickle=False) as segment:
+                for raw in segment["metadata"]:
+                    yield json.loads(str(raw))
+
+    def compact(self) -> int:
+        """
+        Merge all segments into one when there are more than max_segments
+
+        Returns:
+            Number of segments merged (0 if below the limit)
+        """
+        paths = self._segment_paths()
+        if len(paths) <= self.max_segments:
+            return 0
+
+        merged = self._concatenate(paths)
+        target = self._new_segment_path()
+        self._write(target, merged)
+        with self._lock:
+            for path in paths:
+                self._ids.pop(path, None)
+            self._ids[target] = set(merged["ids"].tolist())
+            self._merges += 1
+        for path in paths:
+            os.remove(path)
+
+        logger.info(f"Merged {len(paths)} archive segments into {target}")
+        return len(paths)
+
+    def disk_bytes(self) -> int:
+        return sum(os.path.getsize(path) for path in self._segment_paths())
+
+    @staticmethod
+    def _columns(ids: List[str], documents: List[str], metadatas: List[Dict], embeddings: List) -> Dict[str, np.ndarray]:
+        metadatas = [metadata or {} for metadata in metadatas]
+        columns = {
+            "ids": np.array(ids, dtype=str),
+            "documents": np.array(documents, dtype=str),
+            "metadata": np.array([json.dumps(metadata) for metadata in metadatas], dtype=str),
+            "embeddings": np.asarray(embeddings, dtype=np.float16),
+            "timestamp_epoch": np.array(
+                [metadata.get("timestamp_epoch", np.nan) for metadata in metadatas], dtype=float
+            )
+        }
+        for field in FILTER_COLUMNS:
+            columns[field] = np.array([str(metadata.get(field, "")) for metadata in metadatas], dtype=str)
+        return columns
+
+    @staticmethod
+    def _write(path: str, columns: Dict[str, np.ndarray]) -> None:
+        """Write a segment atomically (temp file + rename)"""
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "wb") as f:
+            np.savez_compressed(f, **columns)
+        os.replace(temp_path, path)
+
+    def _new_segment_path(self) -> str:
+        os.makedirs(self.directory, exist_ok=True)
+        return os.path.join(
+            self.directory, f"{SEGMENT_PREFIX}{datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')}{SEGMENT_SUFFIX}"
+        )
+
+    def _segment_paths(self) -> List[str]:
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(
+            os.path.join(self.directory, name) for name in os.listdir(self.directory)
+            if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX)
+        )
+
+    @staticmethod
+    def _concatenate(paths: List[str]) -> Dict[str, np.ndarray]:
+        parts: Dict[str, List[np.ndarray]] = {}
+        for path in paths:
+            with np.load(path, allow_pickle=False) as segment:
+                for name in segment.files:
+                    parts.setdefault(name, []).append(segment[name])
+        return {name: np.concatenate(arrays) for name, arrays in parts.items()}
+
+    def _load_all(self) -> Optional[Dict[str, np.ndarray]]:
+        """All segments as one set of arrays, reloaded only when the segment files change"""
+        paths = tuple(self._segment_paths())
+        if not paths:
+            return None
+        with self._lock:
+            if self._loaded is not None and self._loaded[0] == paths:
+                return self._loaded[1]
+
+        started = time.perf_counter()
+        data = self._concatenate(list(paths))
+        with self._lock:
+            self._loaded = (paths, data)
+        logger.info(f"Loaded {len(data['ids'])} archived incidents in {time.perf_counter() - started:.2f}s")
+        return data
+
+    def get_statistics(self) -> Dict:
+        with self._lock:
+            counts = {path: len(ids) for path, ids in self._ids.items()}
+            loaded = self._loaded is not None
+            searches, merges = self._searches, self._merges
+        return {
+            "directory": self.directory,
+            "incidents": sum(counts.values()),
+            "segments": len(counts),
+            "max_segments": self.max_segments,
+            "disk_bytes": self.disk_bytes(),
+            "loaded_in_memory": loaded,
+            "searches": searches,
+            "merges": merges
+        }
@@ -0,0 +1,207 @@
+"""
+Incident Metadata Schema for ChainSync
+Typed, numeric incident metadata for the memory store and vectorized outcome aggregates
+"""
+
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Union
+import logging
+import re
+
+import numpy as np
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Version 1 stored cost as a string and resolution time / timestamp as free text only.
+# Version 2 adds cost_usd, resolution_hours and timestamp_epoch as numbers.
+SCHEMA_VERSION = 2
+
+# Hours per duration unit, keyed by the spellings accepted for it
+DURATION_UNITS = (
+    (r"s|secs?|seconds?", 1 / 3600),
+    (r"m|mins?|minutes?", 1 / 60),
+    (r"h|hrs?|hours?", 1.0),
+    (r"d|days?", 24.0),
+    (r"w|wks?|weeks?", 168.0),
+    (r"mo|mos|months?", 730.0),
+)
+
+_DURATION_UNIT_PATTERNS = [(re.compile(spellings), hours) for spellings, hours in DURATION_UNITS]
+# An amount or a range ("6-8", "6 to 8") followed by an optional unit
+_DURATION_PATTERN = re.compile(r"(\d+(?:\.\d+)?)(?:\s*(?:-|\u2013|to)\s*(\d+(?:\.\d+)?))?\s*([a-z]*)")
+
+
+def parse_duration_hours(value: Union[str, int, float, None]) -> Optional[float]:
+    """
+    Hours in a resolution time such as "6 hours", "2 days", "1.5h" or "30 minutes"
+
+    Numbers are taken as hours. Compound values ("1 day 6 hours") are summed; a range
+    ("6-8 hours", "6 to 8 hours") counts as its midpoint; a bare number inside text is
+    taken as hours.
+
+    Returns:
+        Hours, or None if no duration could be read or a unit is not recognized
+    """
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+
+    hours, matched = 0.0, False
+    for low, high, unit in _DURATION_PATTERN.findall(str(value).lower()):
+        factor = 1.0 if not unit else next(
+            (hours_per for pattern, hours_per in _DURATION_UNIT_PATTERNS if pattern.fullmatch(unit)), None
+        )
+        if factor is None:
+            return None
+        amount = (float(low) + float(high)) / 2 if high else float(low)
+        hours += amount * factor
+        matched = True
+    return hours if matched else None
+
+
+def parse_cost_usd(value: Union[str, int, float, None]) -> Optional[float]:
+    """Cost in USD from a number or a string such as "15000" or "$15,000" (None if unreadable)"""
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(str(value).replace("$", "").replace(",", "").strip())
+    except ValueError:
+        return None
+
+
+def to_epoch(timestamp: Union[str, int, float, datetime, None]) -> Optional[float]:
+    """
+    Epoch seconds of an ISO-8601 timestamp (a trailing Z is accepted)
+
+    Timestamps without a timezone are taken as UTC. Returns None for unreadable values.
+    """
+    if timestamp is None or isinstance(timestamp, bool):
+        return None
+    if isinstance(timestamp, (int, float)):
+        return float(timestamp)
+    try:
+        parsed = timestamp if isinstance(timestamp, datetime) else datetime.fromisoformat(
+            str(timestamp).strip().replace("Z", "+00:00")
+        )
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def _with_numbers(metadata: Dict, cost, resolution_time, timestamp) -> Dict:
+    """Add the typed fields that could be read; Chroma metadata cannot hold None"""
+    numbers = {
+        "cost_usd": parse_cost_usd(cost),
+        "resolution_hours": parse_duration_hours(resolution_time),
+        "timestamp_epoch": to_epoch(timestamp),
+    }
+    metadata.update({field: value for field, value in numbers.items() if value is not None})
+    metadata["schema_version"] = SCHEMA_VERSION
+    return metadata
+
+
+def build_incident_metadata(incident_data: Dict) -> Dict:
+    """
+    Metadata stored alongside an incident
+
+    Args:
+        incident_data: Incident dictionary (incident_id, incident_type, facility_id,
+            timestamp and details with outcome, resolution_time and cost)
+
+    Returns:
+        Metadata dict for ChromaDB
+    """
+    details = incident_data['details']
+    metadata = {
+        "incident_id": incident_data['incident_id'],
+        "incident_type": incident_data['incident_type'],
+        "facility_id": incident_data['facility_id'],
+        "outcome": details['outcome'],
+        "resolution_time": str(details['resolution_time']),
+        "timestamp": str(incident_data['timestamp'])
+    }
+    return _with_numbers(metadata, details['cost'], details['resolution_time'], incident_data['timestamp'])
+
+
+def upgrade_metadata(metadata: Dict) -> Optional[Dict]:
+    """
+    Typed fields to add to a version 1 record (None if it is already current)
+
+    The legacy string "cost" is left in place: Chroma merges metadata updates and
+    cannot delete keys, and readers only use cost_usd.
+    """
+    if metadata.get("schema_version", 1) >= SCHEMA_VERSION:
+        return None
+    return _with_numbers({}, metadata.get("cost"), metadata.get("resolution_time"), metadata.get("timestamp"))
+
+
+def summarize_outcomes(metadatas: Iterable[Dict]) -> Dict:
+    """
+    Success rate and average cost/resolution hours of a set of incidents
+
+    Returns:
+        Dict with count, successes, success_rate, average_cost_usd and average_resolution_hours
+    """
+    summary = group_outcomes(metadatas, group_by=None)
+    return summary.get("*", outcome_summary(0, 0, 0.0, 0, 0.0, 0))
+
+
+def group_outcomes(metadatas: Iterable[Dict], group_by: Optional[str]) -> Dict[str, Dict]:
+    """
+    Outcome summary per value of a metadata field (e.g. incident_type or facility_id)
+
+    Vectorized over the typed fields: rows are grouped with np.unique and summed with
+    np.bincount. Incidents without a cost or resolution time are left out of that
+    average only.
+
+    Args:
+        metadatas: Incident metadata dicts (schema version 2)
+        group_by: Metadata field to group on, or None for a single "*" group
+
+    Returns:
+        Dict of field value -> summary, largest groups first
+    """
+    rows: List[Dict] = list(metadatas)
+    if not rows:
+        return {}
+
+    keys = np.array([str(row.get(group_by, "UNKNOWN")) if group_by else "*" for row in rows])
+    success = np.array([row.get("outcome") == "SUCCESS" for row in rows], dtype=float)
+    costs = np.array([row.get("cost_usd", np.nan) for row in rows], dtype=float)
+    hours = np.array([row.get("resolution_hours", np.nan) for row in rows], dtype=float)
+
+    groups, index = np.unique(keys, return_inverse=True)
+    size = len(groups)
+    counts = np.bincount(index, minlength=size)
+    successes = np.bincount(index, weights=success, minlength=size)
+    cost_sums = np.bincount(index, weights=np.nan_to_num(costs), minlength=size)
+    cost_counts = np.bincount(index, weights=~np.isnan(costs), minlength=size)
+    hour_sums = np.bincount(index, weights=np.nan_to_num(hours), minlength=size)
+    hour_counts = np.bincount(index, weights=~np.isnan(hours), minlength=size)
+
+    order = np.argsort(-counts, kind="stable")
+    return {
+        str(groups[i]): outcome_summary(
+            int(counts[i]), int(successes[i]), cost_sums[i], int(cost_counts[i]), hour_sums[i], int(hour_counts[i])
+        )
+        for i in order
+    }
+
+
+def outcome_summary(
+    count: int, successes: int, cost_sum: float, cost_count: int, hour_sum: float, hour_count: int
+) -> Dict:
+    """Summary dict from running totals (averages only over incidents that have the field)"""
+    return {
+        "count": count,
+        "successes": successes,
+        "success_rate": round(successes / count, 2) if count else 0,
+        "average_cost_usd": round(float(cost_sum / cost_count), 2) if cost_count else None,
+        "average_resolution_hours": round(float(hour_sum / hour_count), 2) if hour_count else None
+    }
@@ -0,0 +1,281 @@
+"""
+Analysis Job Queue for ChainSync
+Runs long reasoning analyses in the background with priority lanes, result polling and webhooks
+"""
+
+from collections import OrderedDict
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Optional
+from urllib.parse import urlsplit
+import itertools
+import logging
+import math
+import queue
+import threading
+import time
+import uuid
+
+import httpx
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Urgency -> priority lane (lower runs first)
+URGENCY_LANES = {
+    "CRITICAL": 0,
+    "HIGH": 1,
+    "MEDIUM": 2,
+    "LOW": 3
+}
+
+
+class QueueFullError(Exception):
+    """Raised when the job queue is at capacity"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Analysis job queue is full; retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class InvalidCallbackError(ValueError):
+    """Raised when a callback URL is not http(s) or its host is not allowed"""
+
+
+# Schemes a callback may be delivered over
+CALLBACK_SCHEMES = ("http", "https")
+
+
+class AnalysisJobQueue:
+    """
+    Bounded, prioritized background queue for incident analyses
+
+    Jobs are ordered by urgency lane, then submission order. Finished jobs are kept
+    for polling up to `max_finished_jobs`, oldest evicted first.
+    """
+
+    def __init__(
+        self,
+        workers: int = 2,
+        max_queue_size: int = 100,
+        max_finished_jobs: int = 1000,
+        callback_timeout: float = 10.0,
+        http_client: Optional[httpx.Client] = None,
+        callback_allowed_hosts: Optional[Iterable[str]] = None
+    ):
+        """
+        Initialize the job queue and start its workers
+
+        Args:
+            workers: Number of worker threads running analyses
+            max_queue_size: Queued (not yet running) jobs accepted before rejecting
+            max_finished_jobs: Completed/failed jobs retained for polling
+            callback_timeout: Timeout in seconds for webhook deliveries
+            http_client: Keep-alive client for webhook deliveries (a private one if None)
+            callback_allowed_hosts: Hosts callbacks may be sent to; an entry starting with
+                "." also allows its subdomains (callbacks are refused if empty)
+        """
+        self.workers = workers
+        self.max_queue_size = max_queue_size
+        self.max_finished_jobs = max_finished_jobs
+        self.callback_timeout = callback_timeout
+        self.http_client = http_client or httpx.Client(timeout=callback_timeout)
+        self.callback_allowed_hosts = {host.strip().lower() for host in callback_allowed_hosts or () if host.strip()}
+
+        self._queue: "queue.PriorityQueue" = queue.PriorityQueue()
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, Dict] = {}
+        self._finished: "OrderedDict[str, None]" = OrderedDict()
+        self._tasks: Dict[str, tuple] = {}
+        self._queued = 0
+        self._running = 0
+        self._rejected = 0
+        self._completed = 0
+        self._failed = 0
+        self._total_run_seconds = 0.0
+
+        self._threads = [
+            threading.Thread(target=self._worker, name=f"analysis-job-worker-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+        logger.info(f"Analysis job queue started with {workers} workers (max queue {max_queue_size})")
+
+    def submit(
+        self,
+        analyze_fn: Callable[[Dict], Dict],
+        incident_data: Dict,
+        callback_url: Optional[str] = None
+    ) -> Dict:
+        """
+        Queue an analysis job
+
+        Args:
+            analyze_fn: Callable running the analysis (e.g. agent.analyze_incident)
+            incident_data: Incident payload passed to analyze_fn
+            callback_url: Optional URL receiving a POST with the finished job
+
+        Returns:
+            Public job record
+
+        Raises:
+            QueueFullError: If the queue is at capacity
+            InvalidCallbackError: If callback_url is not an allowed http(s) URL
+        """
+        if callback_url:
+            self.validate_callback_url(callback_url)
+        urgency = str(incident_data.get("urgency", "MEDIUM")).upper()
+        lane = URGENCY_LANES.get(urgency, URGENCY_LANES["MEDIUM"])
+
+        with self._lock:
+            if self._queued >= self.max_queue_size:
+                self._rejected += 1
+                raise QueueFullError(self._estimate_retry_after())
+
+            job_id = f"JOB-{uuid.uuid4().hex[:12]}"
+            job = {
+                "job_id": job_id,
+                "incident_id": incident_data.get("incident_id"),
+                "status": "queued",
+                "urgency": urgency,
+                "priority_lane": lane,
+                "submitted_at": datetime.utcnow().isoformat(),
+                "started_at": None,
+                "completed_at": None,
+                "result": None,
+                "error": None,
+                "callback_url": callback_url,
+                "callback_status": None
+            }
+            self._jobs[job_id] = job
+            self._tasks[job_id] = (analyze_fn, incident_data)
+            self._queued += 1
+            self._queue.put((lane, next(self._sequence), job_id))
+
+            return dict(job)
+
+    def get_job(self, job_id: str) -> Optional[Dict]:
+        """Return a copy of the job record, or None if unknown/evicted"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def get_statistics(self) -> Dict:
+        """Queue depth, worker utilization and outcome counters"""
+        with self._lock:
+            finished = self._completed + self._failed
+            return {
+                "workers": self.workers,
+                "queued": self._queued,
+                "running": self._running,
+                "max_queue_size": self.max_queue_size,
+                "completed": self._completed,
+                "failed": self._failed,
+                "rejected": self._rejected,
+                "avg_run_seconds": round(self._total_run_seconds / finished, 2) if finished else 0
+            }
+
+    def shutdown(self) -> None:
+        """Stop workers after their current job; queued jobs are abandoned"""
+        for _ in self._threads:
+            self._queue.put((-1, next(self._sequence), None))
+
+    def _estimate_retry_after(self) -> int:
+        """Seconds until a queue slot is likely free (caller holds the lock)"""
+        finished = self._completed + self._failed
+        avg_run = self._total_run_seconds / finished if finished else 30.0
+        return max(1, math.ceil(avg_run / max(self.workers, 1)))
+
+    def _worker(self) -> None:
+        while True:
+            _, _, job_id = self._queue.get()
+            if job_id is None:
+                return
+
+            with self._lock:
+                analyze_fn, incident_data = self._tasks.pop(job_id)
+                job = self._jobs[job_id]
+                job["status"] = "running"
+                job["started_at"] = datetime.utcnow().isoformat()
+                self._queued -= 1
+                self._running += 1
+
+            started = time.perf_counter()
+            try:
+                result = analyze_fn(incident_data)
+                status = "failed" if result.get("status") == "error" else "completed"
+                error = result.get("message") if status == "failed" else None
+            except Exception as e:
+                logger.error(f"Analysis job {job_id} failed: {str(e)}")
+                result, status, error = None, "failed", str(e)
+
+            with self._lock:
+                job["status"] = status
+                job["result"] = result
+                job["error"] = error
+                job["completed_at"] = datetime.utcnow().isoformat()
+                self._running -= 1
+                self._total_run_seconds += time.perf_counter() - started
+                if status == "completed":
+                    self._completed += 1
+                else:
+                    self._failed += 1
+                self._remember_finished(job_id)
+                callback_url = job["callback_url"]
+                snapshot = dict(job)
+
+            if callback_url:
+                self._deliver_callback(job_id, callback_url, snapshot)
+
+    def _remember_finished(self, job_id: str) -> None:
+        """Track finished jobs and evict the oldest beyond retention (caller holds the lock)"""
+        self._finished[job_id] = None
+        while len(self._finished) > self.max_finished_jobs:
+            evicted, _ = self._finished.popitem(last=False)
+            self._jobs.pop(evicted, None)
+
+    def validate_callback_url(self, callback_url: str) -> None:
+        """
+        Check a callback URL before a job is accepted
+
+        The worker POSTs the finished job from inside the deployment network, so only
+        http(s) URLs whose host is on the callback allowlist are accepted. Without an
+        allowlist every callback is refused.
+
+        Raises:
+            InvalidCallbackError: If the URL is not acceptable
+        """
+        try:
+            parts = urlsplit(callback_url)
+            host = (parts.hostname or "").lower()
+            parts.port  # raises ValueError for a malformed port
+        except ValueError as e:
+            raise InvalidCallbackError(f"Invalid callback_url: {str(e)}")
+
+        if parts.scheme.lower() not in CALLBACK_SCHEMES or not host:
+            raise InvalidCallbackError("callback_url must be an http(s) URL with a host")
+        if parts.username or parts.password:
+            raise InvalidCallbackError("callback_url must not contain credentials")
+        if not self.callback_allowed_hosts:
+            raise InvalidCallbackError("Job callbacks are disabled: no callback hosts are configured")
+        if not any(
+            host == allowed or (allowed.startswith(".") and host.endswith(allowed))
+            for allowed in self.callback_allowed_hosts
+        ):
+            raise InvalidCallbackError(f"callback_url host '{host}' is not in the callback allowlist")
+
+    def _deliver_callback(self, job_id: str, callback_url: str, job: Dict) -> None:
+        """POST the finished job to its callback URL"""
+        payload = {key: value for key, value in job.items() if key != "callback_status"}
+        try:
+            response = self.http_client.post(callback_url, json=payload, timeout=self.callback_timeout)
+            callback_status = f"delivered ({response.status_code})"
+        except Exception as e:
+            logger.warning(f"Callback for job {job_id} to {callback_url} failed: {str(e)}")
+            callback_status = f"failed ({str(e)})"
+
+        with self._lock:
+            if job_id in self._jobs:
+                self._jobs[job_id]["callback_status"] = callback_status
@@ -4,12 +4,32 @@ Stores and retrieves historical incidents for learning and pattern recognition
 """
 
 import chromadb
-from chromadb.utils import embedding_functions
-from typing import Dict, List, Optional
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+import hashlib
 import json
+import os
+import threading
+import time
 from datetime import datetime
 import logging
 
+import numpy as np
+
+from .embedding_backends import create_embedding_function
+from .embedding_cache import CachedEmbeddingFunction
+from .http_clients import HttpClientPool
+from .incident_archive import IncidentArchive
+from .incident_schema import (
+    SCHEMA_VERSION,
+    build_incident_metadata,
+    group_outcomes,
+    summarize_outcomes,
+    to_epoch,
+    upgrade_metadata
+)
+from .pattern_index import PatternIndex
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -17,46 +37,173 @@ logger = logging.getLogger(__name__)
 class MemoryEnabledAgent:
     """Agent that stores and recalls historical incidents using vector similarity search"""
 
-    def __init__(self, persist_directory: str = "./chroma_db", openai_api_key: str = None):
+    # Bulk ingestion defaults: texts per embedding request, records per collection write
+    EMBED_BATCH_SIZE = 256
+    WRITE_BATCH_SIZE = 1000
+
+    COLLECTION_NAME = "environmental_incidents"
+    # HNSW distance of new collections; similarity is 1 - cosine distance
+    DISTANCE_SPACE = "cosine"
+    PATTERN_INDEX_FILE = "pattern_index.json"
+    ARCHIVE_DIR = "archive"
+
+    # Recall latencies kept for the stats percentiles
+    RECALL_LATENCY_WINDOW = 1000
+
+    # Write outcomes of store_incident / store_incidents_bulk
+    WRITE_OPERATIONS = ("created", "updated", "metadata_updated", "unchanged")
+
+    # Recall: metadata fields usable as store-side filters (plus the since/until time range)
+    RECALL_FILTER_FIELDS = ("incident_type", "facility_id", "outcome")
+    # Candidates fetched per requested result, and the cap when widening a pruned search
+    RECALL_OVERFETCH_FACTOR = 4
+    RECALL_MAX_CANDIDATES = 200
+    # Re-ranking bonus for candidates matching the query incident on a field that was not filtered on
+    RECALL_MATCH_BONUS = {"incident_type": 0.05, "facility_id": 0.02}
+
+    def __init__(
+        self,
+        persist_directory: str = "./chroma_db",
+        openai_api_key: str = None,
+        embedding_backend: str = "openai",
+        embedding_model: Optional[str] = None,
+        embedding_cache_size: int = 10000,
+        embedding_cache_path: Optional[str] = None,
+        http_clients: Optional[HttpClientPool] = None,
+        similarity_threshold: float = 0.0,
+        near_duplicate_threshold: Optional[float] = 0.97,
+        retention_max_age_days: Optional[float] = None,
+        retention_max_incidents: Optional[int] = None,
+        archive_max_segments: int = 8,
+        compaction_interval: float = 0
+    ):
         """
         Initialize the Memory-Enabled Agent
 
         Args:
             persist_directory: Directory to persist ChromaDB data
-            openai_api_key: OpenAI API key for embeddings
+            openai_api_key: OpenAI API key for embeddings (openai backend only)
+            embedding_backend: Embedding backend: "openai", "local" or "hashing"
+            embedding_model: Model name/path for the backend (backend default if None)
+            embedding_cache_size: Max embeddings kept in the in-memory LRU cache
+            embedding_cache_path: Optional SQLite file persisting cached embeddings
+            http_clients: Shared connection pool for embedding requests (SDK default if None)
+            similarity_threshold: Minimum similarity (0-1) for a recalled incident
+            near_duplicate_threshold: Similarity at which a new incident is flagged as a
+                near-duplicate of a stored one (None disables the check)
+            retention_max_age_days: Archive incidents older than this (None keeps all)
+            retention_max_incidents: Archive the oldest incidents beyond this many (None = no limit)
+            archive_max_segments: Archive segments kept before compaction merges them
+            compaction_interval: Seconds between background retention/compaction passes (0 disables)
         """
         logger.info(f"Initializing Memory Agent with persist directory: {persist_directory}")
+        self.similarity_threshold = similarity_threshold
+        self.near_duplicate_threshold = near_duplicate_threshold
+        self.persist_directory = persist_directory
+        self.retention_max_age_days = retention_max_age_days
+        self.retention_max_incidents = retention_max_incidents
+        self.compaction_interval = compaction_interval
+
+        # Writes are serialized so the existing-record check, the write and the pattern
+        # index update of one incident are not interleaved with another write of it
+        self._write_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._write_counts = {operation: 0 for operation in self.WRITE_OPERATIONS}
+        self._write_counts["near_duplicates"] = 0
+        self._recall_latencies = deque(maxlen=self.RECALL_LATENCY_WINDOW)
+        self._retention = {"runs": 0, "archived": 0, "last_run": None, "last_result": None}
+        self._stop = threading.Event()
 
         # Initialize ChromaDB client
-        self.client = chromadb.Client(chromadb.Settings(
-            chroma_db_impl="duckdb+parquet",
-            persist_directory=persist_directory
-        ))
-
-        # Use OpenAI embeddings for semantic search
-        self.embedding_function = embedding_functions.OpenAIEmbeddingFunction(
-            api_key=openai_api_key,
-            model_name="text-embedding-3-small"
-        )
+        self.client = chromadb.PersistentClient(path=persist_directory)
 
-        # Create or get collection for environmental incidents
-        self.collection = self.client.get_or_create_collection(
-            name="environmental_incidents",
-            embedding_function=self.embedding_function,
-            metadata={"description": "Historical environmental incidents for learning"}
+        # Embeddings for semantic search, behind a content-addressed cache
+        # so repeated query texts skip the embedding round trip
+        backend_function, self.embedding_model = create_embedding_function(
+            backend=embedding_backend,
+            model_name=embedding_model,
+            openai_api_key=openai_api_key,
+            http_clients=http_clients
+        )
+        self.embedding_function = CachedEmbeddingFunction(
+            backend_function,
+            model_name=self.embedding_model,
+            max_entries=embedding_cache_size,
+            disk_path=embedding_cache_path
         )
 
+        # Get or create collection for environmental incidents. get_or_create_collection
+        # would overwrite the stored metadata, hiding the model and schema checks below.
+        try:
+            self.collection = self.client.get_collection(
+                name=self.COLLECTION_NAME,
+                embedding_function=self.embedding_function
+            )
+        except ValueError:
+            self.collection = self.client.create_collection(
+                name=self.COLLECTION_NAME,
+                embedding_function=self.embedding_function,
+                metadata={
+                    "description": "Historical environmental incidents for learning",
+                    "embedding_model": self.embedding_model,
+                    "schema_version": SCHEMA_VERSION,
+                    "hnsw:space": self.DISTANCE_SPACE
+                }
+            )
+
+        # Collections created before the cosine space was set use Chroma's default squared
+        # L2; for the unit-length embeddings of every backend that is 2 - 2 * cosine
+        self.distance_space = (self.collection.metadata or {}).get("hnsw:space", "l2")
+
+        # Vectors from different models are not comparable
+        collection_model = (self.collection.metadata or {}).get("embedding_model")
+        if collection_model and collection_model != self.embedding_model:
+            logger.warning(
+                f"Collection was built with {collection_model} but the active embedding model is "
+                f"{self.embedding_model}; re-embed stored incidents before relying on recall"
+            )
+
+        # Typed numeric metadata (cost_usd, resolution_hours, timestamp_epoch) since schema 2
+        self.schema_version = (self.collection.metadata or {}).get("schema_version", 1)
+        if self.schema_version < SCHEMA_VERSION and not self.collection.count():
+            self._set_schema_version(SCHEMA_VERSION)
+        elif self.schema_version < SCHEMA_VERSION:
+            logger.warning(
+                f"Collection metadata is schema version {self.schema_version}; run "
+                f"scripts/migrate_incident_metadata.py so time filters and pattern aggregates see all incidents"
+            )
+
+        # Cold tier: incidents moved out of the collection by the retention policy
+        self.archive = IncidentArchive(os.path.join(persist_directory, self.ARCHIVE_DIR), archive_max_segments)
+
+        # Outcome aggregates per (incident_type, facility_id, outcome) over all incidents,
+        # archived ones included, persisted next to the Chroma data; rebuilt if missing or
+        # out of step with the collection and archive
+        self.pattern_index = PatternIndex(os.path.join(persist_directory, self.PATTERN_INDEX_FILE))
+        if (
+            not self.pattern_index.load()
+            or self.pattern_index.incident_count != self.collection.count() + self.archive.count
+        ):
+            self._rebuild_pattern_index()
+
+        if compaction_interval > 0:
+            threading.Thread(target=self._compaction_loop, name="memory-compaction", daemon=True).start()
+
         logger.info(f"Memory collection initialized with {self.collection.count()} incidents")
 
     def store_incident(self, incident_data: Dict) -> Dict:
         """
         Store an incident in memory for future recall
 
+        Idempotent: re-sending an incident with unchanged text is a no-op (or a
+        metadata-only update), so it is not re-embedded; changed text replaces the
+        stored record.
+
         Args:
             incident_data: Dict containing incident details
 
         Returns:
-            Dict with storage confirmation
+            Dict with storage confirmation and the write operation performed
         """
         try:
             incident_id = incident_data['incident_id']
@@ -66,28 +213,22 @@ class MemoryEnabledAgent:
             incident_text = self._create_incident_text(incident_data)
 
             # Prepare metadata
-            metadata = {
-                "incident_id": incident_id,
-                "incident_type": incident_data['incident_type'],
-                "facility_id": incident_data['facility_id'],
-                "outcome": incident_data['details']['outcome'],
-                "resolution_time": incident_data['details']['resolution_time'],
-                "cost": str(incident_data['details']['cost']),
-                "timestamp": incident_data['timestamp']
-            }
+            metadata = self._create_incident_metadata(incident_data)
 
-            # Store in vector database
-            self.collection.add(
-                documents=[incident_text],
-                metadatas=[metadata],
-                ids=[incident_id]
-            )
+            # Upsert into the vector database
+            results = [None]
+            self._write_incidents([(0, incident_id, incident_text, metadata)], results)
+            result = results[0]
+            if result["status"] != "success":
+                raise RuntimeError(result["message"])
 
-            logger.info(f"Successfully stored incident {incident_id}")
+            logger.info(f"Successfully stored incident {incident_id} ({result['operation']})")
 
             return {
                 "status": "success",
                 "message": f"Incident {incident_id} stored in memory",
+                "operation": result["operation"],
+                "duplicate_of": result.get("duplicate_of"),
                 "total_incidents": self.collection.count()
             }
 
@@ -98,63 +239,395 @@ class MemoryEnabledAgent:
                 "message": str(e)
             }
 
+    def store_incidents_bulk(
+        self,
+        incidents: List[Dict],
+        embed_batch_size: int = None,
+        write_batch_size: int = None
+    ) -> Dict:
+        """
+        Store many incidents with batched embedding and chunked collection writes
+
+        Same upsert semantics as store_incident: only new or changed texts are embedded.
+
+        Args:
+            incidents: List of incident dicts (same shape as store_incident)
+            embed_batch_size: Number of texts sent per embedding request
+            write_batch_size: Number of records written per collection write call
+
+        Returns:
+            Dict with per-record results and end-to-end throughput
+        """
+        start_time = time.perf_counter()
+        logger.info(f"Bulk storing {len(incidents)} incidents")
+
+        results: List[Dict] = [None] * len(incidents)
+        prepared = []
+        seen_ids = set()
+
+        # Build texts and metadata, rejecting malformed and duplicate records up front
+        for index, incident_data in enumerate(incidents):
+            incident_id = incident_data.get('incident_id') if isinstance(incident_data, dict) else None
+            try:
+                if incident_id in seen_ids:
+                    raise ValueError(f"Duplicate incident_id {incident_id} in batch")
+                metadata = self._create_incident_metadata(incident_data)
+                incident_text = self._create_incident_text(incident_data)
+                seen_ids.add(incident_id)
+                prepared.append((index, incident_id, incident_text, metadata))
+            except Exception as e:
+                results[index] = self._bulk_error(incident_id, e)
+
+        self._write_incidents(prepared, results, embed_batch_size, write_batch_size)
+
+        elapsed = time.perf_counter() - start_time
+        stored = sum(1 for r in results if r["status"] == "success")
+        failed = len(results) - stored
+        operations = {
+            operation: sum(1 for r in results if r.get("operation") == operation)
+            for operation in self.WRITE_OPERATIONS
+        }
+
+        logger.info(f"Bulk store complete: {stored} stored ({operations}), {failed} failed in {elapsed:.2f}s")
+
+        return {
+            "status": "success" if failed == 0 else ("partial" if stored else "error"),
+            "total_received": len(incidents),
+            "stored": stored,
+            "failed": failed,
+            "operations": operations,
+            "results": results,
+            "total_incidents": self.collection.count(),
+            "elapsed_seconds": round(elapsed, 3),
+            "throughput_per_second": round(len(incidents) / elapsed, 1) if elapsed > 0 else 0
+        }
+
+    def _write_incidents(
+        self,
+        prepared: List[tuple],
+        results: List[Dict],
+        embed_batch_size: int = None,
+        write_batch_size: int = None
+    ) -> None:
+        """
+        Upsert prepared (index, id, text, metadata) records, filling results[index]
+
+        Each record is compared with the stored one by the content hash of its text:
+        new ids are added, changed texts are re-embedded and replaced, unchanged texts
+        with changed metadata get a metadata-only update, and exact re-sends are
+        skipped. Only added and replaced records are embedded and checked for near
+        duplicates. An archived incident stored again is added to the collection and
+        removed from the archive. The pattern index follows every write.
+        """
+        embed_batch_size = embed_batch_size or self.EMBED_BATCH_SIZE
+        write_batch_size = min(
+            write_batch_size or self.WRITE_BATCH_SIZE,
+            getattr(self.client, 'max_batch_size', None) or self.WRITE_BATCH_SIZE
+        )
+
+        with self._write_lock:
+            previous = self._stored_records([item[1] for item in prepared], write_batch_size)
+            # Ids moved out by retention are new to the collection but still counted in the index
+            archived = self.archive.contains(item[1] for item in prepared if item[1] not in previous)
+            operations = {}
+            for index, incident_id, incident_text, metadata in prepared:
+                operations[incident_id] = self._plan_write(incident_text, metadata, previous.get(incident_id))
+                if operations[incident_id] == "unchanged":
+                    results[index] = {"incident_id": incident_id, "status": "success", "operation": "unchanged"}
+
+            # Embed new and changed texts in large batches
+            embedded = []
+            to_embed = [item for item in prepared if operations[item[1]] in ("created", "updated")]
+            for batch in self._chunks(to_embed, embed_batch_size):
+                try:
+                    embeddings = self.embedding_function([item[2] for item in batch])
+                    self._flag_near_duplicates(batch, embeddings)
+                    embedded.extend(
+                        (*item, embedding) for item, embedding in zip(batch, embeddings)
+                    )
+                except Exception as e:
+                    logger.error(f"Error embedding batch of {len(batch)} incidents: {str(e)}")
+                    for index, incident_id, _, _ in batch:
+                        results[index] = self._bulk_error(incident_id, e)
+
+            # Metadata-only updates keep the stored embedding (and duplicate flag)
+            metadata_only = [
+                (*item, None) for item in prepared if operations[item[1]] == "metadata_updated"
+            ]
+
+            writes = (
+                ("created", self._add_embedded),
+                ("updated", self._upsert_embedded),
+                ("metadata_updated", self._update_metadata)
+            )
+            written = []
+            for operation, writer in writes:
+                items = [item for item in embedded + metadata_only if operations[item[1]] == operation]
+                written.extend(self._write_chunks(items, writer, write_batch_size, operation, results))
+
+            # Keep the pattern index in step: replace the previous version of updated records,
+            # and of archived ones, which are dropped from the archive now that they are stored again
+            restored = [item[1] for item in written if item[1] in archived]
+            for old_metadata in self.archive.remove(restored) if restored else []:
+                self.pattern_index.remove(old_metadata)
+            for _, incident_id, _, metadata, _ in written:
+                old = previous.get(incident_id)
+                if old is not None:
+                    self.pattern_index.remove(old[0])
+                    metadata = {**old[0], **metadata}
+                self.pattern_index.add(metadata)
+            if written:
+                self.pattern_index.save()
+
+            with self._lock:
+                for result in results:
+                    if result and result["status"] == "success":
+                        self._write_counts[result["operation"]] += 1
+                        self._write_counts["near_duplicates"] += int(bool(result.get("duplicate_of")))
+
+    def _stored_records(self, ids: List[str], batch_size: int) -> Dict[str, Tuple[Dict, str]]:
+        """(metadata, document) of the ids that are already stored"""
+        stored = {}
+        for batch in self._chunks(ids, batch_size):
+            page = self.collection.get(ids=batch, include=['metadatas', 'documents'])
+            for record_id, metadata, document in zip(page['ids'], page['metadatas'], page['documents']):
+                stored[record_id] = (metadata or {}, document or "")
+        return stored
+
+    @staticmethod
+    def _content_hash(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def _plan_write(self, incident_text: str, metadata: Dict, previous: Optional[Tuple[Dict, str]]) -> str:
+        """Write operation for a record; sets its content_hash (and keeps an unchanged text's duplicate flag)"""
+        metadata["content_hash"] = self._content_hash(incident_text)
+        if previous is None:
+            return "created"
+
+        old_metadata, old_document = previous
+        # Records stored before content hashes were kept are compared by their stored text
+        old_hash = old_metadata.get("content_hash") or self._content_hash(old_document)
+        if old_hash != metadata["content_hash"]:
+            return "updated"
+
+        if "duplicate_of" in old_metadata:
+            metadata["duplicate_of"] = old_metadata["duplicate_of"]
+        if all(old_metadata.get(key) == value for key, value in metadata.items()):
+            return "unchanged"
+        return "metadata_updated"
+
+    def _flag_near_duplicates(self, batch: List[tuple], embeddings: List) -> None:
+        """
+        Mark records whose nearest stored incident (other than themselves) is at least
+        near_duplicate_threshold similar with duplicate_of = that incident's group id
+
+        Records are compared with what is already stored, not with each other.
+        """
+        available = self.collection.count()
+        for _, _, _, metadata in batch:
+            # Chroma merges metadata on update, so "no duplicate" must be written explicitly
+            metadata["duplicate_of"] = ""
+        if self.near_duplicate_threshold is None or not available:
+            return
+
+        neighbours = self.collection.query(
+            query_embeddings=[list(embedding) for embedding in embeddings],
+            n_results=min(2, available),
+            include=['metadatas', 'distances']
+        )
+        for (_, incident_id, _, metadata), ids, metadatas, distances in zip(
+            batch, neighbours['ids'], neighbours['metadatas'], neighbours['distances']
+        ):
+            for neighbour_id, neighbour, distance in zip(ids, metadatas, distances):
+                if neighbour_id == incident_id:
+                    continue
+                if self._similarity(distance) >= self.near_duplicate_threshold:
+                    metadata["duplicate_of"] = (neighbour or {}).get("duplicate_of") or neighbour_id
+                break
+
+    def _write_chunks(
+        self,
+        items: List[tuple],
+        writer,
+        write_batch_size: int,
+        operation: str,
+        results: List[Dict]
+    ) -> List[tuple]:
+        """Write items in chunks, isolating failures per record if a chunk is rejected; returns the written items"""
+        written = []
+        for batch in self._chunks(items, write_batch_size):
+            try:
+                writer(batch)
+                written.extend(batch)
+            except Exception as e:
+                logger.warning(f"Chunk write failed ({str(e)}), retrying {len(batch)} records individually")
+                for item in batch:
+                    try:
+                        writer([item])
+                        written.append(item)
+                    except Exception as item_error:
+                        results[item[0]] = self._bulk_error(item[1], item_error)
+
+        for index, incident_id, _, metadata, _ in written:
+            results[index] = {"incident_id": incident_id, "status": "success", "operation": operation}
+            if metadata.get("duplicate_of"):
+                results[index]["duplicate_of"] = metadata["duplicate_of"]
+        return written
+
+    def _add_embedded(self, batch: List[tuple]) -> None:
+        """Write pre-embedded (index, id, text, metadata, embedding) records to the collection"""
+        self.collection.add(
+            ids=[item[1] for item in batch],
+            documents=[item[2] for item in batch],
+            metadatas=[item[3] for item in batch],
+            embeddings=[list(item[4]) for item in batch]
+        )
+
+    def _upsert_embedded(self, batch: List[tuple]) -> None:
+        """Replace stored records with re-embedded (index, id, text, metadata, embedding) records"""
+        self.collection.upsert(
+            ids=[item[1] for item in batch],
+            documents=[item[2] for item in batch],
+            metadatas=[item[3] for item in batch],
+            embeddings=[list(item[4]) for item in batch]
+        )
+
+    def _update_metadata(self, batch: List[tuple]) -> None:
+        """Update only the metadata of stored records (the embedding is kept)"""
+        self.collection.update(
+            ids=[item[1] for item in batch],
+            metadatas=[item[3] for item in batch]
+        )
+
+    @staticmethod
+    def _chunks(items: List, size: int):
+        """Yield successive slices of items with at most size elements"""
+        for i in range(0, len(items), size):
+            yield items[i:i + size]
+
+    @staticmethod
+    def _bulk_error(incident_id: Optional[str], error: Exception) -> Dict:
+        """Per-record error entry for bulk results"""
+        return {
+            "incident_id": incident_id,
+            "status": "error",
+            "message": str(error)
+        }
+
     def recall_similar_incidents(
         self,
         current_incident: Dict,
-        top_k: int = 5
+        top_k: int = 5,
+        filters: Optional[Dict] = None,
+        similarity_threshold: Optional[float] = None,
+        include_archive: bool = False
     ) -> Dict:
         """
         Retrieve similar incidents from memory
 
+        Metadata filters (including the time range) are applied inside the store, so
+        only matching incidents are searched. Candidates are over-fetched, those below
+        the similarity threshold are dropped, and the rest are re-ranked; when pruning
+        leaves fewer than top_k, the search is widened (up to RECALL_MAX_CANDIDATES).
+        With include_archive, archived incidents are searched too and ranked together
+        with the collection's.
+
         Args:
             current_incident: Dict with current incident details
             top_k: Number of similar incidents to retrieve
+            filters: Optional incident_type, facility_id, outcome (value or list of values)
+                and since/until (ISO timestamps)
+            similarity_threshold: Minimum similarity (agent default if None)
+            include_archive: Also search incidents moved to the archive by retention
 
         Returns:
             Dict with similar incidents and patterns
         """
         try:
-            logger.info(f"Recalling similar incidents (top {top_k})")
+            filters = {key: value for key, value in (filters or {}).items() if value not in (None, "", [])}
+            threshold = self.similarity_threshold if similarity_threshold is None else similarity_threshold
+            logger.info(f"Recalling similar incidents (top {top_k}, filters {filters}, threshold {threshold})")
+
+            where = self._build_where(filters)
 
             # Create query text from current incident
             query_text = self._create_incident_text(current_incident)
 
-            # Perform semantic search
-            results = self.collection.query(
-                query_texts=[query_text],
-                n_results=top_k,
-                include=['metadatas', 'documents', 'distances']
-            )
+            started = time.perf_counter()
+            available = self.collection.count()
+            n_results = min(top_k * self.RECALL_OVERFETCH_FACTOR, self.RECALL_MAX_CANDIDATES)
+            candidates, similar_incidents, considered, below_threshold, collapsed = [], [], 0, 0, 0
+            while available:
+                # Filtered semantic search over the matching subset only
+                results = self.collection.query(
+                    query_texts=[query_text],
+                    n_results=min(n_results, available),
+                    where=where,
+                    include=['metadatas', 'documents', 'distances']
+                )
+                candidates = self._parse_results(results)
+                considered = len(candidates)
+                similar_incidents, below_threshold, collapsed = self._rank_candidates(
+                    candidates, current_incident, filters, threshold
+                )
 
-            # Parse results
-            similar_incidents = []
-            for i, metadata in enumerate(results['metadatas'][0]):
-                similar_incidents.append({
-                    "incident_id": metadata['incident_id'],
-                    "incident_type": metadata['incident_type'],
-                    "facility_id": metadata['facility_id'],
-                    "similarity_score": round(1 - results['distances'][0][i], 3),
-                    "outcome": metadata['outcome'],
-                    "resolution_time": metadata['resolution_time'],
-                    "cost": int(metadata['cost']),
-                    "timestamp": metadata['timestamp'],
-                    "details": results['documents'][0][i]
-                })
+                # Widen only when pruning left too few and better-than-threshold candidates may remain
+                exhausted = considered < min(n_results, available) or n_results >= self.RECALL_MAX_CANDIDATES
+                last_below = bool(candidates) and candidates[-1]["similarity_score"] < threshold
+                if len(similar_incidents) >= top_k or exhausted or last_below:
+                    break
+                n_results = min(n_results * 2, self.RECALL_MAX_CANDIDATES)
+
+            archived = []
+            if include_archive and self.archive.count:
+                # The query text was just embedded for the collection query, so this is a cache hit
+                query_embedding = self.embedding_function([query_text])[0]
+                hot_ids = {candidate["incident_id"] for candidate in candidates}
+                archived = [
+                    {**self._to_incident(hit["metadata"], hit["document"], 1 - hit["distance"]), "archived": True}
+                    for hit in self.archive.search(query_embedding, top_k * self.RECALL_OVERFETCH_FACTOR, filters)
+                    if hit["id"] not in hot_ids
+                ]
+                considered += len(archived)
+                similar_incidents, below_threshold, collapsed = self._rank_candidates(
+                    candidates + archived, current_incident, filters, threshold
+                )
+
+            similar_incidents = similar_incidents[:top_k]
+            query_ms = (time.perf_counter() - started) * 1000
+            with self._lock:
+                self._recall_latencies.append(query_ms)
 
             # Analyze patterns
             patterns = self._analyze_patterns(similar_incidents)
 
+            # Population-level outcomes for this incident's type (and facility) from the pattern index
+            baseline = self.pattern_index.baseline(
+                current_incident.get('incident_type', current_incident.get('type')),
+                current_incident.get('facility_id')
+            )
+
             # Generate recommendation
             recommendation = self._generate_recommendation(similar_incidents, patterns)
 
-            logger.info(f"Found {len(similar_incidents)} similar incidents")
+            logger.info(f"Found {len(similar_incidents)} similar incidents ({considered} candidates considered)")
 
             return {
                 "status": "success",
                 "similar_incidents": similar_incidents,
                 "patterns": patterns,
+                "baseline": baseline,
                 "recommendation": recommendation,
-                "query_used": query_text
+                "query_used": query_text,
+                "recall": {
+                    "filters": filters,
+                    "similarity_threshold": threshold,
+                    "candidates_considered": considered,
+                    "below_threshold": below_threshold,
+                    "duplicates_collapsed": collapsed,
+                    "archived_considered": len(archived),
+                    "query_ms": round(query_ms, 2)
+                }
             }
 
         except Exception as e:
@@ -165,6 +638,343 @@ class MemoryEnabledAgent:
                 "similar_incidents": []
             }
 
+    def aggregate_patterns(self, group_by: str = "incident_type", filters: Optional[Dict] = None) -> Dict:
+        """
+        Success rate, average cost and average resolution hours per incident type or facility
+
+        Single-value filters are answered from the pattern index without touching the
+        store. A time range or multi-value filter selects incidents with a store-side
+        where clause instead, and the aggregates are computed with NumPy over their
+        typed metadata.
+
+        Args:
+            group_by: incident_type, facility_id or outcome
+            filters: Optional incident_type, facility_id, outcome and since/until, as for recall
+
+        Returns:
+            Dict with per-group summaries, the overall summary and the source ("index" or "store")
+        """
+        if group_by not in self.RECALL_FILTER_FIELDS:
+            raise ValueError(f"group_by must be one of {list(self.RECALL_FILTER_FIELDS)}")
+        filters = {key: value for key, value in (filters or {}).items() if value not in (None, "", [])}
+        where = self._build_where(filters)
+
+        started = time.perf_counter()
+        indexed = all(
+            field in self.RECALL_FILTER_FIELDS and not isinstance(value, (list, tuple))
+            for field, value in filters.items()
+        )
+        if indexed:
+            overall = self.pattern_index.lookup(**filters)
+            groups = self.pattern_index.breakdown(group_by, **filters)
+        else:
+            metadatas = self.collection.get(where=where, include=['metadatas'])['metadatas']
+            overall = summarize_outcomes(metadatas)
+            groups = group_outcomes(metadatas, group_by)
+
+        return {
+            "group_by": group_by,
+            "filters": filters,
+            "source": "index" if indexed else "store",
+            "overall": overall,
+            "groups": groups,
+            "query_ms": round((time.perf_counter() - started) * 1000, 2)
+        }
+
+    def migrate_metadata(self, batch_size: int = None) -> Dict:
+        """
+        One-off upgrade of stored incidents to the typed metadata schema
+
+        Adds cost_usd, resolution_hours and timestamp_epoch to records written before
+        schema version 2. Only metadata is updated, so nothing is re-embedded. Each batch
+        is re-read and updated under the write lock, so a concurrent store or upsert is
+        never overwritten with stale fields. Safe to re-run: current records are skipped.
+
+        Args:
+            batch_size: Records read and updated per request (WRITE_BATCH_SIZE if None)
+
+        Returns:
+            Dict with scanned, migrated and unreadable-field counts
+        """
+        batch_size = batch_size or self.WRITE_BATCH_SIZE
+        started = time.perf_counter()
+
+        # Find candidates first: updating while paging by offset could skip records
+        candidates, scanned = [], 0
+        for record_id, metadata in self._iter_metadata(batch_size):
+            if upgrade_metadata(metadata) is not None:
+                candidates.append(record_id)
+            scanned += 1
+
+        migrated, incomplete = 0, 0
+        for batch in self._chunks(candidates, batch_size):
+            with self._write_lock:
+                # Records written since the scan are already current and are skipped
+                current = self.collection.get(ids=batch, include=["metadatas"])
+                upgrades = []
+                for record_id, metadata in zip(current['ids'], current['metadatas']):
+                    upgrade = upgrade_metadata(metadata or {})
+                    if upgrade is not None:
+                        upgrades.append((record_id, upgrade))
+                if upgrades:
+                    self.collection.update(
+                        ids=[record_id for record_id, _ in upgrades],
+                        metadatas=[upgrade for _, upgrade in upgrades]
+                    )
+            migrated += len(upgrades)
+            incomplete += sum(
+                1 for _, upgrade in upgrades
+                if not {"cost_usd", "resolution_hours", "timestamp_epoch"} <= set(upgrade)
+            )
+
+        with self._write_lock:
+            self._set_schema_version(SCHEMA_VERSION)
+            self._rebuild_pattern_index()
+        logger.info(f"Migrated {migrated} of {scanned} incidents to metadata schema {SCHEMA_VERSION}")
+
+        return {
+            "status": "success",
+            "schema_version": SCHEMA_VERSION,
+            "scanned": scanned,
+            "migrated": migrated,
+            "with_unreadable_fields": incomplete,
+            "duration_seconds": round(time.perf_counter() - started, 2)
+        }
+
+    def apply_retention(
+        self,
+        max_age_days: Optional[float] = None,
+        max_incidents: Optional[int] = None,
+        batch_size: int = None
+    ) -> Dict:
+        """
+        Move incidents outside the retention policy to the archive, then compact it
+
+        Incidents older than max_age_days (selected with a where clause on
+        timestamp_epoch) and, beyond max_incidents, the oldest remaining ones are copied
+        with their embeddings to a compressed archive segment and deleted from the
+        collection. They stay searchable with include_archive and stay counted in the
+        pattern index. Archive segments are merged once there are too many.
+
+        Args:
+            max_age_days: Age limit (agent policy if None)
+            max_incidents: Collection size limit (agent policy if None)
+            batch_size: Records moved per read/delete (WRITE_BATCH_SIZE if None)
+
+        Returns:
+            Dict with incidents archived by age and by size, segments merged and duration
+        """
+        max_age_days = self.retention_max_age_days if max_age_days is None else max_age_days
+        max_incidents = self.retention_max_incidents if max_incidents is None else max_incidents
+        batch_size = batch_size or self.WRITE_BATCH_SIZE
+        started = time.perf_counter()
+
+        with self._write_lock:
+            by_age = []
+            if max_age_days:
+                cutoff = time.time() - max_age_days * 86400
+                by_age = self.collection.get(where={"timestamp_epoch": {"$lt": cutoff}}, include=[])['ids']
+
+            by_size = []
+            excess = self.collection.count() - len(by_age) - (max_incidents or 0)
+            if max_incidents and excess > 0:
+                aged = set(by_age)
+                remaining = [
+                    (record_id, metadata.get('timestamp_epoch', -np.inf))
+                    for record_id, metadata in self._iter_metadata(batch_size)
+                    if record_id not in aged
+                ]
+                # Oldest first; incidents without a timestamp go before any dated one
+                oldest = np.argsort(np.array([epoch for _, epoch in remaining], dtype=float), kind="stable")
+                by_size = [remaining[i][0] for i in oldest[:excess]]
+
+            for batch in self._chunks(by_age + by_size, batch_size):
+                records = self.collection.get(ids=batch, include=['embeddings', 'documents', 'metadatas'])
+                # Archive first: a failure before the delete leaves the incident in the collection
+                self.archive.append(
+                    records['ids'], records['documents'], records['metadatas'], records['embeddings']
+                )
+                self.collection.delete(ids=records['ids'])
+
+            merged = self.archive.compact()
+            if by_age or by_size:
+                # Archived incidents stay in the index; only its consistency count changed
+                self.pattern_index.save()
+
+        result = {
+            "archived_by_age": len(by_age),
+            "archived_by_size": len(by_size),
+            "segments_merged": merged,
+            "hot_incidents": self.collection.count(),
+            "archived_incidents": self.archive.count,
+            "duration_seconds": round(time.perf_counter() - started, 2)
+        }
+        with self._lock:
+            self._retention["runs"] += 1
+            self._retention["archived"] += len(by_age) + len(by_size)
+            self._retention["last_run"] = datetime.utcnow().isoformat() + "Z"
+            self._retention["last_result"] = result
+
+        if by_age or by_size or merged:
+            logger.info(f"Retention pass: {result}")
+        return result
+
+    def _compaction_loop(self) -> None:
+        while not self._stop.wait(self.compaction_interval):
+            try:
+                self.apply_retention()
+            except Exception as e:
+                logger.error(f"Memory compaction failed: {str(e)}")
+
+    def stop(self) -> None:
+        """Stop the background compaction thread"""
+        self._stop.set()
+
+    def _iter_metadata(self, batch_size: int = None):
+        """Yield (id, metadata) of every stored incident, reading one page at a time"""
+        batch_size = batch_size or self.WRITE_BATCH_SIZE
+        offset = 0
+        while True:
+            page = self.collection.get(include=['metadatas'], limit=batch_size, offset=offset)
+            if not page['ids']:
+                return
+            for record_id, metadata in zip(page['ids'], page['metadatas']):
+                yield record_id, metadata or {}
+            offset += len(page['ids'])
+
+    def _rebuild_pattern_index(self) -> None:
+        """Recompute the pattern index from the collection's and archive's metadata and persist it"""
+        started = time.perf_counter()
+        hot = dict(self._iter_metadata())
+        # An archived copy of a stored incident (left by an interrupted restore) is not counted twice
+        self.pattern_index.rebuild(
+            list(hot.values())
+            + [metadata for metadata in self.archive.iter_metadata() if metadata.get("incident_id") not in hot]
+        )
+        self.pattern_index.save()
+        logger.info(
+            f"Pattern index rebuilt from {self.pattern_index.incident_count} incidents "
+            f"in {time.perf_counter() - started:.2f}s"
+        )
+
+    def _set_schema_version(self, version: int) -> None:
+        """Record the metadata schema version on the collection (modify replaces the whole dict)"""
+        metadata = dict(self.collection.metadata or {})
+        metadata["schema_version"] = version
+        self.collection.modify(metadata=metadata)
+        self.schema_version = version
+
+    def _build_where(self, filters: Dict) -> Optional[Dict]:
+        """Chroma where clause for the metadata filters (None when unfiltered)"""
+        unknown = set(filters) - set(self.RECALL_FILTER_FIELDS) - {"since", "until"}
+        if unknown:
+            raise ValueError(f"Unknown recall filters: {sorted(unknown)}")
+
+        clauses = []
+        for field in self.RECALL_FILTER_FIELDS:
+            value = filters.get(field)
+            if value is None:
+                continue
+            if isinstance(value, (list, tuple)):
+                clauses.append({field: {"$in": [str(item) for item in value]}})
+            else:
+                clauses.append({field: str(value)})
+        for bound, operator in (("since", "$gte"), ("until", "$lte")):
+            if filters.get(bound) is not None:
+                epoch = to_epoch(filters[bound])
+                if epoch is None:
+                    raise ValueError(f"Invalid {bound} timestamp: {filters[bound]}")
+                clauses.append({"timestamp_epoch": {operator: epoch}})
+
+        if not clauses:
+            return None
+        return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+    def _similarity(self, distance: float) -> float:
+        """Cosine similarity of a collection query distance"""
+        if self.distance_space == "l2":
+            return 1 - distance / 2
+        return 1 - distance
+
+    def _parse_results(self, results: Dict) -> List[Dict]:
+        """Similar-incident dicts from a Chroma query result, most similar first"""
+        return [
+            self._to_incident(metadata, document, self._similarity(distance))
+            for metadata, document, distance in zip(
+                results['metadatas'][0], results['documents'][0], results['distances'][0]
+            )
+        ]
+
+    @staticmethod
+    def _to_incident(metadata: Dict, document: str, similarity: float) -> Dict:
+        """Similar-incident dict of one stored (or archived) incident"""
+        return {
+            "incident_id": metadata['incident_id'],
+            "incident_type": metadata['incident_type'],
+            "facility_id": metadata['facility_id'],
+            "similarity_score": round(similarity, 3),
+            "outcome": metadata['outcome'],
+            "resolution_time": metadata['resolution_time'],
+            "resolution_hours": metadata.get('resolution_hours'),
+            "cost": int(metadata.get('cost_usd', 0)),
+            "timestamp": metadata['timestamp'],
+            "duplicate_of": metadata.get('duplicate_of') or None,
+            "details": document
+        }
+
+    def _rank_candidates(
+        self,
+        candidates: List[Dict],
+        current_incident: Dict,
+        filters: Dict,
+        threshold: float
+    ) -> Tuple[List[Dict], int, int]:
+        """
+        Drop candidates below the similarity threshold, re-rank the rest and keep only
+        the best-ranked incident of each near-duplicate group
+
+        Returns:
+            Tuple of (ranked incidents, number dropped by the similarity threshold,
+            number of near-duplicates collapsed)
+        """
+        query_fields = {
+            "incident_type": current_incident.get('incident_type', current_incident.get('type')),
+            "facility_id": current_incident.get('facility_id')
+        }
+
+        kept, below_threshold = [], 0
+        for candidate in candidates:
+            if candidate["similarity_score"] < threshold:
+                below_threshold += 1
+                continue
+            bonus = sum(
+                weight for field, weight in self.RECALL_MATCH_BONUS.items()
+                if field not in filters and query_fields[field] and candidate[field] == query_fields[field]
+            )
+            kept.append((candidate["similarity_score"] + bonus, candidate))
+
+        kept.sort(key=lambda item: item[0], reverse=True)
+
+        ranked, groups = [], set()
+        for _, candidate in kept:
+            group = candidate["duplicate_of"] or candidate["incident_id"]
+            if group not in groups:
+                groups.add(group)
+                ranked.append(candidate)
+        return ranked, below_threshold, len(kept) - len(ranked)
+
+    def _create_incident_metadata(self, incident_data: Dict) -> Dict:
+        """
+        Build the metadata stored alongside an incident
+
+        Args:
+            incident_data: Incident dictionary
+
+        Returns:
+            Metadata dict for ChromaDB (typed cost_usd, resolution_hours and timestamp_epoch)
+        """
+        return build_incident_metadata(incident_data)
+
     def _create_incident_text(self, incident: Dict) -> str:
         """
         Convert incident data to searchable text
@@ -237,37 +1047,19 @@ class MemoryEnabledAgent:
                 "average_cost": 0
             }
 
-        # Calculate success rate
-        successful = sum(1 for i in incidents if i.get('outcome') == 'SUCCESS')
-        success_rate = successful / len(incidents) if incidents else 0
-
-        # Parse resolution times (assumes format like "6 hours", "2 days")
-        resolution_times = []
-        for incident in incidents:
-            time_str = incident.get('resolution_time', '0 hours')
-            try:
-                parts = time_str.split()
-                if len(parts) >= 2:
-                    value = float(parts[0])
-                    unit = parts[1].lower()
-                    # Convert to hours
-                    if 'day' in unit:
-                        value *= 24
-                    resolution_times.append(value)
-            except:
-                pass
-
-        avg_time = sum(resolution_times) / len(resolution_times) if resolution_times else 0
-
-        # Calculate average cost
-        avg_cost = sum(i.get('cost', 0) for i in incidents) / len(incidents) if incidents else 0
+        summary = summarize_outcomes(
+            {"outcome": i.get('outcome'), "cost_usd": i.get('cost'), "resolution_hours": i.get('resolution_hours')}
+            for i in incidents
+        )
+        avg_hours = summary["average_resolution_hours"]
 
         return {
             "total_similar_incidents": len(incidents),
-            "success_rate": round(success_rate, 2),
-            "average_resolution_time": f"{int(avg_time)} hours" if avg_time > 0 else "N/A",
-            "average_cost": int(avg_cost),
-            "most_similar_score": incidents[0].get('similarity_score', 0) if incidents else 0
+            "success_rate": summary["success_rate"],
+            "average_resolution_time": f"{int(avg_hours)} hours" if avg_hours else "N/A",
+            "average_resolution_hours": avg_hours,
+            "average_cost": int(summary["average_cost_usd"] or 0),
+            "most_similar_score": incidents[0].get('similarity_score', 0)
         }
 
     def _generate_recommendation(
@@ -303,6 +1095,48 @@ Recommended approach: {most_similar.get('details', 'Review most similar incident
 
         return recommendation.strip()
 
+    def _write_statistics(self) -> Dict:
+        """Write operations so far and the embeddings skipped by content-hash checks"""
+        with self._lock:
+            counts = dict(self._write_counts)
+        writes = sum(counts[operation] for operation in self.WRITE_OPERATIONS)
+        skipped = counts["unchanged"] + counts["metadata_updated"]
+        return {
+            **counts,
+            "near_duplicate_threshold": self.near_duplicate_threshold,
+            "embeddings_skipped": skipped,
+            "embedding_skip_rate": round(skipped / writes, 3) if writes else 0
+        }
+
+    def _disk_usage(self) -> Dict:
+        """Bytes on disk of the Chroma data, archive and pattern index"""
+        archive_bytes = self.archive.disk_bytes()
+        index_bytes = os.path.getsize(self.pattern_index.path) if os.path.exists(self.pattern_index.path) else 0
+        total = 0
+        for root, _, files in os.walk(self.persist_directory):
+            total += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+        return {
+            "chroma_bytes": total - archive_bytes - index_bytes,
+            "archive_bytes": archive_bytes,
+            "pattern_index_bytes": index_bytes,
+            "total_bytes": total
+        }
+
+    def _recall_latency(self) -> Dict:
+        """Percentiles of the recent recall latencies (query, ranking and archive search)"""
+        with self._lock:
+            samples = np.array(self._recall_latencies, dtype=float)
+        if not len(samples):
+            return {"samples": 0}
+        p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+        return {
+            "samples": len(samples),
+            "p50_ms": round(float(p50), 2),
+            "p95_ms": round(float(p95), 2),
+            "p99_ms": round(float(p99), 2),
+            "max_ms": round(float(samples.max()), 2)
+        }
+
     def get_statistics(self) -> Dict:
         """
         Get memory statistics
@@ -311,10 +1145,30 @@ Recommended approach: {most_similar.get('details', 'Review most similar incident
             Dict with statistics
         """
         total_count = self.collection.count()
+        with self._lock:
+            retention = dict(self._retention)
 
         return {
             "total_incidents_stored": total_count,
             "collection_name": self.collection.name,
-            "embedding_model": "text-embedding-3-small",
+            "embedding_model": self.embedding_model,
+            "schema_version": self.schema_version,
+            "index_size": {
+                "hot_vectors": total_count,
+                "archived_incidents": self.archive.count,
+                "pattern_index_cells": self.pattern_index.get_statistics()["cells"]
+            },
+            "disk": self._disk_usage(),
+            "recall_latency_ms": self._recall_latency(),
+            "retention": {
+                "max_age_days": self.retention_max_age_days,
+                "max_incidents": self.retention_max_incidents,
+                "compaction_interval_seconds": self.compaction_interval,
+                **retention
+            },
+            "archive": self.archive.get_statistics(),
+            "pattern_index": self.pattern_index.get_statistics(),
+            "writes": self._write_statistics(),
+            "embedding_cache": self.embedding_function.get_statistics(),
             "status": "active"
         }
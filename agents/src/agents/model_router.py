@@ -0,0 +1,137 @@
+"""
+Model Router for ChainSync
+Routes reasoning runs to a small or large model tier and decides when to escalate
+"""
+
+from typing import Dict, Optional, Tuple
+import logging
+import threading
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SMALL_TIER = "small"
+LARGE_TIER = "large"
+
+# Incidents at these urgencies go straight to the large model
+LARGE_MODEL_URGENCIES = {"HIGH", "CRITICAL"}
+
+
+class ModelRouter:
+    """
+    Chooses the model tier for an incident and whether a small-tier answer needs escalation
+
+    Without a small model configured every run goes to the large tier. Otherwise
+    HIGH/CRITICAL incidents start on the large tier, and everything else starts on the
+    small tier and is re-run on the large one when the final answer cannot be parsed or
+    its confidence is below `escalation_confidence`.
+    """
+
+    def __init__(
+        self,
+        large_model: str = "gpt-4-turbo",
+        small_model: Optional[str] = None,
+        escalation_confidence: float = 0.7
+    ):
+        """
+        Initialize the router
+
+        Args:
+            large_model: Model for high-stakes incidents and escalations
+            small_model: Cheaper, faster first-pass model (None disables routing)
+            escalation_confidence: Small-tier confidence below which the large tier re-runs
+        """
+        self.large_model = large_model
+        self.small_model = small_model if small_model and small_model != large_model else None
+        self.escalation_confidence = escalation_confidence
+
+        self._lock = threading.Lock()
+        self._routes: Dict[str, int] = {}
+        self._escalations: Dict[str, int] = {}
+        self._tiers = {
+            tier: {"runs": 0, "total_ms": 0.0, "max_ms": 0.0} for tier in (SMALL_TIER, LARGE_TIER)
+        }
+
+    @property
+    def enabled(self) -> bool:
+        return self.small_model is not None
+
+    def model_for(self, tier: str) -> str:
+        return self.small_model if tier == SMALL_TIER else self.large_model
+
+    def initial_tier(self, incident_data: Dict) -> Tuple[str, str]:
+        """
+        Pick the first tier for an incident
+
+        Returns:
+            Tuple of (tier, reason)
+        """
+        if not self.enabled:
+            tier, reason = LARGE_TIER, "routing_disabled"
+        elif str(incident_data.get("urgency", "MEDIUM")).upper() in LARGE_MODEL_URGENCIES:
+            tier, reason = LARGE_TIER, "urgency"
+        else:
+            tier, reason = SMALL_TIER, "default"
+
+        with self._lock:
+            self._routes[reason] = self._routes.get(reason, 0) + 1
+        return tier, reason
+
+    def escalation_reason(self, tier: str, recommendation: Optional[Dict]) -> Optional[str]:
+        """
+        Decide whether a run's answer should be re-run on the large tier
+
+        Args:
+            tier: Tier that produced the answer
+            recommendation: Parsed final answer, or None when it could not be parsed
+
+        Returns:
+            "parse_failure", "low_confidence" or None
+        """
+        if tier != SMALL_TIER:
+            return None
+
+        if recommendation is None:
+            reason = "parse_failure"
+        else:
+            try:
+                confidence = float(recommendation.get("confidence", 0))
+            except (TypeError, ValueError):
+                confidence = 0.0
+            reason = "low_confidence" if confidence < self.escalation_confidence else None
+
+        if reason:
+            with self._lock:
+                self._escalations[reason] = self._escalations.get(reason, 0) + 1
+        return reason
+
+    def record_run(self, tier: str, latency_ms: float) -> None:
+        with self._lock:
+            counters = self._tiers[tier]
+            counters["runs"] += 1
+            counters["total_ms"] += latency_ms
+            counters["max_ms"] = max(counters["max_ms"], latency_ms)
+
+    def get_statistics(self) -> Dict:
+        """Routing distribution, escalations and latency per tier"""
+        with self._lock:
+            routed = sum(self._routes.values())
+            small_starts = self._routes.get("default", 0)
+            escalated = sum(self._escalations.values())
+            return {
+                "enabled": self.enabled,
+                "models": {SMALL_TIER: self.small_model, LARGE_TIER: self.large_model},
+                "escalation_confidence": self.escalation_confidence,
+                "routed": routed,
+                "initial_routes": dict(self._routes),
+                "escalations": dict(self._escalations),
+                "escalation_rate": round(escalated / small_starts, 3) if small_starts else 0,
+                "tiers": {
+                    tier: {
+                        "runs": counters["runs"],
+                        "avg_latency_ms": round(counters["total_ms"] / counters["runs"], 2) if counters["runs"] else 0,
+                        "max_latency_ms": round(counters["max_ms"], 2)
+                    }
+                    for tier, counters in self._tiers.items()
+                }
+            }
@@ -0,0 +1,255 @@
+"""
+Incident Pattern Index for ChainSync
+Precomputed outcome aggregates per (incident_type, facility_id, outcome), updated incrementally
+"""
+
+from itertools import product
+from typing import Dict, Iterable, List, Optional, Tuple
+import json
+import logging
+import math
+import os
+import threading
+import time
+
+from .incident_schema import outcome_summary
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+KEY_FIELDS = ("incident_type", "facility_id", "outcome")
+WILDCARD = "*"
+
+# Running totals of a cell: count, successes, cost sum/count, resolution-hours sum/count
+_COUNT, _SUCCESSES, _COST_SUM, _COST_N, _HOURS_SUM, _HOURS_N = range(6)
+
+Key = Tuple[str, str, str]
+
+
+class PatternIndex:
+    """
+    Outcome aggregates keyed by (incident_type, facility_id, outcome)
+
+    Every incident updates its own cell and the seven roll-ups where one or more key
+    fields are the wildcard, so "WATER_CONTAMINATION at Atlanta_WTP, any outcome" or
+    "all incidents at a facility" is a single dict lookup. Only the base cells are
+    persisted (JSON, written atomically); roll-ups are rebuilt on load.
+    """
+
+    FILE_VERSION = 1
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Initialize an empty index
+
+        Args:
+            path: JSON file the index is persisted to (in-memory only if None)
+        """
+        self.path = path
+
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._cells: Dict[Key, List[float]] = {}
+        self._values: Dict[str, set] = {field: set() for field in KEY_FIELDS}
+        self._incidents = 0
+        self._saves = 0
+        self._last_saved: Optional[float] = None
+
+    @property
+    def incident_count(self) -> int:
+        with self._lock:
+            return self._incidents
+
+    def add(self, metadata: Dict) -> None:
+        """Count one stored incident (schema version 2 metadata)"""
+        self.add_many([metadata])
+
+    def add_many(self, metadatas: Iterable[Dict]) -> None:
+        with self._lock:
+            for metadata in metadatas:
+                self._apply(self._base_key(metadata), self._totals(metadata))
+
+    def remove(self, metadata: Dict) -> None:
+        """Uncount a stored incident (e.g. the previous version of an updated record)"""
+        with self._lock:
+            self._apply(self._base_key(metadata), [-value for value in self._totals(metadata)])
+
+    def rebuild(self, metadatas: Iterable[Dict]) -> None:
+        """Replace the index contents with aggregates of the given incidents"""
+        with self._lock:
+            self._clear()
+            for metadata in metadatas:
+                self._apply(self._base_key(metadata), self._totals(metadata))
+
+    def lookup(
+        self,
+        incident_type: Optional[str] = None,
+        facility_id: Optional[str] = None,
+        outcome: Optional[str] = None
+    ) -> Dict:
+        """Outcome summary of the incidents matching the given fields (None = any)"""
+        key = self._query_key(incident_type, facility_id, outcome)
+        with self._lock:
+            cell = self._cells.get(key)
+            return self._summary(cell)
+
+    def breakdown(self, group_by: str, **filters: Optional[str]) -> Dict[str, Dict]:
+        """
+        Outcome summary per value of one key field, within the given filters
+
+        Args:
+            group_by: incident_type, facility_id or outcome
+            filters: incident_type, facility_id and/or outcome values (None = any)
+
+        Returns:
+            Dict of field value -> summary, largest groups first
+        """
+        position = KEY_FIELDS.index(group_by)
+        base = list(self._query_key(**{field: filters.get(field) for field in KEY_FIELDS}))
+
+        with self._lock:
+            groups = {}
+            for value in self._values[group_by]:
+                base[position] = value
+                cell = self._cells.get(tuple(base))
+                if cell is not None:
+                    groups[value] = self._summary(cell)
+
+        return dict(sorted(groups.items(), key=lambda item: item[1]["count"], reverse=True))
+
+    def baseline(self, incident_type: Optional[str], facility_id: Optional[str]) -> Dict:
+        """Population-level outcomes for an incident's type, overall and at its facility"""
+        return {
+            "incident_type": incident_type,
+            "facility_id": facility_id,
+            "type_overall": self.lookup(incident_type=incident_type) if incident_type else None,
+            "type_at_facility": (
+                self.lookup(incident_type=incident_type, facility_id=facility_id)
+                if incident_type and facility_id else None
+            )
+        }
+
+    def save(self) -> None:
+        """Write the base cells to `path` (temp file + rename, so readers never see a partial file)"""
+        if not self.path:
+            return
+        with self._lock:
+            cells = [
+                [*key, *cell] for key, cell in self._cells.items()
+                if WILDCARD not in key
+            ]
+            payload = {"version": self.FILE_VERSION, "incidents": self._incidents, "cells": cells}
+
+        with self._save_lock:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            temp_path = f"{self.path}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(payload, f, separators=(",", ":"))
+            os.replace(temp_path, self.path)
+
+        with self._lock:
+            self._saves += 1
+            self._last_saved = time.time()
+
+    def load(self) -> bool:
+        """
+        Load the index from `path`
+
+        Returns:
+            True if a compatible file was loaded
+        """
+        if not self.path or not os.path.exists(self.path):
+            return False
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                payload = json.load(f)
+            if payload.get("version") != self.FILE_VERSION:
+                return False
+            with self._lock:
+                self._clear()
+                for row in payload["cells"]:
+                    self._apply(tuple(row[:3]), [float(value) for value in row[3:]])
+                if self._incidents != payload["incidents"]:
+                    raise ValueError("incident count does not match the cells")
+            return True
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Pattern index at {self.path} could not be loaded: {str(e)}")
+            return False
+
+    def _clear(self) -> None:
+        self._cells.clear()
+        for values in self._values.values():
+            values.clear()
+        self._incidents = 0
+
+    def _apply(self, key: Key, totals: List[float]) -> None:
+        """
+        Add totals (negative to remove) to a base cell and its seven wildcard roll-ups;
+        cells whose count drops to zero are dropped. Caller holds the lock.
+        """
+        for field, part in zip(KEY_FIELDS, key):
+            self._values[field].add(part)
+        for mask in product((False, True), repeat=len(KEY_FIELDS)):
+            rollup = tuple(WILDCARD if wild else part for part, wild in zip(key, mask))
+            cell = self._cells.get(rollup)
+            if cell is None:
+                cell = self._cells[rollup] = [0.0] * len(totals)
+            for index, value in enumerate(totals):
+                cell[index] += value
+            if cell[_COUNT] <= 0:
+                del self._cells[rollup]
+        self._incidents += int(totals[_COUNT])
+
+        # Forget values with no incidents left (their single-field roll-up is gone)
+        for position, field in enumerate(KEY_FIELDS):
+            rollup = tuple(part if index == position else WILDCARD for index, part in enumerate(key))
+            if rollup not in self._cells:
+                self._values[field].discard(key[position])
+
+    @staticmethod
+    def _base_key(metadata: Dict) -> Key:
+        return tuple(str(metadata.get(field) or "UNKNOWN") for field in KEY_FIELDS)
+
+    @staticmethod
+    def _query_key(
+        incident_type: Optional[str] = None,
+        facility_id: Optional[str] = None,
+        outcome: Optional[str] = None
+    ) -> Key:
+        return tuple(WILDCARD if value is None else str(value) for value in (incident_type, facility_id, outcome))
+
+    @staticmethod
+    def _totals(metadata: Dict) -> List[float]:
+        cost = metadata.get("cost_usd")
+        hours = metadata.get("resolution_hours")
+        has_cost = isinstance(cost, (int, float)) and not math.isnan(cost)
+        has_hours = isinstance(hours, (int, float)) and not math.isnan(hours)
+        return [
+            1.0,
+            1.0 if metadata.get("outcome") == "SUCCESS" else 0.0,
+            float(cost) if has_cost else 0.0,
+            1.0 if has_cost else 0.0,
+            float(hours) if has_hours else 0.0,
+            1.0 if has_hours else 0.0
+        ]
+
+    @staticmethod
+    def _summary(cell: Optional[List[float]]) -> Dict:
+        if cell is None:
+            return outcome_summary(0, 0, 0.0, 0, 0.0, 0)
+        return outcome_summary(
+            int(cell[_COUNT]), int(cell[_SUCCESSES]),
+            cell[_COST_SUM], int(cell[_COST_N]),
+            cell[_HOURS_SUM], int(cell[_HOURS_N])
+        )
+
+    def get_statistics(self) -> Dict:
+        with self._lock:
+            return {
+                "path": self.path,
+                "incidents": self._incidents,
+                "cells": sum(1 for key in self._cells if WILDCARD not in key),
+                "rollups": sum(1 for key in self._cells if WILDCARD in key),
+                "saves": self._saves,
+                "last_saved": self._last_saved
+            }
@@ -0,0 +1,239 @@
+"""
+Population Impact Index for ChainSync
+Spatial index over census blocks and facility service zones for population impact lookups
+"""
+
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import csv
+import json
+import logging
+import math
+import os
+
+import numpy as np
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+REFERENCE_DATA_DIR = os.path.join(os.path.dirname(__file__), "reference_data")
+DEFAULT_ZONES_PATH = os.path.join(REFERENCE_DATA_DIR, "facility_service_zones.geojson")
+DEFAULT_BLOCKS_PATH = os.path.join(REFERENCE_DATA_DIR, "census_blocks.csv")
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = 111.32
+
+# Radius bounds of the platform API's GeoFilterTrait (radiusKm)
+MIN_RADIUS_KM = 0.1
+MAX_RADIUS_KM = 100
+
+BLOCK_COUNT_COLUMNS = ("population", "vulnerable_population", "schools", "hospitals", "nursing_homes")
+
+
+def _points_in_polygon(lats: np.ndarray, lons: np.ndarray, ring: List[List[float]]) -> np.ndarray:
+    """Vectorized even-odd ray casting of points against one GeoJSON ring ([lon, lat] pairs)"""
+    inside = np.zeros(len(lats), dtype=bool)
+    xs = [point[0] for point in ring]
+    ys = [point[1] for point in ring]
+    j = len(ring) - 1
+    for i in range(len(ring)):
+        crosses = (ys[i] > lats) != (ys[j] > lats)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            x_at = (xs[j] - xs[i]) * (lats - ys[i]) / (ys[j] - ys[i]) + xs[i]
+        inside ^= crosses & (lons < x_at)
+        j = i
+    return inside
+
+
+class PopulationIndex:
+    """
+    Census blocks bucketed in a lat/lon grid, with per-facility aggregates precomputed
+
+    Facility lookups are a dict access on aggregates computed at load time (blocks whose
+    centroid falls inside the facility's service-zone polygon). Radius queries scan only
+    the grid cells overlapping the circle's bounding box, then filter by haversine distance.
+    """
+
+    def __init__(
+        self,
+        zones_path: str = DEFAULT_ZONES_PATH,
+        blocks_path: str = DEFAULT_BLOCKS_PATH,
+        cell_size_deg: float = 0.05
+    ):
+        """
+        Load the reference data and build the index
+
+        Args:
+            zones_path: GeoJSON FeatureCollection of facility service zones (Polygon/MultiPolygon,
+                properties.facility_id)
+            blocks_path: CSV of census blocks (geoid, latitude, longitude, population,
+                vulnerable_population, schools, hospitals, nursing_homes)
+            cell_size_deg: Grid cell edge in degrees
+        """
+        self.zones_path = zones_path
+        self.blocks_path = blocks_path
+        self.cell_size_deg = cell_size_deg
+        self.loaded_at = datetime.utcnow().isoformat()
+
+        self._load_blocks(blocks_path)
+        self._build_grid()
+        self._load_zones(zones_path)
+
+        logger.info(
+            f"Population index loaded {len(self.geoids)} census blocks and "
+            f"{len(self.facilities)} facility service zones"
+        )
+
+    def _load_blocks(self, path: str) -> None:
+        with open(path, newline="", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+
+        self.geoids = [row["geoid"] for row in rows]
+        self.lats = np.array([float(row["latitude"]) for row in rows])
+        self.lons = np.array([float(row["longitude"]) for row in rows])
+        # One row per block, one column per count in BLOCK_COUNT_COLUMNS
+        self.counts = np.array(
+            [[int(row[column]) for column in BLOCK_COUNT_COLUMNS] for row in rows],
+            dtype=np.int64
+        ).reshape(len(rows), len(BLOCK_COUNT_COLUMNS))
+        # Index into self.facilities of the zone serving each block (-1 when unserved)
+        self.block_facility = np.full(len(rows), -1, dtype=np.int32)
+
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        return math.floor(lat / self.cell_size_deg), math.floor(lon / self.cell_size_deg)
+
+    def _build_grid(self) -> None:
+        rows = np.floor(self.lats / self.cell_size_deg).astype(np.int64)
+        cols = np.floor(self.lons / self.cell_size_deg).astype(np.int64)
+        order = np.lexsort((cols, rows))
+        keys = np.stack([rows[order], cols[order]], axis=1)
+
+        self._grid: Dict[Tuple[int, int], np.ndarray] = {}
+        if len(order):
+            boundaries = np.nonzero(np.any(np.diff(keys, axis=0) != 0, axis=1))[0] + 1
+            for chunk in np.split(order, boundaries):
+                self._grid[(int(rows[chunk[0]]), int(cols[chunk[0]]))] = chunk
+
+    def _candidates(self, min_lat: float, max_lat: float, min_lon: float, max_lon: float) -> np.ndarray:
+        """Indices of blocks in grid cells overlapping a bounding box"""
+        row_min, col_min = self._cell(min_lat, min_lon)
+        row_max, col_max = self._cell(max_lat, max_lon)
+        chunks = [
+            self._grid[(row, col)]
+            for row in range(row_min, row_max + 1)
+            for col in range(col_min, col_max + 1)
+            if (row, col) in self._grid
+        ]
+        return np.concatenate(chunks) if chunks else np.empty(0, dtype=np.int64)
+
+    def _load_zones(self, path: str) -> None:
+        with open(path, encoding="utf-8") as f:
+            collection = json.load(f)
+
+        self.facilities: List[str] = []
+        self._aggregates: Dict[str, Dict] = {}
+
+        for feature in collection["features"]:
+            properties = feature["properties"]
+            facility_id = properties["facility_id"]
+            geometry = feature["geometry"]
+            polygons = geometry["coordinates"] if geometry["type"] == "MultiPolygon" else [geometry["coordinates"]]
+
+            facility_index = len(self.facilities)
+            self.facilities.append(facility_id)
+            served = np.zeros(len(self.geoids), dtype=bool)
+
+            for polygon in polygons:
+                outer, holes = polygon[0], polygon[1:]
+                lons = [point[0] for point in outer]
+                lats = [point[1] for point in outer]
+                candidates = self._candidates(min(lats), max(lats), min(lons), max(lons))
+                inside = _points_in_polygon(self.lats[candidates], self.lons[candidates], outer)
+                for hole in holes:
+                    inside &= ~_points_in_polygon(self.lats[candidates], self.lons[candidates], hole)
+                served[candidates[inside]] = True
+
+            # A block inside overlapping zones is attributed to the first zone listed
+            unassigned = served & (self.block_facility < 0)
+            self.block_facility[unassigned] = facility_index
+
+            totals = self.counts[served].sum(axis=0)
+            self._aggregates[facility_id] = {
+                "facility_id": facility_id,
+                "facility_name": properties.get("facility_name", facility_id),
+                **self._summarize(totals, int(served.sum())),
+                "source": "service_zone"
+            }
+
+    @staticmethod
+    def _summarize(totals: np.ndarray, blocks: int) -> Dict:
+        population, vulnerable, schools, hospitals, nursing_homes = (int(value) for value in totals)
+        return {
+            "total_customers": population,
+            "schools": schools,
+            "hospitals": hospitals,
+            "nursing_homes": nursing_homes,
+            "vulnerable_population": vulnerable,
+            "vulnerable_population_percentage": round(vulnerable * 100 / population, 1) if population else 0,
+            "census_blocks": blocks
+        }
+
+    def facility_impact(self, facility_id: str) -> Optional[Dict]:
+        """
+        Precomputed service-zone aggregates for a facility
+
+        Returns:
+            Copy of the aggregate dict, or None if the facility has no service zone
+        """
+        aggregate = self._aggregates.get(facility_id)
+        return dict(aggregate) if aggregate else None
+
+    def radius_impact(self, latitude: float, longitude: float, radius_km: float) -> Dict:
+        """
+        Population inside a circle (e.g. an air-pollution plume)
+
+        Args:
+            latitude: Circle centre latitude
+            longitude: Circle centre longitude
+            radius_km: Radius in km (GeoFilterTrait bounds: 0.1 - 100)
+
+        Returns:
+            Aggregates of the blocks whose centroid lies within the radius, plus the
+            facility service zones those blocks belong to
+        """
+        if not MIN_RADIUS_KM <= radius_km <= MAX_RADIUS_KM:
+            raise ValueError(f"radius_km must be between {MIN_RADIUS_KM} and {MAX_RADIUS_KM}")
+
+        dlat = radius_km / KM_PER_DEGREE_LAT
+        dlon = radius_km / (KM_PER_DEGREE_LAT * max(math.cos(math.radians(latitude)), 1e-6))
+        candidates = self._candidates(latitude - dlat, latitude + dlat, longitude - dlon, longitude + dlon)
+
+        lat1, lon1 = math.radians(latitude), math.radians(longitude)
+        lat2, lon2 = np.radians(self.lats[candidates]), np.radians(self.lons[candidates])
+        a = np.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+        distances = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+        hits = candidates[distances <= radius_km]
+
+        summary = self._summarize(self.counts[hits].sum(axis=0), len(hits))
+        zones = np.unique(self.block_facility[hits])
+        return {
+            "latitude": latitude,
+            "longitude": longitude,
+            "radius_km": radius_km,
+            "population": summary.pop("total_customers"),
+            **summary,
+            "service_zones_affected": [self.facilities[i] for i in zones if i >= 0],
+            "source": "radius"
+        }
+
+    def get_statistics(self) -> Dict:
+        return {
+            "census_blocks": len(self.geoids),
+            "facilities": len(self.facilities),
+            "grid_cells": len(self._grid),
+            "cell_size_deg": self.cell_size_deg,
+            "unserved_blocks": int((self.block_facility < 0).sum()),
+            "zones_path": self.zones_path,
+            "blocks_path": self.blocks_path,
+            "loaded_at": self.loaded_at
+        }
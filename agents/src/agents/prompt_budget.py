@@ -0,0 +1,234 @@
+"""
+Prompt Budget for ChainSync
+Token accounting, prompt compaction and per-analysis token ceilings for the ReAct agent
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+import functools
+import json
+import logging
+
+from langchain.schema import AgentAction
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# USD per 1K (prompt, completion) tokens; matched by longest model-name prefix
+MODEL_PRICING_PER_1K = {
+    "gpt-4-turbo": (0.01, 0.03),
+    "gpt-4o-mini": (0.00015, 0.0006),
+    "gpt-4o": (0.0025, 0.01),
+    "gpt-4": (0.03, 0.06),
+    "gpt-3.5-turbo": (0.0005, 0.0015)
+}
+
+# Rough characters per token when no tokenizer is available
+CHARS_PER_TOKEN = 4
+
+# Appended to the scratchpad once the run nears its token ceiling (text final answers;
+# callers using another final step pass their own wording to format_scratchpad)
+FINALIZE_NOTICE = "(Token budget nearly used: give your Final Answer now.)"
+
+
+def _drop_nulls(value: Any) -> Any:
+    """Remove None values (and the keys holding them) recursively"""
+    if isinstance(value, dict):
+        return {key: _drop_nulls(item) for key, item in value.items() if item is not None}
+    if isinstance(value, list):
+        return [_drop_nulls(item) for item in value if item is not None]
+    return value
+
+
+def compact_json(data: Any) -> str:
+    """Serialize without indentation, extra whitespace or null fields"""
+    return json.dumps(_drop_nulls(data), separators=(",", ":"), default=str)
+
+
+def _digest(value: Any, max_string: int = 24, max_items: int = 3) -> Any:
+    """
+    Shrink an observation for summarized steps
+
+    Dicts keep numbers, short strings and their first string field (the name of the
+    thing); long free text is dropped. Lists keep their first few items.
+    """
+    if isinstance(value, dict):
+        digest = {}
+        named = False
+        for key, item in value.items():
+            if isinstance(item, str) and len(item) > max_string and named:
+                continue
+            named = named or isinstance(item, str)
+            digest[key] = _digest(item, max_string, max_items)
+        return digest
+    if isinstance(value, list):
+        head = [_digest(item, max_string, max_items) for item in value[:max_items]]
+        return head + [f"+{len(value) - max_items} more"] if len(value) > max_items else head
+    if isinstance(value, str) and len(value) > max_string:
+        return value[:max_string] + "..."
+    return value
+
+
+@functools.lru_cache(maxsize=None)
+def _encoding(model: str):
+    """tiktoken encoding for a model, or None when unavailable (offline, unknown model)"""
+    try:
+        import tiktoken
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        logger.warning(f"Tokenizer unavailable for {model}, estimating tokens from length: {str(e)}")
+        return None
+
+
+class PromptBudget:
+    """
+    Keeps a ReAct run's prompt small and its total token spend under a ceiling
+
+    Observations are re-serialized as compact JSON. Once the scratchpad passes
+    `summarize_after_tokens`, all but the most recent `keep_recent_steps` observations
+    are replaced by digests. Spend is estimated per iteration (static prompt + incident
+    + scratchpad, plus the model's previous output); past `finalize_ratio` of the
+    ceiling the model is told to answer, and at the ceiling the executor stops the run.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int = 16000,
+        summarize_after_tokens: int = 1500,
+        keep_recent_steps: int = 2,
+        finalize_ratio: float = 0.8,
+        model: str = "gpt-4-turbo"
+    ):
+        """
+        Initialize the budget
+
+        Args:
+            max_tokens: Ceiling on estimated tokens per analysis (0 disables the ceiling)
+            summarize_after_tokens: Scratchpad size at which older observations are digested
+            keep_recent_steps: Most recent observations always kept verbatim
+            finalize_ratio: Share of the ceiling after which the model is asked to finish
+            model: Model name used to pick the tokenizer
+        """
+        self.max_tokens = max_tokens
+        self.summarize_after_tokens = summarize_after_tokens
+        self.keep_recent_steps = keep_recent_steps
+        self.finalize_ratio = finalize_ratio
+        self.model = model
+        self.base_prompt_tokens = 0
+
+    def count_tokens(self, text: str) -> int:
+        return _count_tokens(self.model, text)
+
+    def set_base_prompt(self, prompt_text: str) -> None:
+        """Record the size of the static prompt (template and tool descriptions)"""
+        self.base_prompt_tokens = self.count_tokens(prompt_text)
+
+    def _observations(self, intermediate_steps: List[Tuple[AgentAction, str]]) -> Tuple[List[str], int]:
+        """Compact observations, digesting older ones when the scratchpad is over threshold"""
+        observations = []
+        for _, observation in intermediate_steps:
+            try:
+                observations.append(compact_json(json.loads(observation)))
+            except (TypeError, ValueError):
+                observations.append(str(observation))
+
+        total = sum(self.count_tokens(text) for text in observations)
+        summarized = 0
+        if total > self.summarize_after_tokens:
+            for i in range(max(len(observations) - self.keep_recent_steps, 0)):
+                try:
+                    observations[i] = compact_json(_digest(json.loads(observations[i])))
+                except (TypeError, ValueError):
+                    observations[i] = _digest(observations[i], max_string=200)
+                summarized += 1
+
+        return observations, summarized
+
+    def format_scratchpad(
+        self,
+        intermediate_steps: List[Tuple[AgentAction, str]],
+        incident_data: str = "",
+        finalize_notice: str = FINALIZE_NOTICE
+    ) -> str:
+        """
+        Budget-aware replacement for LangChain's format_log_to_str
+
+        Args:
+            intermediate_steps: (action, observation) pairs of the run so far
+            incident_data: Incident prompt text (counted towards the spend)
+            finalize_notice: Instruction appended near the ceiling; it must name the
+                final step the prompt asks for
+        """
+        observations, _ = self._observations(intermediate_steps)
+        scratchpad = "".join(
+            f"{action.log}\nObservation: {observation}\nThought: "
+            for (action, _), observation in zip(intermediate_steps, observations)
+        )
+
+        if self.max_tokens and intermediate_steps:
+            spent = self.estimate_spent(intermediate_steps, incident_data)
+            next_prompt = self.base_prompt_tokens + self.count_tokens(incident_data) + self.count_tokens(scratchpad)
+            if spent + next_prompt >= self.finalize_ratio * self.max_tokens:
+                scratchpad = scratchpad[:-len("Thought: ")] + f"{finalize_notice}\nThought: "
+
+        return scratchpad
+
+    def estimate_spent(self, intermediate_steps: List[Tuple[AgentAction, str]], incident_data: str = "") -> int:
+        """Estimated tokens used by the iterations that produced `intermediate_steps`"""
+        fixed = self.base_prompt_tokens + self.count_tokens(incident_data)
+        spent = 0
+        for i, (action, _) in enumerate(intermediate_steps):
+            prefix = self._scratchpad_tokens(intermediate_steps[:i])
+            spent += fixed + prefix + self.count_tokens(action.log)
+        return spent
+
+    def _scratchpad_tokens(self, intermediate_steps: List[Tuple[AgentAction, str]]) -> int:
+        observations, _ = self._observations(intermediate_steps)
+        return sum(
+            self.count_tokens(action.log) + self.count_tokens(observation) + 6
+            for (action, _), observation in zip(intermediate_steps, observations)
+        )
+
+    def is_exhausted(self, intermediate_steps: List[Tuple[AgentAction, str]], incident_data: str = "") -> bool:
+        return bool(self.max_tokens) and self.estimate_spent(intermediate_steps, incident_data) >= self.max_tokens
+
+    def step_report(self, intermediate_steps: List[Tuple[AgentAction, str]]) -> Tuple[List[Dict], int]:
+        """
+        Per-step token sizes for the response
+
+        Returns:
+            Tuple of (one entry per step with the tool, action and observation tokens,
+            number of observations that were digested in the final scratchpad)
+        """
+        observations, summarized = self._observations(intermediate_steps)
+        steps = [
+            {
+                "step": i + 1,
+                "tool": action.tool,
+                "action_tokens": self.count_tokens(action.log),
+                "observation_tokens": self.count_tokens(str(raw)),
+                "prompt_observation_tokens": self.count_tokens(observation)
+            }
+            for i, ((action, raw), observation) in enumerate(zip(intermediate_steps, observations))
+        ]
+        return steps, summarized
+
+    @staticmethod
+    def cost(model: Optional[str], prompt_tokens: int, completion_tokens: int) -> float:
+        """USD cost of a call by model name (0 for models without a price entry)"""
+        model = (model or "").lower()
+        prefix = max((name for name in MODEL_PRICING_PER_1K if model.startswith(name)), key=len, default=None)
+        if prefix is None:
+            return 0.0
+        prompt_price, completion_price = MODEL_PRICING_PER_1K[prefix]
+        return round(prompt_tokens / 1000 * prompt_price + completion_tokens / 1000 * completion_price, 6)
+
+
+@functools.lru_cache(maxsize=4096)
+def _count_tokens(model: str, text: str) -> int:
+    encoding = _encoding(model)
+    if encoding is None:
+        return max(1, len(text) // CHARS_PER_TOKEN) if text else 0
+    return len(encoding.encode(text, disallowed_special=()))
@@ -3,70 +3,350 @@ Multi-Step Reasoning Agent for ChainSync
 Provides step-by-step logical analysis for complex environmental incidents
 """
 
-from langchain.agents import create_react_agent, AgentExecutor
+from langchain.agents import AgentExecutor
+from langchain.agents.output_parsers import ReActSingleInputOutputParser
 from langchain.prompts import PromptTemplate
+from langchain.schema import AgentAction, AgentFinish
+from langchain.schema.runnable import RunnablePassthrough
 from langchain.tools import Tool
+from langchain.tools.render import render_text_description
+from langchain_community.callbacks import get_openai_callback
 from langchain_openai import ChatOpenAI
-from typing import Dict, List
+from typing import Any, Dict, List, Optional, Tuple
 import json
 import logging
+import re
+import threading
+import time
+
+import httpx
+
+from .anomaly_detector import StreamingAnomalyDetector
+from .chainsync_api import ChainSyncDataClient
+from .http_clients import HttpClientPool
+from .model_router import LARGE_MODEL_URGENCIES, LARGE_TIER, SMALL_TIER, ModelRouter
+from .population_index import PopulationIndex
+from .prompt_budget import FINALIZE_NOTICE, PromptBudget, compact_json
+from .recommendation import (
+    INTERNAL_MODE,
+    RECOMMENDATION_FUNCTION,
+    TEXT_MODE,
+    RecommendationValidator,
+    StructuredReActOutputParser
+)
+from .regulatory_rules import RegulatoryRuleStore
+from .tool_cache import ToolCache
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+RECALL_TOOL_NAME = "recall_similar_incidents"
+
+# Last step of the ReAct prompt: a submit_recommendation call, or the legacy JSON text answer
+FINAL_STEP_FUNCTION = """After completing all steps:
+Thought: I now have enough information to make a final recommendation
+Then call the submit_recommendation function with the recommendation instead of writing a Final Answer."""
+FINAL_STEP_TEXT = """After completing all steps:
+Thought: I now have enough information to make a final recommendation
+Final Answer: [JSON object with: action (UPPER_SNAKE_CASE code), urgency (LOW|MEDIUM|HIGH|CRITICAL), confidence (0-1), reasoning, fallback_plan]"""
+# Token-budget notice matching FINAL_STEP_FUNCTION (FINALIZE_NOTICE matches FINAL_STEP_TEXT)
+FINALIZE_NOTICE_FUNCTION = "(Token budget nearly used: call the submit_recommendation function now.)"
+
+
+def _strong_precedent_answer(observation: str) -> Optional[Dict]:
+    """Return the ready final answer from a recall observation that found a strong precedent"""
+    try:
+        recall = json.loads(observation)
+    except (TypeError, ValueError):
+        return None
+    if isinstance(recall, dict) and recall.get("strong_precedent"):
+        return recall.get("final_answer")
+    return None
+
+
+def _incident_urgency(incident_prompt: str) -> Optional[str]:
+    """Urgency of the incident under analysis (MEDIUM if unset, None if the prompt is unreadable)"""
+    try:
+        incident = json.loads(incident_prompt)
+    except (TypeError, ValueError):
+        return None
+    if not isinstance(incident, dict):
+        return None
+    return str(incident.get("urgency", "MEDIUM")).upper()
+
+
+class PrecedentAwareAgentExecutor(AgentExecutor):
+    """
+    AgentExecutor that finishes early when the recall tool reports a strong precedent
+
+    The recall tool marks its observation with "strong_precedent": true and a ready
+    "final_answer" when a sufficiently similar, successful incident exists. Instead of
+    spending the remaining iterations re-deriving that answer, the run ends there.
+    Only LOW and MEDIUM urgency incidents stop early: for HIGH and CRITICAL ones (the
+    urgencies kept off the fast path and routed to the large model) the ready answer
+    is withdrawn and the analysis continues. The urgency comes from the incident
+    itself, not from the tool input the model wrote.
+    The run also stops once its estimated token spend reaches the prompt budget.
+    """
+
+    prompt_budget: Optional[Any] = None
+
+    def _take_next_step(
+        self,
+        name_to_tool_map,
+        color_mapping,
+        inputs: Dict[str, str],
+        intermediate_steps: List[Tuple[AgentAction, str]],
+        run_manager=None
+    ):
+        budget = self.prompt_budget
+        if budget is not None and budget.is_exhausted(intermediate_steps, inputs.get("incident_data", "")):
+            return AgentFinish(
+                {"output": json.dumps({
+                    "action": "MANUAL_REVIEW_REQUIRED",
+                    "urgency": "HIGH",
+                    "confidence": 0.0,
+                    "reasoning": (
+                        f"Token budget of {budget.max_tokens} reached after {len(intermediate_steps)} steps; "
+                        f"see the reasoning steps for findings so far"
+                    ),
+                    "fallback_plan": "Review the collected findings or re-run with a larger token budget"
+                }), "final_answer_mode": INTERNAL_MODE},
+                "Token budget exhausted; finishing"
+            )
+        next_step_output = super()._take_next_step(
+            name_to_tool_map, color_mapping, inputs, intermediate_steps, run_manager=run_manager
+        )
+        if isinstance(next_step_output, list) and len(next_step_output) == 1:
+            agent_action, observation = next_step_output[0]
+            if agent_action.tool == RECALL_TOOL_NAME and _strong_precedent_answer(observation):
+                observation = self._precedent_for_incident(observation, inputs.get("incident_data", ""))
+                next_step_output = [(agent_action, observation)]
+        return next_step_output
+
+    @staticmethod
+    def _precedent_for_incident(observation: str, incident_prompt: str) -> str:
+        """Give the precedent answer the incident's urgency, or withdraw it for HIGH/CRITICAL incidents"""
+        recall = json.loads(observation)
+        urgency = _incident_urgency(incident_prompt)
+        if urgency is None or urgency in LARGE_MODEL_URGENCIES:
+            recall["strong_precedent"] = False
+            recall.pop("final_answer", None)
+            recall["precedent_note"] = f"Not applied at {urgency or 'unknown'} urgency; continue the analysis"
+        else:
+            recall["final_answer"]["urgency"] = urgency
+        return json.dumps(recall)
+
+    def _get_tool_return(
+        self, next_step_output: Tuple[AgentAction, str]
+    ) -> Optional[AgentFinish]:
+        agent_action, observation = next_step_output
+        if agent_action.tool == RECALL_TOOL_NAME:
+            final_answer = _strong_precedent_answer(observation)
+            if final_answer:
+                return AgentFinish(
+                    {"output": json.dumps(final_answer), "final_answer_mode": INTERNAL_MODE},
+                    f"Strong precedent {final_answer.get('precedent_incident_id')} found; finishing early"
+                )
+        return super()._get_tool_return(next_step_output)
+
 
 class MultiStepReasoningAgent:
     """Agent that performs multi-step reasoning for incident analysis"""
 
-    def __init__(self, llm_api_key: str, chainsync_api_url: str = None):
+    # Character budget for the recall tool observation (~300 tokens)
+    RECALL_SUMMARY_MAX_CHARS = 1200
+
+    # Service vehicles listed in the find_service_vehicles observation
+    VEHICLE_RESULTS_MAX = 5
+
+    # Fast-path triage: (incident_type, violated parameter, direction) -> (action, standard option)
+    FAST_PATH_RULES = {
+        ("WATER_CONTAMINATION", "chlorine", "below"): ("CHLORINE_BOOST", "Chlorine boost + flushing"),
+        ("AIR_QUALITY_VIOLATION", "pm25", "above"): ("EQUIPMENT_ADJUSTMENT", "Equipment adjustment"),
+        ("AIR_QUALITY_VIOLATION", "pm10", "above"): ("EQUIPMENT_ADJUSTMENT", "Equipment adjustment"),
+    }
+    # Sensor-driven incident types where all-normal readings mean no intervention is needed
+    FAST_PATH_MONITOR_TYPES = {"WATER_CONTAMINATION", "AIR_QUALITY_VIOLATION"}
+
+    def __init__(
+        self,
+        llm_api_key: str,
+        chainsync_api_url: str = None,
+        memory_agent=None,
+        precedent_similarity_threshold: Optional[float] = 0.9,
+        fast_path_enabled: bool = True,
+        rule_store: Optional[RegulatoryRuleStore] = None,
+        anomaly_detector: Optional[StreamingAnomalyDetector] = None,
+        population_index: Optional[PopulationIndex] = None,
+        tool_cache: Optional[ToolCache] = None,
+        prompt_budget: Optional[PromptBudget] = None,
+        model: str = "gpt-4-turbo",
+        fast_model: Optional[str] = None,
+        temperature: float = 0.2,
+        max_iterations: int = 10,
+        escalation_confidence: float = 0.7,
+        structured_output: bool = True,
+        http_clients: Optional[HttpClientPool] = None,
+        chainsync_data: Optional[ChainSyncDataClient] = None
+    ):
         """
         Initialize the Multi-Step Reasoning Agent
 
         Args:
             llm_api_key: OpenAI API key
-            chainsync_api_url: URL for ChainSync MuleSoft API (optional)
+            chainsync_api_url: URL for ChainSync MuleSoft API; enables the live facility,
+                station and vehicle tools (optional)
+            memory_agent: MemoryEnabledAgent backing the recall tool (optional)
+            precedent_similarity_threshold: Similarity at which a successful precedent
+                ends a LOW/MEDIUM urgency run early (None disables early stopping)
+            fast_path_enabled: Answer clear-cut incidents from the tools without the LLM
+            rule_store: Shared regulatory limit/fine tables (bundled rules file if None)
+            anomaly_detector: Streaming sensor statistics backing the trend tool (optional)
+            population_index: Service-zone/census population index (bundled reference data if None)
+            tool_cache: Memoization and latency accounting for tool calls (private cache if None)
+            prompt_budget: Token ceiling and scratchpad compaction per analysis (defaults if None)
+            model: Large-tier model (HIGH/CRITICAL incidents and escalations)
+            fast_model: Small-tier model tried first for other incidents (None disables routing)
+            temperature: Sampling temperature for both tiers
+            max_iterations: Maximum ReAct iterations per run
+            escalation_confidence: Small-tier confidence below which the large tier re-runs
+            structured_output: Request the final answer as a submit_recommendation function
+                call and repair answers that fail schema validation with one function-calling
+                request (False: legacy "Final Answer" JSON text and keyword matching)
+            http_clients: Shared keep-alive connection pool for OpenAI requests (SDK default if None)
+            chainsync_data: Coalescing, short-TTL client for the platform API (built from
+                chainsync_api_url if None)
         """
         logger.info("Initializing Multi-Step Reasoning Agent")
 
-        self.llm = ChatOpenAI(
-            model="gpt-4-turbo",
-            api_key=llm_api_key,
-            temperature=0.2  # Lower temp for more consistent reasoning
+        self.router = ModelRouter(
+            large_model=model,
+            small_model=fast_model,
+            escalation_confidence=escalation_confidence
         )
+        self.max_iterations = max_iterations
+
+        # Lower temp for more consistent reasoning. Both tiers share one OpenAI connection
+        # pool, so TLS setup is not repeated per request
+        openai_client = {"client": http_clients.openai_client(llm_api_key).chat.completions} if http_clients else {}
+        self.llm = ChatOpenAI(model=model, api_key=llm_api_key, temperature=temperature, **openai_client)
+        self.fast_llm = ChatOpenAI(
+            model=self.router.small_model, api_key=llm_api_key, temperature=temperature, **openai_client
+        ) if self.router.enabled else None
 
         self.chainsync_api = chainsync_api_url
+        self.chainsync_data = chainsync_data or (
+            ChainSyncDataClient(httpx.Client(base_url=chainsync_api_url, timeout=10.0)) if chainsync_api_url else None
+        )
+        self.memory_agent = memory_agent
+        self.precedent_similarity_threshold = precedent_similarity_threshold
+        self.fast_path_enabled = fast_path_enabled
+        self.rule_store = rule_store or RegulatoryRuleStore()
+        self.anomaly_detector = anomaly_detector
+        self.population_index = population_index or PopulationIndex()
+        self.tool_cache = tool_cache or ToolCache()
+        self.prompt_budget = prompt_budget or PromptBudget(model=self.llm.model_name)
+        self.structured_output = structured_output
+        self.recommendation_validator = RecommendationValidator(
+            repair_enabled=structured_output,
+            function_calling=structured_output
+        )
+
+        # Running totals of ReAct iterations and token usage per analysis
+        self._usage_lock = threading.Lock()
+        self._usage_totals = {
+            "analyses": 0,
+            "iterations": 0,
+            "total_tokens": 0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "cost_usd": 0.0,
+            "early_stops": 0,
+            "budget_stops": 0
+        }
+        self._path_latency = {
+            path: {"count": 0, "total_ms": 0.0, "max_ms": 0.0} for path in ("fast", "llm")
+        }
+
         self.tools = self._create_tools()
+        self._tool_funcs = {tool.name: tool.func for tool in self.tools}
         self.agent = self._create_agent()
+        self.fast_agent = self._create_agent(self.fast_llm) if self.fast_llm is not None else None
 
         logger.info("Reasoning Agent initialized successfully")
 
     def _create_tools(self) -> List[Tool]:
         """Create custom tools for environmental analysis"""
-        return [
+        # The four analysis tools are pure functions of their input (and the active rule set),
+        # so repeated calls within and across runs are served from the tool cache
+        cached = self.tool_cache.wrap
+
+        tools = [
             Tool(
                 name="analyze_sensor_data",
-                func=self.analyze_sensor_data,
+                func=cached("analyze_sensor_data", self.analyze_sensor_data, scope=self._rules_version),
                 description="Analyze current sensor readings against EPA/DEQ regulatory limits. Input should be JSON string of sensor data."
             ),
             Tool(
                 name="calculate_population_impact",
-                func=self.calculate_population_impact,
-                description="Calculate affected population based on facility and distribution zone. Input should be facility_id."
+                func=cached("calculate_population_impact", self.calculate_population_impact),
+                description="Calculate affected population based on facility and distribution zone. Input should be facility_id, or JSON with latitude, longitude and radiusKm for an air-pollution plume."
             ),
             Tool(
                 name="evaluate_response_options",
-                func=self.evaluate_response_options,
+                func=cached("evaluate_response_options", self.evaluate_response_options),
                 description="Compare cost/benefit of different response strategies. Input should be incident_type."
             ),
             Tool(
                 name="assess_regulatory_risk",
-                func=self.assess_regulatory_risk,
+                func=cached("assess_regulatory_risk", self.assess_regulatory_risk, scope=self._rules_version),
                 description="Assess regulatory compliance risk and potential fines. Input should be JSON with parameter and value."
             )
         ]
 
-    def _create_agent(self) -> AgentExecutor:
-        """Create the reasoning agent with custom prompt"""
+        if self.anomaly_detector is not None:
+            tools.append(Tool(
+                name="detect_sensor_trends",
+                func=cached("detect_sensor_trends", self.detect_sensor_trends, cacheable=False),
+                description="Check recent sensor trends (spikes, rising/falling trends, rate of change per hour) at a monitoring station. Input should be station_id."
+            ))
+
+        # Live platform data changes between runs; the API client has its own short-TTL cache
+        if self.chainsync_data is not None:
+            tools.extend([
+                Tool(
+                    name="get_facility_status",
+                    func=cached("get_facility_status", self.get_facility_status, cacheable=False),
+                    description="Get live facility monitoring data (water quality, emissions, operating mode, backup systems, compliance) from the ChainSync platform. Input should be facility_id."
+                ),
+                Tool(
+                    name="get_station_data",
+                    func=cached("get_station_data", self.get_station_data, cacheable=False),
+                    description="Get current air quality and weather at a monitoring station from the ChainSync platform. Input should be station_id."
+                ),
+                Tool(
+                    name="find_service_vehicles",
+                    func=cached("find_service_vehicles", self.find_service_vehicles, cacheable=False),
+                    description="Find available emergency-capable service vehicles (water tankers, spill response, mobile labs). Input should be a vehicleType, or JSON with optional vehicleType, latitude, longitude and radiusKm."
+                )
+            ])
+
+        if self.memory_agent is not None:
+            tools.append(Tool(
+                name=RECALL_TOOL_NAME,
+                func=cached(RECALL_TOOL_NAME, self.recall_similar_incidents, cacheable=False),
+                description="Recall similar past incidents and their outcomes from memory. Use this FIRST. Input should be JSON with incident_type, facility_id, sensor_data and context."
+            ))
+
+        return tools
+
+    def _rules_version(self) -> str:
+        return self.rule_store.current.version
+
+    def _create_agent(self, llm=None) -> AgentExecutor:
+        """Create the reasoning agent with custom prompt (on the large-tier model unless given)"""
+        llm = llm or self.llm
 
         prompt = PromptTemplate.from_template("""You are an expert environmental engineer analyzing incidents at water/waste/environmental facilities.
 
@@ -79,11 +359,12 @@ Incident data:
 {incident_data}
 
 Think through this systematically:
-1. What is the current situation? (analyze sensor data and violations)
+0. Have we seen this before? (recall similar incidents, if that tool is available)
+1. What is the current situation? (analyze sensor data, violations, recent trends and live facility/station data)
 2. What caused this? (determine root cause based on context)
 3. Who is affected? (calculate population impact)
 4. What are the regulatory implications? (assess compliance risk)
-5. What are our options? (evaluate response strategies)
+5. What are our options? (evaluate response strategies and available service vehicles)
 6. What should we do? (recommend action with confidence score and fallback)
 
 Important:
@@ -98,49 +379,90 @@ Action: [tool name]
 Action Input: [input to tool]
 Observation: [result from tool]
 
-After completing all steps:
-Thought: I now have enough information to make a final recommendation
-Final Answer: [JSON formatted recommendation with: action, urgency, confidence, reasoning, fallback_plan]
+{final_step}
 
 Begin!
 
 {agent_scratchpad}
         """)
 
-        agent = create_react_agent(
-            llm=self.llm,
-            tools=self.tools,
-            prompt=prompt
+        # Same pipeline as create_react_agent, with the budget-aware scratchpad
+        prompt = prompt.partial(
+            tools=render_text_description(self.tools),
+            tool_names=", ".join(tool.name for tool in self.tools),
+            final_step=FINAL_STEP_FUNCTION if self.structured_output else FINAL_STEP_TEXT
+        )
+        self.prompt_budget.set_base_prompt(prompt.format(incident_data="", agent_scratchpad=""))
+
+        finalize_notice = FINALIZE_NOTICE_FUNCTION if self.structured_output else FINALIZE_NOTICE
+        agent = (
+            RunnablePassthrough.assign(
+                agent_scratchpad=lambda x: self.prompt_budget.format_scratchpad(
+                    x["intermediate_steps"], x["incident_data"], finalize_notice
+                )
+            )
+            | prompt
+            | (
+                llm.bind(stop=["\nObservation"], functions=[RECOMMENDATION_FUNCTION])
+                | StructuredReActOutputParser()
+                if self.structured_output else
+                llm.bind(stop=["\nObservation"]) | ReActSingleInputOutputParser()
+            )
         )
 
-        return AgentExecutor(
+        return PrecedentAwareAgentExecutor(
             agent=agent,
+            prompt_budget=self.prompt_budget,
             tools=self.tools,
             verbose=True,
-            max_iterations=10,
-            handle_parsing_errors=True
+            max_iterations=self.max_iterations,
+            handle_parsing_errors=True,
+            return_intermediate_steps=True
         )
 
-    def analyze_incident(self, incident_data: Dict) -> Dict:
+    def analyze_incident(self, incident_data: Dict, callbacks: Optional[List] = None) -> Dict:
         """
         Main method to analyze incident with multi-step reasoning
 
         Args:
             incident_data: Dict containing incident information
+            callbacks: Optional LangChain callback handlers for the agent run
+                (e.g. ReasoningEventHandler for streaming)
 
         Returns:
             Dict with reasoning steps and recommendation
         """
+        started = time.perf_counter()
         try:
             logger.info(f"Analyzing incident: {incident_data.get('incident_id', 'UNKNOWN')}")
 
-            # Invoke agent with incident data
-            result = self.agent.invoke({
-                "incident_data": json.dumps(incident_data, indent=2)
-            })
-
-            # Parse the final answer
-            final_recommendation = self._parse_recommendation(result['output'])
+            # Clear-cut incidents are answered directly from the tool functions
+            if self.fast_path_enabled:
+                fast_result = self._fast_path_triage(incident_data)
+                if fast_result is not None:
+                    self._record_path_latency("fast", started)
+                    logger.info(
+                        f"Fast-path triage complete. Recommendation: {fast_result['final_recommendation']['action']}"
+                    )
+                    return fast_result
+
+            # Small model first unless the incident is high-stakes; weak answers escalate
+            incident_prompt = compact_json(incident_data)
+            tier, route_reason = self.router.initial_tier(incident_data)
+            escalation = None
+            runs = []
+            while True:
+                result, run_usage, recommendation = self._run_tier(tier, incident_prompt, callbacks)
+                runs.append(run_usage)
+                reason = self.router.escalation_reason(tier, recommendation)
+                if reason is None:
+                    break
+                logger.info(f"Escalating analysis from {self.router.model_for(tier)} to {self.router.large_model}: {reason}")
+                escalation, tier = reason, LARGE_TIER
+            usage = self._record_usage(runs)
+
+            # Validated (or repaired) final answer; keyword extraction only as a last resort
+            final_recommendation = recommendation or self._parse_recommendation(result['output'])
 
             # Extract reasoning steps from intermediate steps
             reasoning_steps = self._extract_reasoning_steps(result)
@@ -152,19 +474,30 @@ Begin!
             )
 
             logger.info(f"Analysis complete. Recommendation: {final_recommendation.get('action', 'N/A')}")
+            self._record_path_latency("llm", started)
 
             return {
                 "status": "success",
+                "path": "llm",
                 "reasoning_steps": reasoning_steps,
                 "final_recommendation": final_recommendation,
                 "slotify_briefing": slotify_briefing,
-                "raw_analysis": result['output']
+                "raw_analysis": result['output'],
+                "usage": usage,
+                "routing": {
+                    "initial_tier": runs[0]["tier"],
+                    "reason": route_reason,
+                    "final_tier": tier,
+                    "model": self.router.model_for(tier),
+                    "escalation_reason": escalation
+                }
             }
 
         except Exception as e:
             logger.error(f"Error analyzing incident: {str(e)}")
             return {
                 "status": "error",
+                "path": "llm",
                 "message": str(e),
                 "reasoning_steps": [],
                 "final_recommendation": {
@@ -175,46 +508,288 @@ Begin!
                 }
             }
 
+    def _fast_path_triage(self, incident_data: Dict) -> Optional[Dict]:
+        """
+        Rules-based pre-triage that skips the LLM for clear-cut incidents
+
+        Applies when readings are all within limits for a sensor-driven incident
+        (non-urgent), or when exactly one known violation maps to a standard
+        response. Only LOW/MEDIUM incidents qualify; HIGH/CRITICAL (and unrecognised)
+        urgencies always go to the model, which ModelRouter sends to the large tier.
+        Returns None whenever the rules are not met.
+
+        Args:
+            incident_data: Dict containing incident information
+
+        Returns:
+            Analysis result dict (same shape as the LLM path) or None
+        """
+        incident_type = str(incident_data.get('incident_type', '')).upper()
+        urgency = str(incident_data.get('urgency', 'MEDIUM')).upper()
+        sensor_data = incident_data.get('sensor_data') or {}
+
+        if urgency not in ('LOW', 'MEDIUM') or not sensor_data:
+            return None
+
+        sensor_input = json.dumps(sensor_data)
+        sensor_result = json.loads(self._tool_funcs["analyze_sensor_data"](sensor_input))
+        if 'error' in sensor_result or sensor_result.get('invalid_parameters'):
+            return None
+
+        steps = [{
+            "step": 1,
+            "action": "analyze_sensor_data",
+            "input": sensor_input,
+            "finding": json.dumps(sensor_result),
+            "confidence": 1.0
+        }]
+
+        violations = sensor_result['violations']
+
+        if sensor_result['severity'] == 'NORMAL':
+            if incident_type not in self.FAST_PATH_MONITOR_TYPES:
+                return None
+            recommendation = {
+                "action": "CONTINUE_MONITORING",
+                "urgency": "LOW",
+                "confidence": 0.9,
+                "reasoning": (
+                    f"All {sensor_result['total_parameters_checked']} sensor readings are within "
+                    f"regulatory limits with no parameters approaching a limit."
+                ),
+                "fallback_plan": "Re-run full analysis if any reading moves toward its limit"
+            }
+
+        elif len(violations) == 1 and not sensor_result['warnings']:
+            violation = violations[0]
+            parameter = violation.split(':', 1)[0]
+            direction = "below" if "below min" in violation else "above"
+            rule = self.FAST_PATH_RULES.get((incident_type, parameter, direction))
+            if rule is None:
+                return None
+            action, option_name = rule
+
+            options = json.loads(self._tool_funcs["evaluate_response_options"](incident_type))
+            option = next(
+                (o for o in options['available_options'] if o['option'] == option_name),
+                None
+            )
+            if option is None:
+                return None
+
+            risk_input = json.dumps({"parameter": parameter, "value": sensor_data.get(parameter)})
+            risk = json.loads(self._tool_funcs["assess_regulatory_risk"](risk_input))
+
+            steps.extend([
+                {
+                    "step": 2,
+                    "action": "evaluate_response_options",
+                    "input": incident_type,
+                    "finding": json.dumps(option),
+                    "confidence": option['success_rate']
+                },
+                {
+                    "step": 3,
+                    "action": "assess_regulatory_risk",
+                    "input": risk_input,
+                    "finding": json.dumps(risk),
+                    "confidence": 1.0
+                }
+            ])
+
+            recommendation = {
+                "action": action,
+                "urgency": urgency,
+                "confidence": option['success_rate'],
+                "reasoning": (
+                    f"Single violation ({violation}) with a standard response: {option['option']} "
+                    f"(est. ${option['estimated_cost']:,}, {option['time_to_resolve']}, "
+                    f"{int(option['success_rate'] * 100)}% historical success). "
+                    f"Reporting: {risk.get('reporting_requirement', 'Varies')}."
+                ),
+                "fallback_plan": "Escalate to full multi-step analysis if the violation persists after the standard response"
+            }
+
+        else:
+            return None
+
+        return {
+            "status": "success",
+            "path": "fast",
+            "reasoning_steps": steps,
+            "final_recommendation": recommendation,
+            "slotify_briefing": self._generate_slotify_briefing(steps, recommendation),
+            "raw_analysis": json.dumps(recommendation),
+            "usage": {
+                "iterations": 0,
+                "total_tokens": 0,
+                "prompt_tokens": 0,
+                "completion_tokens": 0,
+                "cost_usd": 0.0,
+                "early_stop": False
+            }
+        }
+
+    def _record_path_latency(self, path: str, started: float) -> None:
+        """Record end-to-end latency for the fast or llm path"""
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self._usage_lock:
+            counters = self._path_latency[path]
+            counters["count"] += 1
+            counters["total_ms"] += elapsed_ms
+            counters["max_ms"] = max(counters["max_ms"], elapsed_ms)
+
+    def _run_tier(
+        self, tier: str, incident_prompt: str, callbacks: Optional[List]
+    ) -> Tuple[Dict, Dict, Optional[Dict]]:
+        """
+        Run the ReAct agent on one model tier
+
+        The final answer (a submit_recommendation call in structured-output mode) is
+        validated against FinalRecommendation; an invalid one is repaired on the same
+        tier (final step only), so its tokens count towards the run.
+
+        Returns:
+            Tuple of (agent result, usage, validated recommendation or None)
+        """
+        executor, llm = (self.fast_agent, self.fast_llm) if tier == SMALL_TIER else (self.agent, self.llm)
+        started = time.perf_counter()
+        with get_openai_callback() as usage_callback:
+            result = executor.invoke(
+                {"incident_data": incident_prompt},
+                config={"callbacks": callbacks} if callbacks else None
+            )
+            final_answer = self.recommendation_validator.finalize(
+                llm,
+                result['output'],
+                incident_prompt,
+                [(action.tool, observation) for action, observation in result.get('intermediate_steps', [])],
+                mode=result.get('final_answer_mode', TEXT_MODE)
+            )
+        latency_ms = (time.perf_counter() - started) * 1000
+        self.router.record_run(tier, latency_ms)
+
+        usage = self._measure_usage(result, usage_callback, incident_prompt, getattr(llm, "model_name", None))
+        usage["tier"] = tier
+        usage["latency_ms"] = round(latency_ms, 2)
+        usage["final_answer"] = final_answer["source"]
+        usage["final_answer_mode"] = final_answer["mode"]
+        if final_answer["errors"]:
+            usage["final_answer_errors"] = final_answer["errors"]
+        return result, usage, final_answer["recommendation"]
+
+    def _measure_usage(self, agent_result: Dict, usage_callback, incident_prompt: str, model: Optional[str]) -> Dict:
+        """ReAct iterations, token usage, cost and budget state of one agent run"""
+        steps = agent_result.get('intermediate_steps', [])
+        early_stop = bool(steps) and steps[-1][0].tool == RECALL_TOOL_NAME and \
+            _strong_precedent_answer(steps[-1][1]) is not None
+        budget_stop = self.prompt_budget.is_exhausted(steps, incident_prompt)
+        step_tokens, summarized = self.prompt_budget.step_report(steps)
+
+        return {
+            "model": model,
+            "iterations": len(steps) + (0 if early_stop or budget_stop else 1),
+            "total_tokens": usage_callback.total_tokens,
+            "prompt_tokens": usage_callback.prompt_tokens,
+            "completion_tokens": usage_callback.completion_tokens,
+            "cost_usd": PromptBudget.cost(model, usage_callback.prompt_tokens, usage_callback.completion_tokens),
+            "early_stop": early_stop,
+            "steps": step_tokens,
+            "budget": {
+                "max_tokens": self.prompt_budget.max_tokens,
+                "incident_tokens": self.prompt_budget.count_tokens(incident_prompt),
+                "estimated_tokens": self.prompt_budget.estimate_spent(steps, incident_prompt),
+                "summarized_observations": summarized,
+                "exhausted": budget_stop
+            }
+        }
+
+    def _record_usage(self, runs: List[Dict]) -> Dict:
+        """
+        Combine the runs of one analysis (one per model tier tried) and add them to the totals
+
+        Returns:
+            Usage of the final run with tokens, cost and iterations summed over all runs
+        """
+        usage = {key: value for key, value in runs[-1].items() if key not in ("tier", "latency_ms")}
+        for key in ("iterations", "total_tokens", "prompt_tokens", "completion_tokens"):
+            usage[key] = sum(run[key] for run in runs)
+        usage["cost_usd"] = round(sum(run["cost_usd"] for run in runs), 6)
+        usage["runs"] = [
+            {
+                key: run[key]
+                for key in (
+                    "tier", "model", "latency_ms", "iterations", "total_tokens", "cost_usd",
+                    "final_answer", "final_answer_mode"
+                )
+            }
+            for run in runs
+        ]
+
+        with self._usage_lock:
+            totals = self._usage_totals
+            totals["analyses"] += 1
+            totals["iterations"] += usage["iterations"]
+            totals["total_tokens"] += usage["total_tokens"]
+            totals["prompt_tokens"] += usage["prompt_tokens"]
+            totals["completion_tokens"] += usage["completion_tokens"]
+            totals["cost_usd"] += usage["cost_usd"]
+            totals["early_stops"] += int(usage["early_stop"])
+            totals["budget_stops"] += int(usage["budget"]["exhausted"])
+
+        return usage
+
+    def get_statistics(self) -> Dict:
+        """
+        Get reasoning usage statistics
+
+        Returns:
+            Dict with average ReAct iterations and tokens per analysis
+        """
+        with self._usage_lock:
+            totals = dict(self._usage_totals)
+            paths = {
+                path: {
+                    "count": counters["count"],
+                    "avg_latency_ms": round(counters["total_ms"] / counters["count"], 2) if counters["count"] else 0,
+                    "max_latency_ms": round(counters["max_ms"], 2)
+                }
+                for path, counters in self._path_latency.items()
+            }
+
+        analyses = totals["analyses"]
+        return {
+            "analyses": analyses,
+            "average_iterations": round(totals["iterations"] / analyses, 2) if analyses else 0,
+            "average_total_tokens": round(totals["total_tokens"] / analyses, 1) if analyses else 0,
+            "average_prompt_tokens": round(totals["prompt_tokens"] / analyses, 1) if analyses else 0,
+            "average_completion_tokens": round(totals["completion_tokens"] / analyses, 1) if analyses else 0,
+            "total_cost_usd": round(totals["cost_usd"], 4),
+            "average_cost_usd": round(totals["cost_usd"] / analyses, 4) if analyses else 0,
+            "early_stops": totals["early_stops"],
+            "budget_stops": totals["budget_stops"],
+            "token_budget": self.prompt_budget.max_tokens,
+            "memory_tool_enabled": self.memory_agent is not None,
+            "paths": paths,
+            "routing": self.router.get_statistics(),
+            "structured_output": self.recommendation_validator.get_statistics(),
+            "chainsync_api": self.chainsync_data.get_statistics() if self.chainsync_data else None
+        }
+
     # Tool implementations
     def analyze_sensor_data(self, sensor_data_json: str) -> str:
         """Tool: Analyze sensor readings against regulatory limits"""
         try:
             data = json.loads(sensor_data_json)
-            violations = []
-            warnings = []
-
-            # EPA limits for common parameters
-            limits = {
-                'ecoli': {'max': 0, 'unit': 'CFU/100mL', 'regulation': 'EPA SDWA'},
-                'ph': {'min': 6.5, 'max': 8.5, 'regulation': 'EPA SDWA'},
-                'turbidity': {'max': 1.0, 'unit': 'NTU', 'regulation': 'EPA SDWA'},
-                'chlorine': {'min': 0.5, 'max': 4.0, 'unit': 'ppm', 'regulation': 'EPA SDWA'},
-                'pm25': {'max': 35.0, 'unit': 'µg/m³', 'regulation': 'EPA NAAQS'},
-                'pm10': {'max': 150.0, 'unit': 'µg/m³', 'regulation': 'EPA NAAQS'},
-            }
+            if not isinstance(data, dict):
+                raise ValueError("sensor data must be a JSON object of parameter: value")
+            jurisdiction = data.pop('jurisdiction', None)
 
-            for param, value in data.items():
-                if param in limits:
-                    limit = limits[param]
-
-                    # Check violations
-                    if 'max' in limit and value > limit['max']:
-                        violations.append(f"{param}: {value} exceeds max {limit['max']} ({limit['regulation']})")
-                    elif 'min' in limit and value < limit['min']:
-                        violations.append(f"{param}: {value} below min {limit['min']} ({limit['regulation']})")
-
-                    # Check warnings (approaching limit)
-                    if 'max' in limit:
-                        percentage = (value / limit['max']) * 100
-                        if percentage > 90 and value <= limit['max']:
-                            warnings.append(f"{param} at {percentage:.0f}% of limit ({value}/{limit['max']})")
-
-            result = {
-                "violations": violations,
-                "warnings": warnings,
-                "severity": "CRITICAL" if violations else ("WARNING" if warnings else "NORMAL"),
-                "total_parameters_checked": len(data)
-            }
+            # One snapshot per evaluation, so a concurrent reload cannot mix rule versions
+            rules = self.rule_store.current
+            result = rules.engine(jurisdiction).evaluate(data)
+            result["jurisdiction"] = rules.jurisdiction(jurisdiction)
+            result["rule_set_version"] = rules.version
 
             return json.dumps(result)
 
@@ -222,37 +797,37 @@ Begin!
             return json.dumps({"error": str(e)})
 
     def calculate_population_impact(self, facility_id: str) -> str:
-        """Tool: Calculate affected population"""
-        # Mock implementation - in production would query GIS/customer database
-        population_data = {
-            "Atlanta_WTP": {
-                "total_customers": 125000,
-                "schools": 23,
-                "hospitals": 2,
-                "nursing_homes": 5,
-                "vulnerable_population_percentage": 15
-            },
-            "Decatur_Plant": {
-                "total_customers": 45000,
-                "schools": 8,
-                "hospitals": 1,
-                "nursing_homes": 2,
-                "vulnerable_population_percentage": 12
-            }
-        }
-
-        data = population_data.get(facility_id, {
-            "total_customers": 50000,
-            "schools": 10,
-            "hospitals": 1,
-            "nursing_homes": 3,
-            "vulnerable_population_percentage": 12
-        })
+        """Tool: Calculate affected population for a facility service zone or a plume radius"""
+        try:
+            facility_id = str(facility_id).strip()
+            if facility_id.startswith("{"):
+                # Plume query, named like the platform API's GeoFilterTrait
+                area = json.loads(facility_id)
+                return json.dumps(self.population_index.radius_impact(
+                    float(area["latitude"]),
+                    float(area["longitude"]),
+                    float(area.get("radiusKm", area.get("radius_km", 5)))
+                ))
+
+            facility_id = facility_id.strip('"\'')
+            data = self.population_index.facility_impact(facility_id)
+            if data is None:
+                # No service zone on file: regional average estimate
+                data = {
+                    "facility_id": facility_id,
+                    "total_customers": 50000,
+                    "schools": 10,
+                    "hospitals": 1,
+                    "nursing_homes": 3,
+                    "vulnerable_population_percentage": 12,
+                    "vulnerable_population": 6000,
+                    "source": "default_estimate"
+                }
 
-        data["facility_id"] = facility_id
-        data["vulnerable_population"] = int(data["total_customers"] * data["vulnerable_population_percentage"] / 100)
+            return json.dumps(data)
 
-        return json.dumps(data)
+        except Exception as e:
+            return json.dumps({"error": str(e)})
 
     def evaluate_response_options(self, incident_type: str) -> str:
         """Tool: Evaluate different response strategies"""
@@ -346,35 +921,10 @@ Begin!
             parameter = data.get('parameter')
             value = data.get('value')
 
-            # Regulatory fines and requirements
-            regulatory_info = {
-                "ecoli": {
-                    "regulation": "EPA Safe Drinking Water Act",
-                    "violation_fine": 37500,  # per day
-                    "reporting_requirement": "Immediate (within 24 hours)",
-                    "public_notification": "Required within 24 hours"
-                },
-                "ph": {
-                    "regulation": "EPA SDWA",
-                    "violation_fine": 25000,
-                    "reporting_requirement": "Next quarterly report",
-                    "public_notification": "Required if health risk"
-                },
-                "pm25": {
-                    "regulation": "EPA NAAQS (Clean Air Act)",
-                    "violation_fine": 37500,
-                    "reporting_requirement": "Immediate",
-                    "public_notification": "Air quality alert required"
-                }
-            }
-
-            info = regulatory_info.get(parameter, {
-                "regulation": "Various EPA/State regulations",
-                "violation_fine": 25000,
-                "reporting_requirement": "Varies",
-                "public_notification": "May be required"
-            })
-
+            rules = self.rule_store.current
+            info = rules.fine_info(parameter, data.get('jurisdiction'))
+            info["jurisdiction"] = rules.jurisdiction(data.get('jurisdiction'))
+            info["rule_set_version"] = rules.version
             info["parameter"] = parameter
             info["current_value"] = value
             info["risk_level"] = "HIGH" if value else "MEDIUM"
@@ -384,6 +934,216 @@ Begin!
         except Exception as e:
             return json.dumps({"error": str(e)})
 
+    def detect_sensor_trends(self, station_id: str) -> str:
+        """Tool: Rolling statistics and trend flags for a station's sensor series"""
+        try:
+            station_id = str(station_id).strip().strip('"\'')
+            trends = self.anomaly_detector.get_station_trends(station_id)
+            if not trends:
+                return json.dumps({"station_id": station_id, "error": "No streaming readings for this station"})
+
+            return json.dumps({
+                "station_id": station_id,
+                "flagged": [t["parameter"] for t in trends if t["flags"]],
+                "parameters": {
+                    t["parameter"]: {
+                        "value": t["last_value"],
+                        "ewma": t["ewma"],
+                        "z_score": t["z_score"],
+                        "rate_per_hour": t["rate_of_change_per_hour"],
+                        "flags": t["flags"]
+                    }
+                    for t in trends
+                }
+            })
+
+        except Exception as e:
+            return json.dumps({"error": str(e)})
+
+    def get_facility_status(self, facility_id: str) -> str:
+        """Tool: Live facility monitoring data from the platform API"""
+        try:
+            facility_id = str(facility_id).strip().strip('"\'')
+            facility = self.chainsync_data.get_facility(facility_id)
+            parameters = facility.get("environmentalParameters") or {}
+            status = facility.get("operationalStatus") or {}
+
+            return json.dumps({
+                "facility_id": facility.get("facilityId", facility_id),
+                "facility_name": facility.get("facilityName"),
+                "facility_type": facility.get("facilityType"),
+                "water_quality": parameters.get("waterQuality"),
+                "air_emissions": (parameters.get("airQuality") or {}).get("emissions"),
+                "operation_mode": status.get("operationMode"),
+                "equipment_status": status.get("equipmentStatus"),
+                "processing_efficiency": status.get("processingEfficiency"),
+                "backup_systems": status.get("backupSystems"),
+                "compliance": facility.get("complianceStatus"),
+                "risk": facility.get("riskAssessment"),
+                "timestamp": facility.get("timestamp")
+            })
+
+        except Exception as e:
+            return json.dumps({"error": str(e)})
+
+    def get_station_data(self, station_id: str) -> str:
+        """Tool: Current air quality and weather at a monitoring station from the platform API"""
+        try:
+            station_id = str(station_id).strip().strip('"\'')
+            station = self.chainsync_data.get_station_data(station_id)
+
+            return json.dumps({
+                "station_id": station.get("stationId", station_id),
+                "location": station.get("location"),
+                "air_quality": station.get("airQuality"),
+                "weather": station.get("weather"),
+                "risk": station.get("riskAssessment"),
+                "timestamp": station.get("timestamp")
+            })
+
+        except Exception as e:
+            return json.dumps({"error": str(e)})
+
+    def find_service_vehicles(self, query: str) -> str:
+        """Tool: Available emergency-capable service vehicles from the platform API"""
+        try:
+            text = str(query).strip().strip('"\'')
+            try:
+                filters = json.loads(text)
+            except ValueError:
+                filters = {"vehicleType": text} if text else {}
+            if not isinstance(filters, dict):
+                filters = {}
+
+            vehicles = self.chainsync_data.list_vehicles(
+                vehicle_type=filters.get("vehicleType") or None,
+                availability_status=filters.get("availabilityStatus", "AVAILABLE"),
+                emergency_capable=True,
+                latitude=filters.get("latitude"),
+                longitude=filters.get("longitude"),
+                radius_km=filters.get("radiusKm")
+            )
+
+            return json.dumps({
+                "vehicles_found": len(vehicles),
+                "vehicles": [
+                    {
+                        "vehicle_id": vehicle.get("vehicleId"),
+                        "vehicle_type": vehicle.get("vehicleType"),
+                        "service_area": vehicle.get("serviceArea"),
+                        "coordinates": vehicle.get("coordinates"),
+                        "load_type": (vehicle.get("vehicleCapacity") or {}).get("loadType"),
+                        "availability": (vehicle.get("emergencyCapability") or {}).get("availabilityStatus"),
+                        "response_time": (vehicle.get("emergencyCapability") or {}).get("responseTime"),
+                        "response_types": (vehicle.get("emergencyCapability") or {}).get("responseType")
+                    }
+                    for vehicle in vehicles[:self.VEHICLE_RESULTS_MAX]
+                ]
+            })
+
+        except Exception as e:
+            return json.dumps({"error": str(e)})
+
+    def recall_similar_incidents(self, incident_json: str) -> str:
+        """Tool: Compact summary of similar historical incidents from memory"""
+        try:
+            try:
+                incident = json.loads(incident_json)
+            except (TypeError, ValueError):
+                incident = {"context": str(incident_json)}
+            if not isinstance(incident, dict):
+                incident = {"context": str(incident)}
+
+            # Same-type precedents first; the model's type label may not match stored types exactly
+            incident_type = incident.get("incident_type") or incident.get("type")
+            recall = self.memory_agent.recall_similar_incidents(
+                incident, top_k=3, filters={"incident_type": incident_type} if incident_type else None
+            )
+            if incident_type and recall.get("status") == "success" and not recall["similar_incidents"]:
+                recall = self.memory_agent.recall_similar_incidents(incident, top_k=3)
+            if recall.get("status") == "error":
+                return json.dumps({"error": recall.get("message", "recall failed")})
+
+            precedents = [
+                {
+                    "id": item.get("incident_id"),
+                    "type": item.get("incident_type"),
+                    "facility": item.get("facility_id"),
+                    "similarity": item.get("similarity_score"),
+                    "outcome": item.get("outcome"),
+                    "resolution_time": item.get("resolution_time"),
+                    "cost": item.get("cost"),
+                    "actions": self._extract_precedent_actions(item.get("details", ""))[:120]
+                }
+                for item in recall.get("similar_incidents", [])
+            ]
+            patterns = recall.get("patterns", {})
+
+            summary = {
+                "precedents": precedents,
+                "success_rate": patterns.get("success_rate", 0),
+                "average_resolution_time": patterns.get("average_resolution_time", "N/A"),
+                "strong_precedent": False
+            }
+
+            # All past incidents of this type (at this facility when there are any), not just the top hits
+            baseline = recall.get("baseline") or {}
+            population = next(
+                (scope for scope in (baseline.get("type_at_facility"), baseline.get("type_overall"))
+                 if scope and scope["count"]),
+                None
+            )
+            if population:
+                summary["baseline"] = {
+                    "incidents": population["count"],
+                    "success_rate": population["success_rate"],
+                    "average_resolution_hours": population["average_resolution_hours"]
+                }
+
+            best = precedents[0] if precedents else None
+            best_actions = [a.strip() for a in best["actions"].split(",") if a.strip()] if best else []
+            # The first recorded response step, normalised to an UPPER_SNAKE_CASE action code
+            action_code = re.sub(r"[^A-Z0-9]+", "_", best_actions[0].upper()).strip("_") if best_actions else ""
+            if (
+                best
+                and self.precedent_similarity_threshold is not None
+                and best["outcome"] == "SUCCESS"
+                and (best["similarity"] or 0) >= self.precedent_similarity_threshold
+                and action_code
+            ):
+                summary["strong_precedent"] = True
+                # Urgency is set by the executor from the incident itself
+                summary["final_answer"] = {
+                    "action": action_code,
+                    "confidence": round(min(0.95, best["similarity"]), 2),
+                    "reasoning": (
+                        f"Near-identical precedent {best['id']} (similarity {best['similarity']:.0%}) "
+                        f"resolved successfully in {best['resolution_time']} with: {best['actions']}"
+                    ),
+                    "fallback_plan": "Run full multi-step analysis and escalate if the precedent action does not resolve the incident",
+                    "precedent_incident_id": best["id"],
+                    "precedent_actions": best_actions
+                }
+
+            # Stay within the observation budget by dropping the least similar precedents
+            result = json.dumps(summary)
+            while len(result) > self.RECALL_SUMMARY_MAX_CHARS and len(summary["precedents"]) > 1:
+                summary["precedents"].pop()
+                result = json.dumps(summary)
+
+            return result
+
+        except Exception as e:
+            return json.dumps({"error": str(e)})
+
+    @staticmethod
+    def _extract_precedent_actions(incident_text: str) -> str:
+        """Pull the 'Actions: ...' segment out of a stored incident text"""
+        for part in incident_text.split(" | "):
+            if part.startswith("Actions: "):
+                return part[len("Actions: "):]
+        return ""
+
     def _extract_reasoning_steps(self, agent_result: Dict) -> List[Dict]:
         """Parse agent's thought process into structured steps"""
 
@@ -411,19 +1171,24 @@ Begin!
 
         return steps
 
+    @staticmethod
+    def _extract_json_object(output: str) -> Optional[Dict]:
+        """JSON object between the first '{' and the last '}' of the output, or None (legacy text answers)"""
+        if '{' not in output or '}' not in output:
+            return None
+        try:
+            parsed = json.loads(output[output.index('{'):output.rindex('}') + 1])
+        except ValueError:
+            return None
+        return parsed if isinstance(parsed, dict) else None
+
     def _parse_recommendation(self, output: str) -> Dict:
         """Extract structured recommendation from agent output"""
 
-        try:
-            # Try to parse JSON from output
-            if '{' in output and '}' in output:
-                json_start = output.index('{')
-                json_end = output.rindex('}') + 1
-                json_str = output[json_start:json_end]
-                recommendation = json.loads(json_str)
-                return recommendation
-        except:
-            pass
+        # Try to parse JSON from output
+        recommendation = self._extract_json_object(output)
+        if recommendation is not None:
+            return recommendation
 
         # Fallback: extract key information from text
         recommendation = {
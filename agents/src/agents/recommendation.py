@@ -0,0 +1,263 @@
+"""
+Structured Recommendation Output for ChainSync
+Final answers as a submit_recommendation function call, schema validation and a function-calling repair step
+"""
+
+from typing import Dict, List, Literal, Optional, Tuple, Union
+import json
+import logging
+import threading
+
+from langchain.agents.output_parsers import ReActSingleInputOutputParser
+from langchain.output_parsers.openai_functions import JsonOutputFunctionsParser
+from langchain.prompts import PromptTemplate
+from langchain.schema import AgentAction, AgentFinish
+from langchain_core.outputs import Generation
+from pydantic import BaseModel, ConfigDict, Field, ValidationError, field_validator
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class FinalRecommendation(BaseModel):
+    """Final recommendation of an incident analysis"""
+
+    model_config = ConfigDict(extra="allow")
+
+    action: str = Field(..., min_length=1, description="Action code in UPPER_SNAKE_CASE, e.g. CHLORINE_BOOST")
+    urgency: Literal["LOW", "MEDIUM", "HIGH", "CRITICAL"] = Field(..., description="Response urgency")
+    confidence: float = Field(..., ge=0, le=1, description="Confidence in the action, 0-1, based on evidence strength")
+    reasoning: str = Field(..., min_length=1, description="Why this action, citing the numbers found")
+    fallback_plan: str = Field(..., min_length=1, description="What to do if the action does not resolve the incident")
+
+    @field_validator("action", mode="before")
+    @classmethod
+    def _normalize_action(cls, value):
+        return str(value).strip().upper().replace(" ", "_").replace("-", "_") if value is not None else value
+
+    @field_validator("urgency", mode="before")
+    @classmethod
+    def _normalize_urgency(cls, value):
+        return str(value).strip().upper() if value is not None else value
+
+
+RECOMMENDATION_FUNCTION = {
+    "name": "submit_recommendation",
+    "description": "Submit the final recommendation for the incident",
+    "parameters": {
+        key: value
+        for key, value in FinalRecommendation.model_json_schema().items()
+        if key in ("type", "properties", "required")
+    }
+}
+
+# How a final answer was produced: arguments of a submit_recommendation call, legacy
+# "Final Answer: {...}" text, or written by the executor itself (precedent/budget stop)
+FUNCTION_CALL_MODE = "function_call"
+TEXT_MODE = "text"
+INTERNAL_MODE = "internal"
+FINAL_ANSWER_MODES = (FUNCTION_CALL_MODE, TEXT_MODE, INTERNAL_MODE)
+
+
+class StructuredReActOutputParser(ReActSingleInputOutputParser):
+    """
+    ReAct parser whose final step is a submit_recommendation function call
+
+    Tool steps are still parsed from the Thought/Action text. A function call ends the
+    run with the call's raw arguments as output and "final_answer_mode" set, so the
+    validator reads them as JSON instead of slicing free text. A text "Final Answer"
+    (a model ignoring the function) still parses the legacy way.
+    """
+
+    def parse_result(self, result: List[Generation], *, partial: bool = False) -> Union[AgentAction, AgentFinish]:
+        message = getattr(result[0], "message", None)
+        function_call = (message.additional_kwargs.get("function_call") if message is not None else None) or {}
+        if function_call.get("name") == RECOMMENDATION_FUNCTION["name"]:
+            return AgentFinish(
+                {"output": function_call.get("arguments") or "", "final_answer_mode": FUNCTION_CALL_MODE},
+                result[0].text or f"Called {RECOMMENDATION_FUNCTION['name']}"
+            )
+        return super().parse_result(result, partial=partial)
+
+    @property
+    def _type(self) -> str:
+        return "structured-react-single-input"
+
+
+REPAIR_PROMPT = PromptTemplate.from_template("""You are finishing an environmental incident analysis. The analysis steps are done,
+but the draft final answer does not match the required format.
+
+Incident data:
+{incident_data}
+
+Findings from the analysis steps:
+{findings}
+
+Draft final answer:
+{draft}
+
+Problems with the draft:
+{errors}
+
+Call submit_recommendation with the final recommendation, keeping the draft's decision
+where it is supported by the findings.""")
+
+
+class RecommendationValidator:
+    """
+    Validates final answers against FinalRecommendation and repairs invalid ones
+
+    Function-call answers are validated from their JSON arguments; text answers (the
+    legacy mode) from the span between the first '{' and the last '}'. A repair is a
+    single function-calling request that re-does only the final step (from the
+    findings already collected), never the tool-using chain. Counts of first-pass
+    successes, repairs and failures are kept per answer mode for the stats endpoint.
+    """
+
+    # Characters of each tool observation passed to the repair request
+    FINDING_MAX_CHARS = 400
+
+    def __init__(self, repair_enabled: bool = True, function_calling: bool = True):
+        """
+        Initialize the validator
+
+        Args:
+            repair_enabled: Make a function-calling repair request for invalid answers
+            function_calling: Final answers are requested as a submit_recommendation call
+                (reported in the statistics)
+        """
+        self.repair_enabled = repair_enabled
+        self.function_calling = function_calling
+
+        self._lock = threading.Lock()
+        self._counts = {
+            mode: {"validated": 0, "first_pass": 0, "repaired": 0, "failed": 0}
+            for mode in FINAL_ANSWER_MODES
+        }
+
+    @classmethod
+    def validate(cls, output: str) -> Tuple[Optional[Dict], Optional[str]]:
+        """
+        Validate the JSON object in a free-text final answer (legacy text mode)
+
+        Returns:
+            Tuple of (validated recommendation dict or None, error description or None)
+        """
+        if '{' not in output or '}' not in output:
+            return None, "no JSON object in the final answer"
+        return cls.validate_arguments(output[output.index('{'):output.rindex('}') + 1])
+
+    @staticmethod
+    def validate_arguments(arguments: str) -> Tuple[Optional[Dict], Optional[str]]:
+        """
+        Validate submit_recommendation arguments (a JSON object, parsed as a whole)
+
+        Returns:
+            Tuple of (validated recommendation dict or None, error description or None)
+        """
+        try:
+            parsed = json.loads(arguments)
+            if not isinstance(parsed, dict):
+                return None, "final answer is not a JSON object"
+            return FinalRecommendation.model_validate(parsed).model_dump(), None
+        except ValueError as e:
+            # json.JSONDecodeError and pydantic.ValidationError are both ValueErrors
+            if isinstance(e, ValidationError):
+                problems = "; ".join(
+                    f"{'.'.join(str(part) for part in error['loc']) or 'answer'}: {error['msg']}"
+                    for error in e.errors()
+                )
+                return None, problems
+            return None, f"invalid JSON: {str(e)}"
+
+    def finalize(
+        self,
+        llm,
+        output: str,
+        incident_data: str,
+        findings: List[Tuple[str, str]],
+        mode: str = TEXT_MODE
+    ) -> Dict:
+        """
+        Validate a final answer, repairing it once if needed
+
+        Args:
+            llm: Chat model of the tier that produced the answer (used for the repair)
+            output: Final answer of the ReAct run (function arguments in function_call mode)
+            incident_data: Incident JSON given to the agent
+            findings: (tool, observation) pairs from the run
+            mode: How the answer was produced (function_call, text or internal)
+
+        Returns:
+            Dict with "recommendation" (validated dict or None), "source"
+            ("first_pass", "repaired" or "failed"), "mode" and "errors"
+        """
+        mode = mode if mode in FINAL_ANSWER_MODES else TEXT_MODE
+        if mode == FUNCTION_CALL_MODE:
+            recommendation, error = self.validate_arguments(output)
+        else:
+            recommendation, error = self.validate(output)
+        if recommendation is not None:
+            self._count(mode, "first_pass")
+            return {"recommendation": recommendation, "source": "first_pass", "mode": mode, "errors": None}
+
+        repaired = self._repair(llm, output, error, incident_data, findings) if self.repair_enabled else None
+        if repaired is not None:
+            self._count(mode, "repaired")
+            return {"recommendation": repaired, "source": "repaired", "mode": mode, "errors": error}
+
+        self._count(mode, "failed")
+        return {"recommendation": None, "source": "failed", "mode": mode, "errors": error}
+
+    def _repair(
+        self, llm, draft: str, errors: str, incident_data: str, findings: List[Tuple[str, str]]
+    ) -> Optional[Dict]:
+        chain = (
+            REPAIR_PROMPT
+            | llm.bind(functions=[RECOMMENDATION_FUNCTION], function_call={"name": RECOMMENDATION_FUNCTION["name"]})
+            | JsonOutputFunctionsParser()
+        )
+        try:
+            arguments = chain.invoke({
+                "incident_data": incident_data,
+                "findings": "\n".join(
+                    f"- {tool}: {str(observation)[:self.FINDING_MAX_CHARS]}" for tool, observation in findings
+                ) or "(none)",
+                "draft": draft[:2000],
+                "errors": errors
+            })
+            return FinalRecommendation.model_validate(arguments).model_dump()
+        except Exception as e:
+            logger.warning(f"Final answer repair failed: {str(e)}")
+            return None
+
+    def _count(self, mode: str, outcome: str) -> None:
+        with self._lock:
+            self._counts[mode]["validated"] += 1
+            self._counts[mode][outcome] += 1
+
+    @staticmethod
+    def _rates(counts: Dict[str, int]) -> Dict:
+        validated = counts["validated"]
+        return {
+            **counts,
+            "first_pass_parse_rate": round(counts["first_pass"] / validated, 3) if validated else 0,
+            "valid_after_repair_rate": round(
+                (counts["first_pass"] + counts["repaired"]) / validated, 3
+            ) if validated else 0
+        }
+
+    def get_statistics(self) -> Dict:
+        """First-pass parse rate and repair outcomes, overall and per answer mode"""
+        with self._lock:
+            by_mode = {mode: dict(counts) for mode, counts in self._counts.items()}
+        totals = {
+            outcome: sum(counts[outcome] for counts in by_mode.values())
+            for outcome in ("validated", "first_pass", "repaired", "failed")
+        }
+        return {
+            **self._rates(totals),
+            "repair_enabled": self.repair_enabled,
+            "final_answer_mode": FUNCTION_CALL_MODE if self.function_calling else TEXT_MODE,
+            "by_mode": {mode: self._rates(counts) for mode, counts in by_mode.items()}
+        }
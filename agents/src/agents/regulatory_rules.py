@@ -0,0 +1,170 @@
+"""
+Regulatory Rule Store for ChainSync
+Loads versioned limit and fine tables from a data file, compiles them once and hot-reloads on change
+"""
+
+from datetime import datetime
+from typing import Dict, List, Optional
+import copy
+import json
+import logging
+import os
+import threading
+
+from .compliance_engine import SensorComplianceEngine
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(__file__), "reference_data", "regulatory_rules.json")
+
+
+class RuleSet:
+    """
+    Immutable compiled snapshot of one rule-set version
+
+    Limits are compiled into a SensorComplianceEngine per jurisdiction and fines are
+    indexed by (jurisdiction, parameter). A jurisdiction may declare "inherits" to
+    start from another jurisdiction's limits and fines and override only what differs.
+    """
+
+    def __init__(self, rules: Dict, source: str):
+        """
+        Compile a parsed rules document
+
+        Args:
+            rules: Parsed rules document (version, default_jurisdiction, jurisdictions)
+            source: Where the rules came from (for diagnostics)
+        """
+        self.version = str(rules["version"])
+        self.source = source
+        self.loaded_at = datetime.utcnow().isoformat()
+        self.default_jurisdiction = rules["default_jurisdiction"]
+
+        resolved = {name: self._resolve(name, rules["jurisdictions"]) for name in rules["jurisdictions"]}
+        if self.default_jurisdiction not in resolved:
+            raise ValueError(f"default_jurisdiction '{self.default_jurisdiction}' is not defined")
+
+        self._engines = {name: SensorComplianceEngine(spec["limits"]) for name, spec in resolved.items()}
+        self._fines = {
+            (name, parameter): info
+            for name, spec in resolved.items()
+            for parameter, info in spec.get("fines", {}).items()
+        }
+        self._default_fines = {name: spec.get("default_fine", {}) for name, spec in resolved.items()}
+
+    @staticmethod
+    def _resolve(name: str, jurisdictions: Dict, seen: Optional[List[str]] = None) -> Dict:
+        """Merge a jurisdiction over the one it inherits from"""
+        seen = (seen or []) + [name]
+        spec = jurisdictions[name]
+        parent_name = spec.get("inherits")
+        if not parent_name:
+            return spec
+        if parent_name in seen:
+            raise ValueError(f"Circular jurisdiction inheritance: {' -> '.join(seen + [parent_name])}")
+
+        parent = RuleSet._resolve(parent_name, jurisdictions, seen)
+        return {
+            "limits": {**parent.get("limits", {}), **spec.get("limits", {})},
+            "fines": {**parent.get("fines", {}), **spec.get("fines", {})},
+            "default_fine": spec.get("default_fine", parent.get("default_fine", {}))
+        }
+
+    @property
+    def jurisdictions(self) -> List[str]:
+        return list(self._engines)
+
+    def jurisdiction(self, name: Optional[str]) -> str:
+        """Resolve a requested jurisdiction, falling back to the default"""
+        return name if name in self._engines else self.default_jurisdiction
+
+    def engine(self, jurisdiction: Optional[str] = None) -> SensorComplianceEngine:
+        """Compiled limit engine for a jurisdiction"""
+        return self._engines[self.jurisdiction(jurisdiction)]
+
+    def fine_info(self, parameter: str, jurisdiction: Optional[str] = None) -> Dict:
+        """Fine and reporting requirements for a parameter (copy; safe to mutate)"""
+        name = self.jurisdiction(jurisdiction)
+        return copy.deepcopy(self._fines.get((name, parameter), self._default_fines[name]))
+
+
+class RegulatoryRuleStore:
+    """
+    Holds the current RuleSet and swaps in a new one when the data file changes
+
+    Readers take `store.current` once per evaluation and keep using that snapshot, so a
+    reload never blocks or changes in-flight requests. A file that fails to parse or
+    compile is logged and ignored; the previous version stays active.
+    """
+
+    def __init__(self, path: str = DEFAULT_RULES_PATH, reload_interval: float = 0):
+        """
+        Load the rules file
+
+        Args:
+            path: JSON rules file
+            reload_interval: Seconds between file change checks (0 disables hot reload)
+        """
+        self.path = path
+        self.reload_interval = reload_interval
+        self._mtime = os.path.getmtime(path)
+        self._current = self._load()
+        self._stop = threading.Event()
+
+        logger.info(f"Loaded regulatory rules version {self._current.version} from {path}")
+
+        if reload_interval > 0:
+            threading.Thread(target=self._watch, name="regulatory-rules-watcher", daemon=True).start()
+
+    @property
+    def current(self) -> RuleSet:
+        return self._current
+
+    def reload(self) -> bool:
+        """
+        Reload the file now
+
+        Returns:
+            True if a new rule set was activated
+        """
+        try:
+            # Record the mtime even on failure so a broken file is reported once, not every poll
+            self._mtime = os.path.getmtime(self.path)
+            rule_set = self._load()
+        except Exception as e:
+            logger.error(f"Keeping regulatory rules version {self._current.version}; reload failed: {str(e)}")
+            return False
+
+        previous = self._current.version
+        self._current = rule_set
+        logger.info(f"Regulatory rules reloaded: {previous} -> {rule_set.version}")
+        return True
+
+    def get_statistics(self) -> Dict:
+        rule_set = self._current
+        return {
+            "version": rule_set.version,
+            "source": rule_set.source,
+            "loaded_at": rule_set.loaded_at,
+            "default_jurisdiction": rule_set.default_jurisdiction,
+            "jurisdictions": rule_set.jurisdictions,
+            "hot_reload_interval_seconds": self.reload_interval
+        }
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _load(self) -> RuleSet:
+        with open(self.path, encoding="utf-8") as f:
+            return RuleSet(json.load(f), source=self.path)
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.reload_interval):
+            try:
+                changed = os.path.getmtime(self.path) != self._mtime
+            except OSError as e:
+                logger.warning(f"Cannot stat regulatory rules file {self.path}: {str(e)}")
+                continue
+            if changed:
+                self.reload()
@@ -0,0 +1,101 @@
+"""
+Analysis Result Cache for ChainSync
+TTL/LRU cache with in-flight coalescing in front of the reasoning agent
+"""
+
+from typing import Callable, Dict, Optional, Tuple
+import hashlib
+import json
+import logging
+
+from .coalescing_cache import CoalescingCache
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class AnalysisResultCache:
+    """
+    Caches analysis results keyed by a canonical hash of the request
+
+    Concurrent identical requests share one execution: the first caller computes,
+    the others wait on the same future (see CoalescingCache). Error results are never
+    cached, and neither is a result whose computation overlapped an invalidate() call.
+    """
+
+    def __init__(self, ttl_seconds: float = 300, max_entries: int = 500):
+        """
+        Initialize the cache
+
+        Args:
+            ttl_seconds: Lifetime of a cached result (<= 0 disables storing; coalescing still applies)
+            max_entries: Maximum cached results before LRU eviction
+        """
+        self._cache = CoalescingCache(ttl_seconds, max_entries)
+
+    @property
+    def ttl_seconds(self) -> float:
+        return self._cache.ttl_seconds
+
+    @ttl_seconds.setter
+    def ttl_seconds(self, value: float) -> None:
+        self._cache.ttl_seconds = value
+
+    @property
+    def max_entries(self) -> int:
+        return self._cache.max_entries
+
+    @staticmethod
+    def make_key(request_data: Dict) -> str:
+        """Canonical SHA-256 of the request (key order and whitespace insensitive)"""
+        canonical = json.dumps(request_data, sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def get_or_compute(self, request_data: Dict, compute: Callable[[], Dict]) -> Tuple[Dict, str]:
+        """
+        Return a cached result or compute it once for all concurrent callers
+
+        Args:
+            request_data: Request payload (hashed for the key; incident_id/facility_id indexed)
+            compute: Callable producing the analysis result
+
+        Returns:
+            Tuple of (result copy, cache status: "hit", "miss" or "coalesced")
+        """
+        return self._cache.get_or_compute(
+            self.make_key(request_data),
+            compute,
+            should_store=lambda result: result.get("status") != "error",
+            tags={"incident_id": request_data.get("incident_id"), "facility_id": request_data.get("facility_id")}
+        )
+
+    def invalidate(self, incident_id: Optional[str] = None, facility_id: Optional[str] = None) -> int:
+        """
+        Drop cached results matching incident_id and/or facility_id (both None clears all)
+
+        Returns:
+            Number of entries removed
+        """
+        removed = self._cache.invalidate(
+            lambda tags: (incident_id is None or tags["incident_id"] == incident_id)
+            and (facility_id is None or tags["facility_id"] == facility_id)
+        )
+
+        logger.info(f"Invalidated {removed} cached analyses (incident={incident_id}, facility={facility_id})")
+        return removed
+
+    def get_statistics(self) -> Dict:
+        """Hit/miss/coalescing counters"""
+        stats = self._cache.get_statistics()
+        lookups = stats["hits"] + stats["misses"] + stats["coalesced"]
+        return {
+            "entries": stats["entries"],
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "in_flight": stats["in_flight"],
+            "hits": stats["hits"],
+            "misses": stats["misses"],
+            "coalesced": stats["coalesced"],
+            "invalidated": stats["invalidated"],
+            "hit_rate": round((stats["hits"] + stats["coalesced"]) / lookups, 3) if lookups else 0
+        }
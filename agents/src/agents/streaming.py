@@ -0,0 +1,65 @@
+"""
+Reasoning Event Streaming for ChainSync
+Turns ReAct agent callbacks into events that can be pushed to clients as they happen
+"""
+
+from langchain.callbacks.base import BaseCallbackHandler
+from langchain.schema import AgentAction, AgentFinish
+from typing import Any, Callable, Dict, Optional
+import json
+
+
+class ReasoningEventHandler(BaseCallbackHandler):
+    """
+    LangChain callback handler emitting Thought/Action/Observation events
+
+    The handler runs on the executor thread; `emit` must be thread-safe
+    (e.g. loop.call_soon_threadsafe onto an asyncio.Queue).
+    """
+
+    def __init__(self, emit: Callable[[str, Dict], None]):
+        """
+        Initialize the handler
+
+        Args:
+            emit: Callable receiving (event_name, payload) for each reasoning event
+        """
+        self.emit = emit
+        self.step = 0
+        self._current_tool: Optional[str] = None
+
+    def on_agent_action(self, action: AgentAction, **kwargs: Any) -> Any:
+        self.step += 1
+        self._current_tool = action.tool
+
+        thought = action.log.split("Action:", 1)[0].replace("Thought:", "", 1).strip()
+        if thought:
+            self.emit("thought", {"step": self.step, "thought": thought})
+        self.emit("action", {"step": self.step, "tool": action.tool, "tool_input": action.tool_input})
+
+    def on_tool_end(self, output: str, **kwargs: Any) -> Any:
+        self.emit("observation", {
+            "step": self.step,
+            "tool": kwargs.get("name") or self._current_tool,
+            "observation": output
+        })
+
+    def on_tool_error(self, error: BaseException, **kwargs: Any) -> Any:
+        self.emit("observation", {
+            "step": self.step,
+            "tool": kwargs.get("name") or self._current_tool,
+            "error": str(error)
+        })
+
+    def on_agent_finish(self, finish: AgentFinish, **kwargs: Any) -> Any:
+        thought = finish.log.split("Final Answer:", 1)[0].replace("Thought:", "", 1).strip()
+        self.emit("final_answer", {
+            "step": self.step,
+            "thought": thought,
+            "output": finish.return_values.get("output")
+        })
+
+
+def format_sse(event: str, data: Any) -> str:
+    """Format one Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
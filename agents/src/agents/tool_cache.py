@@ -0,0 +1,153 @@
+"""
+Tool Cache for ChainSync
+Memoizes deterministic reasoning tools and records per-tool call counts, hit rates and latency
+"""
+
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+import bisect
+import functools
+import json
+import logging
+import threading
+import time
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open-ended
+LATENCY_BUCKETS_MS = (0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000, 5000)
+
+
+def canonicalize_tool_input(tool_input: str) -> str:
+    """Normalize a tool input so equivalent JSON (key order, whitespace, quoting) maps to one key"""
+    text = str(tool_input).strip()
+    try:
+        value = json.loads(text)
+    except (TypeError, ValueError):
+        return text.strip("\"'")
+    # A JSON string literal keys the same as the bare or single-quoted text
+    if isinstance(value, str):
+        return value.strip()
+    return json.dumps(value, sort_keys=True, separators=(",", ":"))
+
+
+class ToolCache:
+    """
+    Wraps tool functions with a bounded LRU cache (per tool) and latency accounting
+
+    Only tools registered as cacheable are memoized; every wrapped tool is timed.
+    A `scope` callable adds external state to the key (e.g. the regulatory rule-set
+    version), so cached results never outlive the data they were computed from.
+    Error results are not cached.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        """
+        Initialize the cache
+
+        Args:
+            max_entries: Cached results kept per tool before LRU eviction (0 disables caching)
+        """
+        self.max_entries = max_entries
+
+        self._lock = threading.Lock()
+        self._entries: Dict[str, "OrderedDict[str, str]"] = {}
+        self._stats: Dict[str, Dict] = {}
+
+    def wrap(
+        self,
+        name: str,
+        func: Callable[[str], str],
+        cacheable: bool = True,
+        scope: Optional[Callable[[], str]] = None
+    ) -> Callable[[str], str]:
+        """
+        Wrap a tool function
+
+        Args:
+            name: Tool name (metrics key)
+            func: Tool function taking and returning a string
+            cacheable: Memoize results (the tool must be a pure function of input and scope)
+            scope: Optional callable whose value is part of the cache key
+
+        Returns:
+            Callable with the same signature as func
+        """
+        with self._lock:
+            self._entries.setdefault(name, OrderedDict())
+            self._stats.setdefault(name, {
+                "calls": 0,
+                "hits": 0,
+                "cacheable": cacheable,
+                "total_ms": 0.0,
+                "max_ms": 0.0,
+                "histogram": [0] * (len(LATENCY_BUCKETS_MS) + 1)
+            })
+
+        @functools.wraps(func)
+        def invoke(tool_input: str) -> str:
+            started = time.perf_counter()
+            key = None
+            if cacheable and self.max_entries > 0:
+                key = canonicalize_tool_input(tool_input)
+                if scope is not None:
+                    key = f"{scope()}\x00{key}"
+                with self._lock:
+                    entries = self._entries[name]
+                    result = entries.get(key)
+                    if result is not None:
+                        entries.move_to_end(key)
+                        self._record(name, started, hit=True)
+                        return result
+
+            result = func(tool_input)
+
+            with self._lock:
+                if key is not None and not result.startswith('{"error"'):
+                    entries = self._entries[name]
+                    entries[key] = result
+                    while len(entries) > self.max_entries:
+                        entries.popitem(last=False)
+                self._record(name, started, hit=False)
+
+            return result
+
+        return invoke
+
+    def _record(self, name: str, started: float, hit: bool) -> None:
+        """Account one call (caller holds the lock)"""
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        stats = self._stats[name]
+        stats["calls"] += 1
+        stats["hits"] += int(hit)
+        stats["total_ms"] += elapsed_ms
+        stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+        stats["histogram"][bisect.bisect_left(LATENCY_BUCKETS_MS, elapsed_ms)] += 1
+
+    def get_statistics(self) -> Dict:
+        """Per-tool calls, hit rate, latency and share of total tool time"""
+        with self._lock:
+            total_ms = sum(stats["total_ms"] for stats in self._stats.values())
+            labels = [f"<={bound}ms" for bound in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}ms"]
+            tools = {}
+            for name, stats in self._stats.items():
+                calls = stats["calls"]
+                tools[name] = {
+                    "calls": calls,
+                    "cacheable": stats["cacheable"],
+                    "cached_entries": len(self._entries[name]),
+                    "hits": stats["hits"],
+                    "hit_rate": round(stats["hits"] / calls, 3) if calls else 0,
+                    "total_ms": round(stats["total_ms"], 2),
+                    "avg_ms": round(stats["total_ms"] / calls, 3) if calls else 0,
+                    "max_ms": round(stats["max_ms"], 2),
+                    "share_of_tool_time": round(stats["total_ms"] / total_ms, 3) if total_ms else 0,
+                    "latency_histogram": dict(zip(labels, stats["histogram"]))
+                }
+
+            return {
+                "max_entries_per_tool": self.max_entries,
+                "total_tool_ms": round(total_ms, 2),
+                "tools": tools
+            }
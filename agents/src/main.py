@@ -5,14 +5,30 @@ Exposes REST APIs for Memory and Reasoning agents
 
 from fastapi import FastAPI, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import Dict, Optional, List
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, Field
+from typing import Dict, Optional, List, Union
 import os
 from datetime import datetime
+import asyncio
+import functools
 import logging
+import threading
+import time
 
+from agents.anomaly_detector import StreamingAnomalyDetector
+from agents.chainsync_api import ChainSyncDataClient
+from agents.executors import ExecutorPool
+from agents.http_clients import CALLBACK_CLIENT, CHAINSYNC_CLIENT, OPENAI_CLIENT, HttpClientPool
+from agents.jobs import AnalysisJobQueue, InvalidCallbackError, QueueFullError
 from agents.memory_agent import MemoryEnabledAgent
+from agents.population_index import DEFAULT_BLOCKS_PATH, DEFAULT_ZONES_PATH, PopulationIndex
+from agents.prompt_budget import PromptBudget
 from agents.reasoning_agent import MultiStepReasoningAgent
+from agents.regulatory_rules import DEFAULT_RULES_PATH, RegulatoryRuleStore
+from agents.result_cache import AnalysisResultCache
+from agents.streaming import ReasoningEventHandler, format_sse
+from agents.tool_cache import ToolCache
 
 # Configure logging
 logging.basicConfig(
@@ -41,30 +57,224 @@ app.add_middleware(
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 CHROMA_PERSIST_DIR = os.getenv("CHROMA_PERSIST_DIR", "./data/chroma_db")
 CHAINSYNC_API_URL = os.getenv("CHAINSYNC_API_URL", "http://localhost:8081/api")
+# Embedding backend: openai (default), local (CPU sentence-transformers) or hashing (offline/tests)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "openai")
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL") or None
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "10000"))
+# On-disk embedding cache lives next to the Chroma data; set to an empty string to disable
+EMBEDDING_CACHE_PATH = os.getenv(
+    "EMBEDDING_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.normpath(CHROMA_PERSIST_DIR)), "embedding_cache.sqlite")
+)
+
+# Model tiers: the fast model runs first for MEDIUM/LOW incidents and escalates to the main
+# model on low confidence or an unparseable answer (empty REASONING_AGENT_FAST_MODEL disables)
+REASONING_AGENT_MODEL = os.getenv("REASONING_AGENT_MODEL", "gpt-4-turbo")
+REASONING_AGENT_FAST_MODEL = os.getenv("REASONING_AGENT_FAST_MODEL", "gpt-4o-mini") or None
+REASONING_AGENT_TEMPERATURE = float(os.getenv("REASONING_AGENT_TEMPERATURE", "0.2"))
+REASONING_AGENT_MAX_ITERATIONS = int(os.getenv("REASONING_AGENT_MAX_ITERATIONS", "10"))
+REASONING_ESCALATION_CONFIDENCE = float(os.getenv("REASONING_ESCALATION_CONFIDENCE", "0.7"))
+
+# Final answer as a submit_recommendation function call, repaired once if invalid
+# (false: legacy "Final Answer" JSON text)
+REASONING_STRUCTURED_OUTPUT = os.getenv("REASONING_STRUCTURED_OUTPUT", "true").lower() == "true"
+
+# Rules-based fast path that answers clear-cut incidents without the LLM
+REASONING_FAST_PATH = os.getenv("REASONING_FAST_PATH", "true").lower() == "true"
+# Similarity at which a successful precedent ends a LOW/MEDIUM urgency reasoning run early (empty disables)
+REASONING_PRECEDENT_THRESHOLD = float(os.getenv("REASONING_PRECEDENT_THRESHOLD", "0.9") or 0) or None
+# Estimated token ceiling per analysis (0 disables) and scratchpad size at which older
+# tool observations are summarized
+REASONING_TOKEN_BUDGET = int(os.getenv("REASONING_TOKEN_BUDGET", "16000"))
+REASONING_SUMMARIZE_AFTER_TOKENS = int(os.getenv("REASONING_SUMMARIZE_AFTER_TOKENS", "1500"))
+
+# Executor pool sizes for blocking work (Chroma I/O and LLM calls)
+CHROMA_IO_POOL_SIZE = int(os.getenv("CHROMA_IO_POOL_SIZE", "8"))
+LLM_POOL_SIZE = int(os.getenv("LLM_POOL_SIZE", "4"))
+COMPUTE_POOL_SIZE = int(os.getenv("COMPUTE_POOL_SIZE", "2"))
+
+# Recall defaults: results returned and minimum similarity (0-1) of a recalled incident
+MEMORY_AGENT_TOP_K = int(os.getenv("MEMORY_AGENT_TOP_K", "5"))
+MEMORY_AGENT_SIMILARITY_THRESHOLD = float(os.getenv("MEMORY_AGENT_SIMILARITY_THRESHOLD", "0.7"))
+# Similarity at which a newly stored incident is flagged as a near-duplicate of a stored
+# one and collapsed in recall results (empty or 0 disables)
+MEMORY_NEAR_DUPLICATE_THRESHOLD = float(os.getenv("MEMORY_NEAR_DUPLICATE_THRESHOLD", "0.97") or 0) or None
+
+# Retention: incidents older than the age limit, or the oldest beyond the size limit, are
+# moved to the compressed archive (empty or 0 disables a limit). Compaction applies the
+# policy and merges archive segments in the background (0 = only via POST .../compact).
+MEMORY_RETENTION_MAX_AGE_DAYS = float(os.getenv("MEMORY_RETENTION_MAX_AGE_DAYS", "") or 0) or None
+MEMORY_RETENTION_MAX_INCIDENTS = int(os.getenv("MEMORY_RETENTION_MAX_INCIDENTS", "") or 0) or None
+MEMORY_ARCHIVE_MAX_SEGMENTS = int(os.getenv("MEMORY_ARCHIVE_MAX_SEGMENTS", "8"))
+MEMORY_COMPACTION_INTERVAL_SECONDS = float(os.getenv("MEMORY_COMPACTION_INTERVAL_SECONDS", "3600"))
+
+# Per-branch timeouts for the combined analyze-with-memory workflow
+MEMORY_RECALL_TIMEOUT_SECONDS = float(os.getenv("MEMORY_RECALL_TIMEOUT_SECONDS", "10"))
+REASONING_TIMEOUT_SECONDS = float(os.getenv("REASONING_TIMEOUT_SECONDS", "120"))
+
+# Shared keep-alive HTTP clients (one connection pool per upstream: OpenAI, the ChainSync
+# Mule API, job webhooks); warm-up opens their connections at startup
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "50"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+HTTP_KEEPALIVE_EXPIRY_SECONDS = float(os.getenv("HTTP_KEEPALIVE_EXPIRY_SECONDS", "60"))
+HTTP_CONNECT_TIMEOUT_SECONDS = float(os.getenv("HTTP_CONNECT_TIMEOUT_SECONDS", "5"))
+HTTP_READ_TIMEOUT_SECONDS = float(os.getenv("HTTP_READ_TIMEOUT_SECONDS", "60"))
+CHAINSYNC_API_TIMEOUT_SECONDS = float(os.getenv("CHAINSYNC_API_TIMEOUT_SECONDS", "10"))
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "true").lower() == "true"
+HTTP_WARMUP = os.getenv("HTTP_WARMUP", "true").lower() == "true"
+http_clients = HttpClientPool(
+    max_connections=HTTP_MAX_CONNECTIONS,
+    max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    keepalive_expiry=HTTP_KEEPALIVE_EXPIRY_SECONDS,
+    connect_timeout=HTTP_CONNECT_TIMEOUT_SECONDS,
+    read_timeout=HTTP_READ_TIMEOUT_SECONDS,
+    http2=HTTP2_ENABLED
+)
+
+# Live facility/station/vehicle tools against the platform API; identical concurrent lookups
+# share one request and responses are reused for a few seconds
+CHAINSYNC_LIVE_TOOLS = os.getenv("CHAINSYNC_LIVE_TOOLS", "true").lower() == "true"
+CHAINSYNC_CACHE_TTL_SECONDS = float(os.getenv("CHAINSYNC_CACHE_TTL_SECONDS", "15"))
+# Bearer token for the platform API's secured endpoints (optional)
+CHAINSYNC_API_TOKEN = os.getenv("CHAINSYNC_API_TOKEN")
+chainsync_data = ChainSyncDataClient(
+    http_clients.client(
+        CHAINSYNC_CLIENT,
+        base_url=CHAINSYNC_API_URL,
+        read_timeout=CHAINSYNC_API_TIMEOUT_SECONDS,
+        headers={"Authorization": f"Bearer {CHAINSYNC_API_TOKEN}"} if CHAINSYNC_API_TOKEN else None
+    ),
+    ttl_seconds=CHAINSYNC_CACHE_TTL_SECONDS
+)
+
+# Blocking agent calls run in these pools so the event loop (and /health) stays responsive
+chroma_io_pool = ExecutorPool("chroma-io", CHROMA_IO_POOL_SIZE)
+llm_pool = ExecutorPool("llm", LLM_POOL_SIZE)
+compute_pool = ExecutorPool("compute", COMPUTE_POOL_SIZE)
+
+# Regulatory limit/fine tables shared by the batch endpoint and the reasoning tools,
+# loaded once from a versioned data file and hot-reloaded when it changes
+REGULATORY_RULES_PATH = os.getenv("REGULATORY_RULES_PATH", DEFAULT_RULES_PATH)
+REGULATORY_RULES_RELOAD_SECONDS = float(os.getenv("REGULATORY_RULES_RELOAD_SECONDS", "30"))
+rule_store = RegulatoryRuleStore(REGULATORY_RULES_PATH, reload_interval=REGULATORY_RULES_RELOAD_SECONDS)
+
+# Facility service zones and census blocks behind the population impact tool
+POPULATION_ZONES_PATH = os.getenv("POPULATION_ZONES_PATH", DEFAULT_ZONES_PATH)
+POPULATION_BLOCKS_PATH = os.getenv("POPULATION_BLOCKS_PATH", DEFAULT_BLOCKS_PATH)
+population_index = PopulationIndex(POPULATION_ZONES_PATH, POPULATION_BLOCKS_PATH)
+
+# Memoized reasoning tools (results per tool, LRU) with per-tool latency accounting
+TOOL_CACHE_SIZE = int(os.getenv("TOOL_CACHE_SIZE", "256"))
+tool_cache = ToolCache(max_entries=TOOL_CACHE_SIZE)
 
-# Initialize agents (lazy loading)
+# Streaming per-station/parameter statistics (EWMA, rolling z-score, rate of change)
+ANOMALY_WINDOW = int(os.getenv("ANOMALY_WINDOW", "60"))
+ANOMALY_MAX_SERIES = int(os.getenv("ANOMALY_MAX_SERIES", "50000"))
+ANOMALY_Z_THRESHOLD = float(os.getenv("ANOMALY_Z_THRESHOLD", "3.0"))
+anomaly_detector = StreamingAnomalyDetector(
+    window=ANOMALY_WINDOW,
+    max_series=ANOMALY_MAX_SERIES,
+    z_threshold=ANOMALY_Z_THRESHOLD
+)
+
+# Cache for identical reasoning requests (Mule retries, duplicate alerts)
+REASONING_CACHE_TTL_SECONDS = float(os.getenv("REASONING_CACHE_TTL_SECONDS", "300"))
+REASONING_CACHE_SIZE = int(os.getenv("REASONING_CACHE_SIZE", "500"))
+analysis_cache = AnalysisResultCache(
+    ttl_seconds=REASONING_CACHE_TTL_SECONDS,
+    max_entries=REASONING_CACHE_SIZE
+)
+
+# Background analysis jobs (priority lanes by urgency, bounded queue)
+ANALYSIS_JOB_WORKERS = int(os.getenv("ANALYSIS_JOB_WORKERS", "2"))
+ANALYSIS_JOB_QUEUE_SIZE = int(os.getenv("ANALYSIS_JOB_QUEUE_SIZE", "100"))
+# Comma-separated hosts job callbacks may be POSTed to (".example.com" allows subdomains;
+# http(s) only; empty refuses every callback_url)
+ANALYSIS_JOB_CALLBACK_HOSTS = [
+    host for host in os.getenv("ANALYSIS_JOB_CALLBACK_HOSTS", "").split(",") if host.strip()
+]
+analysis_job_queue = AnalysisJobQueue(
+    workers=ANALYSIS_JOB_WORKERS,
+    max_queue_size=ANALYSIS_JOB_QUEUE_SIZE,
+    http_client=http_clients.client(CALLBACK_CLIENT, read_timeout=10.0),
+    callback_allowed_hosts=ANALYSIS_JOB_CALLBACK_HOSTS
+)
+
+
+@app.on_event("startup")
+def warm_up_http_clients():
+    """Open upstream connections in the background so first requests skip TCP/TLS setup"""
+    if HTTP_WARMUP:
+        if OPENAI_API_KEY:
+            http_clients.openai_client(OPENAI_API_KEY)
+        http_clients.warm_up([OPENAI_CLIENT, CHAINSYNC_CLIENT])
+
+
+@app.on_event("shutdown")
+def shutdown_executor_pools():
+    """Release executor and job worker threads on shutdown"""
+    chroma_io_pool.shutdown()
+    llm_pool.shutdown()
+    compute_pool.shutdown()
+    rule_store.stop()
+    if memory_agent_instance is not None:
+        memory_agent_instance.stop()
+    analysis_job_queue.shutdown()
+    http_clients.close()
+
+
+# Initialize agents (lazy loading). Dependencies run on worker threads, so creation is
+# locked: two first requests must not open two Chroma clients and compaction threads.
 memory_agent_instance = None
 reasoning_agent_instance = None
+memory_agent_lock = threading.Lock()
+reasoning_agent_lock = threading.Lock()
 
 
 def get_memory_agent() -> MemoryEnabledAgent:
     """Dependency to get Memory Agent instance"""
+    if memory_agent_instance is None:
+        with memory_agent_lock:
+            _create_memory_agent()
+    return memory_agent_instance
+
+
+def _create_memory_agent() -> None:
+    """Create the Memory Agent unless another request already did (caller holds the lock)"""
     global memory_agent_instance
     if memory_agent_instance is None:
-        if not OPENAI_API_KEY:
+        if EMBEDDING_BACKEND == "openai" and not OPENAI_API_KEY:
             raise HTTPException(
                 status_code=500,
                 detail="OPENAI_API_KEY environment variable not set"
             )
         memory_agent_instance = MemoryEnabledAgent(
             persist_directory=CHROMA_PERSIST_DIR,
-            openai_api_key=OPENAI_API_KEY
+            openai_api_key=OPENAI_API_KEY,
+            embedding_backend=EMBEDDING_BACKEND,
+            embedding_model=EMBEDDING_MODEL,
+            embedding_cache_size=EMBEDDING_CACHE_SIZE,
+            embedding_cache_path=EMBEDDING_CACHE_PATH or None,
+            http_clients=http_clients,
+            similarity_threshold=MEMORY_AGENT_SIMILARITY_THRESHOLD,
+            near_duplicate_threshold=MEMORY_NEAR_DUPLICATE_THRESHOLD,
+            retention_max_age_days=MEMORY_RETENTION_MAX_AGE_DAYS,
+            retention_max_incidents=MEMORY_RETENTION_MAX_INCIDENTS,
+            archive_max_segments=MEMORY_ARCHIVE_MAX_SEGMENTS,
+            compaction_interval=MEMORY_COMPACTION_INTERVAL_SECONDS
         )
-    return memory_agent_instance
 
 
 def get_reasoning_agent() -> MultiStepReasoningAgent:
     """Dependency to get Reasoning Agent instance"""
+    if reasoning_agent_instance is None:
+        with reasoning_agent_lock:
+            _create_reasoning_agent()
+    return reasoning_agent_instance
+
+
+def _create_reasoning_agent() -> None:
+    """Create the Reasoning Agent unless another request already did (caller holds the lock)"""
     global reasoning_agent_instance
     if reasoning_agent_instance is None:
         if not OPENAI_API_KEY:
@@ -72,11 +282,47 @@ def get_reasoning_agent() -> MultiStepReasoningAgent:
                 status_code=500,
                 detail="OPENAI_API_KEY environment variable not set"
             )
+        # Memory backs the recall tool; reasoning still works without it
+        try:
+            memory_agent = get_memory_agent()
+        except Exception as e:
+            logger.warning(f"Reasoning agent starting without memory recall tool: {str(e)}")
+            memory_agent = None
+
         reasoning_agent_instance = MultiStepReasoningAgent(
             llm_api_key=OPENAI_API_KEY,
-            chainsync_api_url=CHAINSYNC_API_URL
+            chainsync_api_url=CHAINSYNC_API_URL if CHAINSYNC_LIVE_TOOLS else None,
+            memory_agent=memory_agent,
+            precedent_similarity_threshold=REASONING_PRECEDENT_THRESHOLD,
+            fast_path_enabled=REASONING_FAST_PATH,
+            rule_store=rule_store,
+            anomaly_detector=anomaly_detector,
+            population_index=population_index,
+            tool_cache=tool_cache,
+            prompt_budget=PromptBudget(
+                max_tokens=REASONING_TOKEN_BUDGET,
+                summarize_after_tokens=REASONING_SUMMARIZE_AFTER_TOKENS,
+                model=REASONING_AGENT_MODEL
+            ),
+            model=REASONING_AGENT_MODEL,
+            fast_model=REASONING_AGENT_FAST_MODEL,
+            temperature=REASONING_AGENT_TEMPERATURE,
+            max_iterations=REASONING_AGENT_MAX_ITERATIONS,
+            escalation_confidence=REASONING_ESCALATION_CONFIDENCE,
+            structured_output=REASONING_STRUCTURED_OUTPUT,
+            http_clients=http_clients,
+            chainsync_data=chainsync_data if CHAINSYNC_LIVE_TOOLS else None
         )
-    return reasoning_agent_instance
+
+
+def analyze_incident_cached(agent: MultiStepReasoningAgent, incident_data: Dict) -> Dict:
+    """Run analyze_incident through the result cache; the result carries its cache status"""
+    result, cache_status = analysis_cache.get_or_compute(
+        incident_data,
+        lambda: agent.analyze_incident(incident_data)
+    )
+    result["cache"] = cache_status
+    return result
 
 
 # Pydantic models for request/response validation
@@ -108,9 +354,33 @@ class IncidentStoreRequest(BaseModel):
         }
 
 
+class IncidentBatchStoreRequest(BaseModel):
+    incidents: List[IncidentStoreRequest]
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "incidents": [
+                    IncidentStoreRequest.Config.json_schema_extra["example"]
+                ]
+            }
+        }
+
+
+class RecallFilters(BaseModel):
+    incident_type: Optional[Union[str, List[str]]] = None
+    facility_id: Optional[Union[str, List[str]]] = None
+    outcome: Optional[Union[str, List[str]]] = None
+    since: Optional[str] = None
+    until: Optional[str] = None
+
+
 class IncidentRecallRequest(BaseModel):
     current_incident: Dict
-    top_k: int = 5
+    top_k: Optional[int] = None
+    filters: Optional[RecallFilters] = None
+    similarity_threshold: Optional[float] = Field(None, ge=0, le=1)
+    include_archive: bool = False
 
     class Config:
         json_schema_extra = {
@@ -120,7 +390,9 @@ class IncidentRecallRequest(BaseModel):
                     "sensor_data": {"ecoli": 5, "ph": 7.8, "turbidity": 1.2},
                     "context": "heavy rain yesterday"
                 },
-                "top_k": 5
+                "top_k": 5,
+                "filters": {"incident_type": "WATER_CONTAMINATION", "outcome": "SUCCESS"},
+                "similarity_threshold": 0.6
             }
         }
 
@@ -155,6 +427,61 @@ class ReasoningAnalysisRequest(BaseModel):
         }
 
 
+class ReasoningJobRequest(ReasoningAnalysisRequest):
+    callback_url: Optional[str] = None
+
+
+class SensorReading(BaseModel):
+    station_id: Optional[str] = None
+    timestamp: Optional[str] = None
+    sensor_data: Dict
+
+
+class SensorBatchRequest(BaseModel):
+    readings: List[SensorReading]
+    jurisdiction: Optional[str] = None
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "readings": [
+                    {
+                        "station_id": "WQ-ATL-001",
+                        "timestamp": "2024-11-08T20:30:00Z",
+                        "sensor_data": {"ecoli": 0, "ph": 7.8, "turbidity": 0.95, "chlorine": 2.1}
+                    },
+                    {
+                        "station_id": "AQ-ATL-014",
+                        "timestamp": "2024-11-08T20:30:00Z",
+                        "sensor_data": {"pm25": 41.2, "pm10": 88.0}
+                    }
+                ]
+            }
+        }
+
+
+class SensorIngestRequest(BaseModel):
+    readings: List[SensorReading]
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "readings": [
+                    {
+                        "station_id": "WQ-ATL-001",
+                        "timestamp": "2024-11-08T20:30:00Z",
+                        "sensor_data": {"turbidity": 0.95, "chlorine": 2.1}
+                    }
+                ]
+            }
+        }
+
+
+class CacheInvalidationRequest(BaseModel):
+    incident_id: Optional[str] = None
+    facility_id: Optional[str] = None
+
+
 # API Endpoints
 
 @app.get("/")
@@ -172,11 +499,33 @@ async def root():
         "endpoints": {
             "memory": {
                 "store": "POST /api/agents/memory/store",
+                "store_batch": "POST /api/agents/memory/store/batch",
                 "recall": "POST /api/agents/memory/recall",
+                "patterns": "GET /api/agents/memory/patterns",
+                "compact": "POST /api/agents/memory/compact",
                 "stats": "GET /api/agents/memory/stats"
             },
             "reasoning": {
-                "analyze": "POST /api/agents/reasoning/analyze"
+                "analyze": "POST /api/agents/reasoning/analyze",
+                "analyze_stream": "POST /api/agents/reasoning/analyze/stream",
+                "submit_job": "POST /api/agents/reasoning/jobs",
+                "job_status": "GET /api/agents/reasoning/jobs/{job_id}",
+                "invalidate_cache": "POST /api/agents/reasoning/cache/invalidate",
+                "stats": "GET /api/agents/reasoning/stats"
+            },
+            "sensors": {
+                "evaluate_batch": "POST /api/agents/sensors/evaluate-batch",
+                "rules": "GET /api/agents/sensors/rules",
+                "ingest": "POST /api/agents/sensors/ingest",
+                "trends": "GET /api/agents/sensors/trends"
+            },
+            "population": {
+                "impact": "GET /api/agents/population/impact"
+            },
+            "metrics": {
+                "executors": "GET /api/agents/metrics/executors",
+                "tools": "GET /api/agents/metrics/tools",
+                "http": "GET /api/agents/metrics/http"
             }
         }
     }
@@ -195,6 +544,40 @@ async def health_check():
     }
 
 
+@app.get("/api/agents/metrics/executors")
+async def get_executor_metrics():
+    """Queue depth, utilization and timing for the blocking-work executor pools"""
+    return {
+        "timestamp": datetime.utcnow().isoformat(),
+        "pools": [
+            chroma_io_pool.get_statistics(),
+            llm_pool.get_statistics(),
+            compute_pool.get_statistics()
+        ],
+        "analysis_jobs": analysis_job_queue.get_statistics(),
+        "analysis_cache": analysis_cache.get_statistics(),
+        "anomaly_detector": anomaly_detector.get_statistics()
+    }
+
+
+@app.get("/api/agents/metrics/tools")
+async def get_tool_metrics():
+    """Per-tool call counts, cache hit rates and latency histograms for the reasoning tools"""
+    return {
+        "timestamp": datetime.utcnow().isoformat(),
+        **tool_cache.get_statistics()
+    }
+
+
+@app.get("/api/agents/metrics/http")
+async def get_http_metrics():
+    """Connection pool occupancy, waits, TLS handshakes and connection reuse per upstream client"""
+    return {
+        "timestamp": datetime.utcnow().isoformat(),
+        **http_clients.get_statistics()
+    }
+
+
 # Memory Agent Endpoints
 
 @app.post("/api/agents/memory/store")
@@ -206,16 +589,41 @@ async def store_incident(
     Store an incident in memory for future recall
 
     This endpoint stores historical incident data in the vector database
-    for similarity search and pattern recognition.
+    for similarity search and pattern recognition. Re-sending an incident is
+    safe: unchanged text is not re-embedded, and changed text replaces the
+    stored record.
     """
     try:
-        result = agent.store_incident(request.dict())
+        result = await chroma_io_pool.run(agent.store_incident, request.dict())
         return result
     except Exception as e:
         logger.error(f"Error storing incident: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/agents/memory/store/batch")
+async def store_incidents_batch(
+    request: IncidentBatchStoreRequest,
+    agent: MemoryEnabledAgent = Depends(get_memory_agent)
+):
+    """
+    Store many incidents in one call
+
+    Intended for backfilling incident history: texts are embedded in large
+    batches and written with chunked collection writes. The response reports
+    per-record success/failure and end-to-end throughput.
+    """
+    try:
+        result = await chroma_io_pool.run(
+            agent.store_incidents_bulk,
+            [incident.dict() for incident in request.incidents]
+        )
+        return result
+    except Exception as e:
+        logger.error(f"Error bulk storing incidents: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.post("/api/agents/memory/recall")
 async def recall_incidents(
     request: IncidentRecallRequest,
@@ -225,12 +633,19 @@ async def recall_incidents(
     Recall similar incidents from memory
 
     Uses vector similarity search to find historical incidents
-    similar to the current situation.
+    similar to the current situation. Optional filters (incident_type,
+    facility_id, outcome, since/until) restrict the search to matching
+    incidents; results below the similarity threshold are dropped.
+    include_archive also searches incidents moved out by retention.
     """
     try:
-        result = agent.recall_similar_incidents(
+        result = await chroma_io_pool.run(
+            agent.recall_similar_incidents,
             current_incident=request.current_incident,
-            top_k=request.top_k
+            top_k=request.top_k or MEMORY_AGENT_TOP_K,
+            filters=request.filters.dict(exclude_none=True) if request.filters else None,
+            similarity_threshold=request.similarity_threshold,
+            include_archive=request.include_archive
         )
         return result
     except Exception as e:
@@ -238,19 +653,244 @@ async def recall_incidents(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/agents/memory/patterns")
+async def get_memory_patterns(
+    group_by: str = "incident_type",
+    incident_type: Optional[str] = None,
+    facility_id: Optional[str] = None,
+    outcome: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    agent: MemoryEnabledAgent = Depends(get_memory_agent)
+):
+    """
+    Success rate, average cost and resolution hours per incident type, facility or outcome
+
+    Answered from the precomputed pattern index (no vector query), e.g.
+    ?group_by=facility_id&incident_type=WATER_CONTAMINATION. A since/until range
+    is aggregated from a filtered read of the store instead.
+    """
+    try:
+        patterns = await chroma_io_pool.run(
+            agent.aggregate_patterns,
+            group_by=group_by,
+            filters={
+                "incident_type": incident_type,
+                "facility_id": facility_id,
+                "outcome": outcome,
+                "since": since,
+                "until": until
+            }
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error aggregating patterns: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return {"status": "success", **patterns}
+
+
+class MemoryCompactionRequest(BaseModel):
+    max_age_days: Optional[float] = Field(None, gt=0)
+    max_incidents: Optional[int] = Field(None, gt=0)
+
+
+@app.post("/api/agents/memory/compact")
+async def compact_memory(
+    request: Optional[MemoryCompactionRequest] = None,
+    agent: MemoryEnabledAgent = Depends(get_memory_agent)
+):
+    """
+    Apply the retention policy now and merge archive segments
+
+    Limits in the body override the configured ones for this run only.
+    """
+    request = request or MemoryCompactionRequest()
+    try:
+        result = await chroma_io_pool.run(
+            agent.apply_retention,
+            max_age_days=request.max_age_days,
+            max_incidents=request.max_incidents
+        )
+    except Exception as e:
+        logger.error(f"Error compacting memory: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return {"status": "success", **result}
+
+
 @app.get("/api/agents/memory/stats")
 async def get_memory_stats(
     agent: MemoryEnabledAgent = Depends(get_memory_agent)
 ):
     """Get memory statistics"""
     try:
-        stats = agent.get_statistics()
+        stats = await chroma_io_pool.run(agent.get_statistics)
         return stats
     except Exception as e:
         logger.error(f"Error getting stats: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# Sensor Compliance Endpoints
+
+@app.post("/api/agents/sensors/evaluate-batch")
+async def evaluate_sensor_batch(request: SensorBatchRequest):
+    """
+    Evaluate a batch of station readings against regulatory limits
+
+    All readings are checked in one vectorized pass; each result row has the
+    same violations/warnings/severity shape as the analyze_sensor_data tool.
+    """
+    try:
+        started = time.perf_counter()
+        rules = rule_store.current
+        evaluations = await compute_pool.run(
+            rules.engine(request.jurisdiction).evaluate_batch,
+            [reading.sensor_data for reading in request.readings]
+        )
+
+        results = []
+        severity_counts = {"CRITICAL": 0, "WARNING": 0, "NORMAL": 0}
+        for reading, evaluation in zip(request.readings, evaluations):
+            severity_counts[evaluation["severity"]] += 1
+            results.append({
+                "station_id": reading.station_id,
+                "timestamp": reading.timestamp,
+                **evaluation
+            })
+
+        return {
+            "status": "success",
+            "jurisdiction": rules.jurisdiction(request.jurisdiction),
+            "rule_set_version": rules.version,
+            "results": results,
+            "summary": {
+                "total_readings": len(results),
+                "critical": severity_counts["CRITICAL"],
+                "warning": severity_counts["WARNING"],
+                "normal": severity_counts["NORMAL"],
+                "elapsed_ms": round((time.perf_counter() - started) * 1000, 2)
+            }
+        }
+    except Exception as e:
+        logger.error(f"Error evaluating sensor batch: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/agents/sensors/rules")
+async def get_regulatory_rules():
+    """Active regulatory rule-set version and jurisdictions"""
+    return rule_store.get_statistics()
+
+
+def _ingest_readings(readings: List[SensorReading]) -> Dict:
+    """Flatten station readings into per-parameter samples and feed the anomaly detector"""
+    stations, parameters, values, timestamps = [], [], [], []
+    skipped = 0
+    now = time.time()
+
+    for reading in readings:
+        if reading.timestamp:
+            timestamp = datetime.fromisoformat(reading.timestamp.replace("Z", "+00:00")).timestamp()
+        else:
+            timestamp = now
+        for parameter, value in reading.sensor_data.items():
+            try:
+                values.append(float(value))
+            except (TypeError, ValueError):
+                skipped += 1
+                continue
+            stations.append(reading.station_id)
+            parameters.append(parameter)
+            timestamps.append(timestamp)
+
+    flagged = anomaly_detector.ingest_batch(stations, parameters, values, timestamps)
+    return {"samples": len(values), "skipped": skipped, "flagged": flagged}
+
+
+@app.post("/api/agents/sensors/ingest")
+async def ingest_sensor_readings(request: SensorIngestRequest):
+    """
+    Stream station readings into the anomaly detector
+
+    Every numeric parameter updates its (station, parameter) series; the response
+    lists the series whose rolling statistics flagged a spike or trend.
+    """
+    if any(not reading.station_id for reading in request.readings):
+        raise HTTPException(status_code=400, detail="station_id is required for every reading")
+
+    try:
+        started = time.perf_counter()
+        result = await compute_pool.run(_ingest_readings, request.readings)
+
+        return {
+            "status": "success",
+            "readings": len(request.readings),
+            "samples": result["samples"],
+            "skipped_values": result["skipped"],
+            "flagged": result["flagged"],
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 2)
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error ingesting sensor readings: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/agents/sensors/trends")
+async def get_sensor_trends(station_id: Optional[str] = None, flagged_only: bool = False):
+    """Rolling statistics for a station, or the currently flagged series across all stations"""
+    if station_id:
+        trends = anomaly_detector.get_station_trends(station_id, flagged_only=flagged_only)
+    else:
+        trends = anomaly_detector.get_flagged()
+
+    return {
+        "status": "success",
+        "station_id": station_id,
+        "series": trends,
+        "statistics": anomaly_detector.get_statistics()
+    }
+
+
+# Population Impact Endpoints
+
+@app.get("/api/agents/population/impact")
+async def get_population_impact(
+    facility_id: Optional[str] = None,
+    latitude: Optional[float] = None,
+    longitude: Optional[float] = None,
+    radiusKm: Optional[float] = None
+):
+    """
+    Population affected by a facility's service zone, or within a radius (e.g. an air plume)
+
+    Radius queries use the platform API's GeoFilterTrait parameters
+    (latitude, longitude, radiusKm).
+    """
+    if facility_id:
+        impact = population_index.facility_impact(facility_id)
+        if impact is None:
+            raise HTTPException(status_code=404, detail=f"No service zone for facility {facility_id}")
+        return {"status": "success", "impact": impact}
+
+    if latitude is None or longitude is None or radiusKm is None:
+        raise HTTPException(
+            status_code=400,
+            detail="Provide facility_id, or latitude, longitude and radiusKm"
+        )
+
+    try:
+        impact = population_index.radius_impact(latitude, longitude, radiusKm)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {"status": "success", "impact": impact}
+
+
 # Reasoning Agent Endpoints
 
 @app.post("/api/agents/reasoning/analyze")
@@ -269,7 +909,7 @@ async def analyze_incident(
     - Final recommendation with confidence score
     """
     try:
-        result = agent.analyze_incident(request.dict())
+        result = await llm_pool.run(analyze_incident_cached, agent, request.dict())
 
         if result.get("status") == "error":
             raise HTTPException(status_code=500, detail=result.get("message"))
@@ -282,6 +922,140 @@ async def analyze_incident(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/agents/reasoning/analyze/stream")
+async def analyze_incident_stream(
+    request: ReasoningAnalysisRequest,
+    agent: MultiStepReasoningAgent = Depends(get_reasoning_agent)
+):
+    """
+    Analyze an incident, streaming reasoning steps as Server-Sent Events
+
+    Events: started, thought, action, observation, final_answer (LLM path) or
+    step (fast path), then final_recommendation and slotify_briefing, and
+    finally done. Failures are reported as an error event.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+
+    def emit(event: Optional[str], data: Optional[Dict] = None):
+        loop.call_soon_threadsafe(queue.put_nowait, (event, data))
+
+    async def run_analysis():
+        try:
+            result = await llm_pool.run(
+                agent.analyze_incident,
+                request.dict(),
+                callbacks=[ReasoningEventHandler(emit)]
+            )
+            if result.get("status") == "error":
+                emit("error", {"message": result.get("message")})
+            else:
+                if result.get("path") == "fast":
+                    for step in result.get("reasoning_steps", []):
+                        emit("step", step)
+                emit("final_recommendation", {
+                    "path": result.get("path"),
+                    "final_recommendation": result.get("final_recommendation", {}),
+                    "usage": result.get("usage", {})
+                })
+                emit("slotify_briefing", {"slotify_briefing": result.get("slotify_briefing", "")})
+        except Exception as e:
+            logger.error(f"Error streaming incident analysis: {str(e)}")
+            emit("error", {"message": str(e)})
+        finally:
+            emit(None)
+
+    async def event_stream():
+        task = asyncio.create_task(run_analysis())
+        yield format_sse("started", {
+            "incident_id": request.incident_id,
+            "timestamp": datetime.utcnow().isoformat()
+        })
+        while True:
+            event, data = await queue.get()
+            if event is None:
+                break
+            yield format_sse(event, data)
+        await task
+        yield format_sse("done", {"incident_id": request.incident_id})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.post("/api/agents/reasoning/jobs", status_code=202)
+async def submit_analysis_job(
+    request: ReasoningJobRequest,
+    agent: MultiStepReasoningAgent = Depends(get_reasoning_agent)
+):
+    """
+    Queue an incident analysis and return a job id immediately
+
+    Jobs run on a bounded worker pool in urgency order (CRITICAL, HIGH,
+    MEDIUM, LOW). Poll GET /api/agents/reasoning/jobs/{job_id} or pass
+    callback_url to receive the finished job by POST. Returns 429 with a
+    Retry-After header when the queue is full, and 422 when callback_url is
+    not an http(s) URL on an allowed host.
+    """
+    incident_data = request.dict(exclude={"callback_url"})
+    try:
+        job = analysis_job_queue.submit(
+            functools.partial(analyze_incident_cached, agent),
+            incident_data,
+            callback_url=request.callback_url
+        )
+    except QueueFullError as e:
+        return JSONResponse(
+            status_code=429,
+            content={"detail": str(e)},
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    except InvalidCallbackError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    job["status_url"] = f"/api/agents/reasoning/jobs/{job['job_id']}"
+    return job
+
+
+@app.get("/api/agents/reasoning/jobs/{job_id}")
+async def get_analysis_job(job_id: str):
+    """Get the status, and once finished the result, of an analysis job"""
+    job = analysis_job_queue.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
+
+
+@app.post("/api/agents/reasoning/cache/invalidate")
+async def invalidate_analysis_cache(request: CacheInvalidationRequest):
+    """
+    Invalidate cached analyses (admin)
+
+    Drops entries matching incident_id and/or facility_id; with neither,
+    the whole cache is cleared.
+    """
+    removed = analysis_cache.invalidate(
+        incident_id=request.incident_id,
+        facility_id=request.facility_id
+    )
+    return {"status": "success", "invalidated": removed}
+
+
+@app.get("/api/agents/reasoning/stats")
+async def get_reasoning_stats(
+    agent: MultiStepReasoningAgent = Depends(get_reasoning_agent)
+):
+    """Average ReAct iterations and token usage per analysis"""
+    try:
+        return agent.get_statistics()
+    except Exception as e:
+        logger.error(f"Error getting reasoning stats: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 # Combined workflow endpoint
 @app.post("/api/agents/analyze-with-memory")
 async def analyze_with_memory(
@@ -296,31 +1070,56 @@ async def analyze_with_memory(
     1. Recalls similar historical incidents
     2. Performs multi-step reasoning analysis
     3. Combines both for comprehensive recommendation
+
+    Recall and reasoning are independent, so they run concurrently with
+    per-branch timeouts. If one branch fails or times out, the other
+    branch's result is still returned with status "partial".
     """
-    try:
-        # Step 1: Recall similar incidents
-        recall_request = {
-            "current_incident": {
-                "type": request.incident_type,
-                "facility_id": request.facility_id,
-                "sensor_data": request.sensor_data,
-                "context": request.context
-            },
-            "top_k": 5
-        }
+    current_incident = {
+        "type": request.incident_type,
+        "facility_id": request.facility_id,
+        "sensor_data": request.sensor_data,
+        "context": request.context
+    }
+
+    memory_branch, reasoning_branch = await asyncio.gather(
+        _run_branch(
+            chroma_io_pool.run(
+                memory_agent.recall_similar_incidents,
+                current_incident=current_incident,
+                top_k=MEMORY_AGENT_TOP_K,
+                filters={"incident_type": request.incident_type}
+            ),
+            MEMORY_RECALL_TIMEOUT_SECONDS
+        ),
+        _run_branch(
+            llm_pool.run(analyze_incident_cached, reasoning_agent, request.dict()),
+            REASONING_TIMEOUT_SECONDS
+        )
+    )
 
-        memory_result = memory_agent.recall_similar_incidents(
-            current_incident=recall_request['current_incident'],
-            top_k=5
+    if memory_branch["status"] != "success" and reasoning_branch["status"] != "success":
+        logger.error(
+            f"Error in combined analysis: memory={memory_branch['error']}, "
+            f"reasoning={reasoning_branch['error']}"
         )
+        raise HTTPException(status_code=500, detail={
+            "memory": memory_branch["error"],
+            "reasoning": reasoning_branch["error"]
+        })
 
-        # Step 2: Perform reasoning analysis
-        reasoning_result = reasoning_agent.analyze_incident(request.dict())
+    memory_result = memory_branch.pop("result")
+    reasoning_result = reasoning_branch.pop("result")
 
-        # Step 3: Combine results
+    try:
         combined_result = {
             "incident_id": request.incident_id,
             "timestamp": datetime.utcnow().isoformat(),
+            "status": "success" if memory_branch["status"] == reasoning_branch["status"] == "success" else "partial",
+            "branches": {
+                "memory": memory_branch,
+                "reasoning": reasoning_branch
+            },
             "memory_insights": {
                 "similar_incidents": memory_result.get('similar_incidents', []),
                 "patterns": memory_result.get('patterns', {}),
@@ -331,11 +1130,11 @@ async def analyze_with_memory(
                 "recommendation": reasoning_result.get('final_recommendation', {}),
                 "analysis": reasoning_result.get('raw_analysis', '')
             },
-            "combined_recommendation": self._combine_recommendations(
+            "combined_recommendation": _combine_recommendations(
                 memory_result,
                 reasoning_result
             ),
-            "slotify_briefing": self._generate_combined_briefing(
+            "slotify_briefing": _generate_combined_briefing(
                 memory_result,
                 reasoning_result
             )
@@ -348,6 +1147,34 @@ async def analyze_with_memory(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+async def _run_branch(awaitable, timeout: float) -> Dict:
+    """
+    Await one branch of the combined workflow with a timeout
+
+    Returns a dict with status (success/error/timeout), elapsed_ms, error and
+    result; result is an empty dict when the branch did not succeed. A timed-out
+    branch keeps running in its pool but its result is discarded.
+    """
+    started = time.perf_counter()
+    try:
+        result = await asyncio.wait_for(awaitable, timeout=timeout)
+        if result.get("status") == "error":
+            status, error = "error", result.get("message", "unknown error")
+        else:
+            status, error = "success", None
+    except asyncio.TimeoutError:
+        result, status, error = {}, "timeout", f"timed out after {timeout}s"
+    except Exception as e:
+        result, status, error = {}, "error", str(e)
+
+    return {
+        "status": status,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+        "error": error,
+        "result": result if status == "success" else {}
+    }
+
+
 def _combine_recommendations(memory_result: Dict, reasoning_result: Dict) -> Dict:
     """Combine memory and reasoning recommendations"""
 
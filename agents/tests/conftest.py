@@ -0,0 +1,134 @@
+"""
+Shared fixtures for the ChainSync agents tests
+
+The memory agent runs on the offline hashing embedding backend and the live data
+tools against scripts/chainsync_stub_server.py, so no API key or network is needed.
+"""
+
+from http.server import ThreadingHTTPServer
+from typing import Any, List, Optional
+import importlib.util
+import os
+import sys
+import threading
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.outputs import ChatGeneration, ChatResult
+import pytest
+
+# The service runs from src/ (see the Dockerfile), so its packages import as top-level
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+os.environ.setdefault("ANONYMIZED_TELEMETRY", "False")
+
+STUB_SERVER_PATH = os.path.join(os.path.dirname(__file__), "..", "scripts", "chainsync_stub_server.py")
+
+
+class ScriptedChatModel(BaseChatModel):
+    """Chat model replaying a fixed list of AIMessage replies, one per call"""
+
+    replies: List[Any]
+    calls: List[Any] = []
+    model_name: str = "gpt-4-turbo"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        self.calls.append({"messages": messages, "kwargs": kwargs})
+        return ChatResult(generations=[ChatGeneration(message=self.replies.pop(0))])
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+
+@pytest.fixture
+def service():
+    """The FastAPI service module; dependency overrides are cleared afterwards"""
+    import main
+
+    yield main
+    main.app.dependency_overrides.clear()
+    main.analysis_cache.invalidate()
+
+
+@pytest.fixture
+def make_reasoning_agent():
+    """Factory for a reasoning agent whose models replay the given replies (small tier if fast_model is set)"""
+    from agents.reasoning_agent import MultiStepReasoningAgent
+
+    def make(replies: List[Any], fast_replies: Optional[List[Any]] = None, **kwargs):
+        kwargs.setdefault("fast_path_enabled", False)
+        agent = MultiStepReasoningAgent(llm_api_key="sk-test", **kwargs)
+        agent.llm = ScriptedChatModel(replies=list(replies), calls=[])
+        agent.agent = agent._create_agent()
+        if agent.fast_llm is not None:
+            agent.fast_llm = ScriptedChatModel(replies=list(fast_replies or []), calls=[], model_name=agent.router.small_model)
+            agent.fast_agent = agent._create_agent(agent.fast_llm)
+        return agent
+    return make
+
+
+@pytest.fixture(scope="session")
+def stub_handler():
+    """Request handler class of the ChainSync API stub (RAML examples)"""
+    spec = importlib.util.spec_from_file_location("chainsync_stub_server", STUB_SERVER_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.StubHandler
+
+
+@pytest.fixture
+def chainsync_stub(stub_handler):
+    """Base URL of a ChainSync API stub on a free local port; per-endpoint request counts reset"""
+    stub_handler.latency_ms = 0.0
+    stub_handler.strict = False
+    stub_handler.counts = {}
+    server = ThreadingHTTPServer(("127.0.0.1", 0), stub_handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/api"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def memory_agent(tmp_path):
+    """Memory agent on a fresh persist directory with the offline hashing embeddings"""
+    from agents.memory_agent import MemoryEnabledAgent
+
+    agent = MemoryEnabledAgent(
+        persist_directory=str(tmp_path / "chroma"),
+        embedding_backend="hashing",
+        similarity_threshold=0.0
+    )
+    yield agent
+    agent.stop()
+
+
+@pytest.fixture
+def make_incident():
+    """Factory for incident payloads in the store_incident shape"""
+    def make(
+        number: int,
+        incident_type: str = "WATER_CONTAMINATION",
+        facility_id: str = "Atlanta_WTP",
+        outcome: str = "SUCCESS",
+        cost=15000,
+        resolution_time="6 hours",
+        timestamp: str = "2024-11-08T20:30:00Z",
+        context: str = ""
+    ):
+        return {
+            "incident_id": f"INC-{number}",
+            "incident_type": incident_type,
+            "facility_id": facility_id,
+            "timestamp": timestamp,
+            "sensor_data": {"ecoli": number % 7, "ph": 7.1},
+            "context": context or f"incident {number} at {facility_id}",
+            "details": {
+                "outcome": outcome,
+                "resolution_time": resolution_time,
+                "cost": cost,
+                "actions_taken": ["Chlorine boost", "Flushing"],
+                "lessons_learned": "Boost chlorine early after heavy rain"
+            }
+        }
+    return make
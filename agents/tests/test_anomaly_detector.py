@@ -0,0 +1,70 @@
+"""
+Tests for the streaming anomaly detector
+"""
+
+import numpy as np
+
+from agents.anomaly_detector import StreamingAnomalyDetector
+
+
+def trends(detector, station_id):
+    return {t["parameter"]: t for t in detector.get_station_trends(station_id)}
+
+
+def test_rolling_statistics_match_numpy():
+    detector = StreamingAnomalyDetector(window=5, min_samples=100)
+    values = [1.0, 4.0, 2.0, 8.0, 5.0, 7.0, 3.0]
+    for i, value in enumerate(values):
+        detector.ingest_batch(["S1"], ["ph"], [value], [i * 60.0])
+
+    series = trends(detector, "S1")["ph"]
+    assert series["samples"] == len(values)
+    assert series["rolling_mean"] == round(np.mean(values[-5:]), 4)
+    assert series["rolling_std"] == round(np.std(values[-5:]), 4)
+
+
+def test_repeated_series_in_one_batch_are_applied_in_order():
+    detector = StreamingAnomalyDetector(window=10, min_samples=100)
+    detector.ingest_batch(["S1", "S1", "S2", "S1"], ["ph"] * 4, [1.0, 2.0, 9.0, 3.0], [0.0, 60.0, 60.0, 120.0])
+
+    series = trends(detector, "S1")["ph"]
+    assert series["samples"] == 3
+    assert series["last_value"] == 3.0
+    assert series["rolling_mean"] == 2.0
+
+
+def test_spike_is_flagged_after_min_samples():
+    detector = StreamingAnomalyDetector(window=30, min_samples=10, z_threshold=3.0)
+    rng = np.random.default_rng(0)
+    baseline = 7.0 + rng.normal(0, 0.05, 20)
+    detector.ingest_batch(["S1"] * 20, ["ph"] * 20, baseline, np.arange(20) * 60.0)
+    assert detector.get_flagged() == []
+
+    flagged = detector.ingest_batch(["S1"], ["ph"], [9.0], [21 * 60.0])
+    assert [f["station_id"] for f in flagged] == ["S1"]
+    assert "SPIKE" in flagged[0]["flags"]
+
+
+def test_full_detector_recycles_a_series_not_used_by_the_batch():
+    # Regression: a lookup of A did not count as use, so C recycled A's slot and both
+    # readings landed in one ring buffer
+    detector = StreamingAnomalyDetector(max_series=2, min_samples=100)
+    detector.ingest_batch(["A", "B"], ["p", "p"], [1.0, 50.0], [0.0, 0.0])
+    detector.ingest_batch(["A", "C"], ["p", "p"], [2.0, 100.0], [60.0, 60.0])
+
+    a, c = trends(detector, "A")["p"], trends(detector, "C")["p"]
+    assert (a["samples"], a["rolling_mean"]) == (2, 1.5)
+    assert (c["samples"], c["rolling_mean"]) == (1, 100.0)
+    assert trends(detector, "B") == {}
+    assert detector.get_statistics()["evictions"] == 1
+
+
+def test_batch_with_more_series_than_capacity_skips_the_overflow():
+    detector = StreamingAnomalyDetector(max_series=2, min_samples=100)
+    detector.ingest_batch(["A", "B", "C"], ["p"] * 3, [1.0, 2.0, 3.0], [0.0, 0.0, 0.0])
+
+    stats = detector.get_statistics()
+    assert stats["tracked_series"] == 2
+    assert stats["dropped_readings"] == 1
+    assert trends(detector, "A")["p"]["last_value"] == 1.0
+    assert trends(detector, "B")["p"]["last_value"] == 2.0
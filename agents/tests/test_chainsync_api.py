@@ -0,0 +1,86 @@
+"""
+Tests for the ChainSync platform API client and the live data tools, against the API stub
+"""
+
+import json
+import threading
+
+import httpx
+import pytest
+
+from agents.chainsync_api import ChainSyncAPIError, ChainSyncDataClient
+from agents.reasoning_agent import MultiStepReasoningAgent
+
+
+@pytest.fixture
+def client(chainsync_stub):
+    http_client = httpx.Client(base_url=chainsync_stub, timeout=5.0)
+    yield ChainSyncDataClient(http_client, ttl_seconds=15.0)
+    http_client.close()
+
+
+def test_facility_station_and_vehicles(client):
+    facility = client.get_facility("Atlanta_WTP")
+    assert facility["facilityId"] == "Atlanta_WTP"
+
+    station = client.get_station_data("STATION-42")
+    assert station["stationId"] == "STATION-42"
+
+    vehicles = client.list_vehicles(availability_status="AVAILABLE", emergency_capable=True)
+    assert vehicles
+    assert all(vehicle["emergencyCapability"]["availabilityStatus"] == "AVAILABLE" for vehicle in vehicles)
+
+
+def test_concurrent_identical_requests_share_one_upstream_call(client, stub_handler):
+    stub_handler.latency_ms = 200
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(client.get_facility("Macon_WTP")))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(results) == 8
+    assert all(result == results[0] for result in results)
+    assert stub_handler.counts["environmental-facilities"] == 1
+    stats = client.get_statistics()
+    assert stats["upstream_calls"] == 1
+    assert stats["coalesced"] == 7
+
+
+def test_responses_are_cached_and_copied(client, stub_handler):
+    first = client.get_facility("Atlanta_WTP")
+    first["facilityName"] = "changed by the caller"
+    second = client.get_facility("Atlanta_WTP")
+
+    assert second["facilityName"] != "changed by the caller"
+    assert stub_handler.counts["environmental-facilities"] == 1
+
+
+def test_errors_are_raised_and_not_cached(client, stub_handler):
+    stub_handler.strict = True
+    with pytest.raises(ChainSyncAPIError) as error:
+        client.get_facility("NO_SUCH_FACILITY")
+    assert error.value.status_code == 404
+
+    with pytest.raises(ChainSyncAPIError):
+        client.get_facility("NO_SUCH_FACILITY")
+    assert stub_handler.counts["environmental-facilities"] == 2
+
+
+def test_reasoning_tools_read_the_platform(client):
+    agent = MultiStepReasoningAgent(llm_api_key="sk-test", chainsync_data=client)
+    tools = {tool.name: tool.func for tool in agent.tools}
+
+    facility = json.loads(tools["get_facility_status"]('"Atlanta_WTP"'))
+    assert facility["facility_id"] == "Atlanta_WTP"
+    assert "error" not in facility
+
+    station = json.loads(tools["get_station_data"]("STATION-42"))
+    assert station["station_id"] == "STATION-42"
+
+    vehicles = json.loads(tools["find_service_vehicles"]("{}"))
+    assert vehicles["vehicles_found"] == len(vehicles["vehicles"]) > 0
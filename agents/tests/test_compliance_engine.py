@@ -0,0 +1,55 @@
+"""
+Tests for the vectorized sensor compliance engine
+"""
+
+from agents.compliance_engine import SensorComplianceEngine
+from agents.regulatory_rules import RegulatoryRuleStore
+
+LIMITS = {
+    "ecoli": {"max": 0, "regulation": "EPA SDWA"},
+    "ph": {"min": 6.5, "max": 8.5, "regulation": "EPA SDWA"},
+    "chlorine": {"min": 0.5, "max": 4.0, "regulation": "EPA SDWA"}
+}
+
+
+def test_zero_max_limit_does_not_divide_by_zero():
+    engine = SensorComplianceEngine(LIMITS)
+
+    clean = engine.evaluate({"ecoli": 0})
+    assert clean["severity"] == "NORMAL"
+    assert clean["violations"] == [] and clean["warnings"] == []
+
+    contaminated = engine.evaluate({"ecoli": 3})
+    assert contaminated["severity"] == "CRITICAL"
+    assert contaminated["violations"][0].startswith("ecoli: 3 exceeds max 0")
+
+
+def test_min_max_and_warning_bands():
+    engine = SensorComplianceEngine(LIMITS)
+    low, near, high = engine.evaluate_batch([{"chlorine": 0.2}, {"ph": 8.0}, {"ph": 9.1}])
+
+    assert low["violations"] == ["chlorine: 0.2 below min 0.5 (EPA SDWA)"]
+    assert near["severity"] == "WARNING" and near["warnings"] == ["ph at 94% of limit (8.0/8.5)"]
+    assert high["severity"] == "CRITICAL" and "exceeds max 8.5" in high["violations"][0]
+
+
+def test_non_numeric_values_are_reported_not_raised():
+    result = SensorComplianceEngine(LIMITS).evaluate({"ph": "n/a", "chlorine": 1.0, "unknown_sensor": 5})
+
+    assert result["invalid_parameters"] == ["ph"]
+    assert result["severity"] == "NORMAL"
+    assert result["total_parameters_checked"] == 3
+
+
+def test_batch_matches_single_evaluation():
+    engine = SensorComplianceEngine(LIMITS)
+    readings = [{"ecoli": i % 2, "ph": 6.0 + i * 0.4, "chlorine": 0.3 + i * 0.5} for i in range(8)]
+
+    assert engine.evaluate_batch(readings) == [engine.evaluate(reading) for reading in readings]
+
+
+def test_bundled_rules_compile():
+    rules = RegulatoryRuleStore().current
+    result = rules.engine().evaluate({"ecoli": 0, "ph": 7.2, "turbidity": 0.3})
+
+    assert result["severity"] == "NORMAL"
@@ -0,0 +1,60 @@
+"""
+Tests for the pluggable embedding backends
+"""
+
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from agents.embedding_backends import HashingEmbeddingFunction, OpenAIEmbeddingFunction, create_embedding_function
+
+
+def test_hashing_embeddings_are_deterministic_and_normalized():
+    function, model = create_embedding_function("hashing", model_name="hashing-256")
+    first, second, empty = function(["Chlorine boost after E. coli", "Chlorine boost after E. coli", ""])
+
+    assert model == "hashing:hashing-256"
+    assert len(first) == 256 and first == second
+    assert np.linalg.norm(first) == pytest.approx(1.0)
+    assert empty == [0.0] * 256
+
+
+def test_hashing_embeddings_are_lexically_similar():
+    function = HashingEmbeddingFunction()
+    query, near, far = (np.array(v) for v in function([
+        "E. coli detected at treatment plant, chlorine boost",
+        "E. coli detected at the plant, boost chlorine",
+        "Stack emissions above permit at refinery"
+    ]))
+
+    assert query @ near > query @ far
+
+
+def test_backend_selection_errors():
+    with pytest.raises(ValueError, match="Unknown embedding backend"):
+        create_embedding_function("word2vec")
+    with pytest.raises(ValueError, match="OPENAI_API_KEY"):
+        create_embedding_function("openai")
+
+
+def test_openai_embeddings_keep_input_order():
+    calls = []
+
+    def create(input, model):
+        calls.append((input, model))
+        return SimpleNamespace(data=[
+            SimpleNamespace(index=1, embedding=[2.0]),
+            SimpleNamespace(index=0, embedding=[1.0])
+        ])
+
+    client = SimpleNamespace(embeddings=SimpleNamespace(create=create))
+    function = OpenAIEmbeddingFunction(client, "text-embedding-3-small")
+
+    assert function(["first\nline", "second"]) == [[1.0], [2.0]]
+    assert calls == [(["first line", "second"], "text-embedding-3-small")]
+
+
+def test_memory_agent_records_the_embedding_model(memory_agent):
+    assert memory_agent.embedding_model == "hashing:hashing-512"
+    assert memory_agent.collection.metadata["embedding_model"] == "hashing:hashing-512"
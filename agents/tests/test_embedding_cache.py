@@ -0,0 +1,71 @@
+"""
+Tests for the content-addressed embedding cache
+"""
+
+from array import array
+
+from agents.embedding_cache import CachedEmbeddingFunction
+
+
+class CountingEmbeddings:
+    """Embedding function recording every batch it is asked to embed"""
+
+    def __init__(self):
+        self.batches = []
+
+    def __call__(self, input):
+        self.batches.append(list(input))
+        return [[float(len(text)), 0.1, 1 / 3] for text in input]
+
+
+def test_each_distinct_text_is_embedded_once():
+    backend = CountingEmbeddings()
+    cache = CachedEmbeddingFunction(backend, model_name="test-model")
+
+    first = cache(["pump failure", "pump failure", "boil notice"])
+    second = cache(["boil notice", "pump failure"])
+
+    assert backend.batches == [["pump failure", "boil notice"]]
+    assert first[0] == first[1] == second[1]
+    assert first[2] == second[0]
+    stats = cache.get_statistics()
+    assert stats["misses"] == 2 and stats["memory_hits"] == 2
+
+
+def test_vectors_are_stored_as_float32_and_returned_as_lists():
+    cache = CachedEmbeddingFunction(CountingEmbeddings(), model_name="test-model")
+
+    miss = cache(["abc"])[0]
+    hit = cache(["abc"])[0]
+
+    assert isinstance(hit, list) and miss == hit
+    assert hit[2] == array('f', [1 / 3])[0] != 1 / 3
+    assert all(isinstance(vector, array) and vector.typecode == 'f' for vector in cache._lru.values())
+    assert cache.get_statistics()["bytes_in_memory"] == 3 * 4
+
+
+def test_lru_evicts_the_least_recently_used():
+    backend = CountingEmbeddings()
+    cache = CachedEmbeddingFunction(backend, model_name="test-model", max_entries=2)
+
+    cache(["a", "b"])
+    cache(["a"])
+    cache(["c"])
+    cache(["a", "b"])
+
+    assert backend.batches == [["a", "b"], ["c"], ["b"]]
+
+
+def test_disk_store_survives_restart_and_is_keyed_by_model(tmp_path):
+    path = str(tmp_path / "embeddings.sqlite")
+    first = CachedEmbeddingFunction(CountingEmbeddings(), model_name="test-model", disk_path=path)
+    expected = first(["pump failure"])
+
+    backend = CountingEmbeddings()
+    restarted = CachedEmbeddingFunction(backend, model_name="test-model", disk_path=path)
+    assert restarted(["pump failure"]) == expected
+    assert backend.batches == [] and restarted.get_statistics()["disk_hits"] == 1
+
+    other_model = CachedEmbeddingFunction(backend, model_name="other-model", disk_path=path)
+    other_model(["pump failure"])
+    assert backend.batches == [["pump failure"]]
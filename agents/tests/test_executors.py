@@ -0,0 +1,67 @@
+"""
+Tests for the sized executor pools
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from agents.executors import ExecutorPool
+
+
+@pytest.fixture
+def pool():
+    pool = ExecutorPool("test", max_workers=1)
+    yield pool
+    pool.shutdown()
+
+
+def test_runs_blocking_calls_off_the_event_loop(pool):
+    async def main():
+        loop_thread = threading.get_ident()
+        worker_thread = await pool.run(threading.get_ident)
+        return loop_thread, worker_thread
+
+    loop_thread, worker_thread = asyncio.run(main())
+
+    assert loop_thread != worker_thread
+    stats = pool.get_statistics()
+    assert stats["completed"] == 1 and stats["queue_depth"] == 0 and stats["active"] == 0
+
+
+def test_failures_are_raised_and_counted(pool):
+    def fail():
+        raise ValueError("chroma unavailable")
+
+    with pytest.raises(ValueError):
+        asyncio.run(pool.run(fail))
+    assert pool.get_statistics()["failed"] == 1
+
+
+def test_queue_depth_recovers_when_queued_calls_time_out(pool):
+    release = threading.Event()
+
+    async def main():
+        blocker = asyncio.ensure_future(pool.run(release.wait))
+        await asyncio.sleep(0.05)
+        for _ in range(3):
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(pool.run(time.sleep, 0), timeout=0.05)
+        release.set()
+        await blocker
+
+    asyncio.run(main())
+
+    stats = pool.get_statistics()
+    assert stats["queue_depth"] == 0 and stats["cancelled"] == 3
+    assert stats["completed"] == 1
+
+
+def test_rejects_work_after_shutdown(pool):
+    pool.shutdown()
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(pool.run(time.sleep, 0))
+    assert pool.get_statistics()["queue_depth"] == 0
@@ -0,0 +1,120 @@
+"""
+Tests for the shared keep-alive HTTP client pool and its metrics
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import socket
+import threading
+import time
+
+import httpx
+import pytest
+
+from agents.http_clients import CHAINSYNC_CLIENT, HttpClientPool
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        if self.path == "/slow":
+            time.sleep(0.3)
+        body = b'{"ok": true}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def pool():
+    pool = HttpClientPool(http2=False)
+    yield pool
+    pool.close()
+
+
+def test_clients_are_shared_per_name(pool, server_url):
+    first = pool.client(CHAINSYNC_CLIENT, base_url=server_url, read_timeout=5)
+    again = pool.client(CHAINSYNC_CLIENT, base_url="http://ignored", read_timeout=99)
+
+    assert first is again
+    assert str(again.base_url).rstrip("/") == server_url
+    assert first.timeout.read == 5 and first.timeout.connect == pool.connect_timeout
+    assert pool.client("callbacks") is not first
+
+
+def test_sequential_requests_reuse_one_connection(pool, server_url):
+    client = pool.client(CHAINSYNC_CLIENT, base_url=server_url)
+
+    for _ in range(5):
+        assert client.get("/facilities").json() == {"ok": True}
+
+    stats = pool.get_statistics()["clients"][CHAINSYNC_CLIENT]
+    assert stats["requests"] == 5 and stats["failed"] == 0
+    assert stats["connections_opened"] == 1 and stats["connection_reuse_rate"] == 0.8
+    assert stats["in_flight"] == 0 and stats["open_connections"] == 1 and stats["idle_connections"] == 1
+    assert stats["http_versions"] == {"HTTP/1.1": 5}
+
+
+def test_requests_beyond_the_connection_limit_count_as_pool_waits(pool, server_url):
+    client = pool.client(CHAINSYNC_CLIENT, base_url=server_url, max_connections=1)
+
+    threads = [threading.Thread(target=client.get, args=("/slow",)) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stats = pool.get_statistics()["clients"][CHAINSYNC_CLIENT]
+    assert stats["pool_waits"] == 1 and stats["peak_in_flight"] == 2
+    assert stats["connections_opened"] == 1 and stats["in_flight"] == 0
+
+
+def test_failed_requests_release_their_slot(pool):
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        closed_port = probe.getsockname()[1]
+    client = pool.client(CHAINSYNC_CLIENT, base_url=f"http://127.0.0.1:{closed_port}")
+
+    with pytest.raises(httpx.ConnectError):
+        client.get("/facilities")
+
+    stats = pool.get_statistics()["clients"][CHAINSYNC_CLIENT]
+    assert (stats["requests"], stats["failed"], stats["in_flight"]) == (1, 1, 0)
+
+
+def test_warm_up_opens_a_connection_ahead_of_the_first_request(pool, server_url):
+    client = pool.client(CHAINSYNC_CLIENT, base_url=server_url)
+
+    pool.warm_up().join(5)
+    client.get("/facilities")
+
+    stats = pool.get_statistics()["clients"][CHAINSYNC_CLIENT]
+    assert stats["requests"] == 2 and stats["connections_opened"] == 1
+
+
+def test_close_drops_the_clients(pool, server_url):
+    client = pool.client(CHAINSYNC_CLIENT, base_url=server_url)
+    pool.close()
+
+    assert pool.get_statistics()["clients"] == {}
+    assert pool.client(CHAINSYNC_CLIENT, base_url=server_url) is not client
@@ -0,0 +1,104 @@
+"""
+Tests for the typed incident metadata parsers and outcome aggregates
+"""
+
+import pytest
+
+from agents.incident_schema import (
+    build_incident_metadata,
+    group_outcomes,
+    parse_cost_usd,
+    parse_duration_hours,
+    summarize_outcomes,
+    to_epoch,
+    upgrade_metadata,
+)
+
+
+@pytest.mark.parametrize("value, expected", [
+    (None, None),
+    (True, None),
+    (6, 6.0),
+    (2.5, 2.5),
+    ("6 hours", 6.0),
+    ("1.5h", 1.5),
+    ("2 days", 48.0),
+    ("1 week", 168.0),
+    ("30 minutes", 0.5),
+    ("2 months", 1460.0),
+    ("1 day 6 hours", 30.0),
+    ("12", 12.0),
+    ("45 seconds", 0.0125),
+    ("90 secs", 0.025),
+    ("5 min", 5 / 60),
+    ("2 wks", 336.0),
+    ("6-8 hours", 7.0),
+    ("6 to 8 hours", 7.0),
+    ("6\u20138h", 7.0),
+    ("1-2 days 4 hours", 40.0),
+    ("3 shifts", None),
+    ("1 day 2 fortnights", None),
+    ("unknown", None),
+    ("", None),
+])
+def test_parse_duration_hours(value, expected):
+    assert parse_duration_hours(value) == expected
+
+
+@pytest.mark.parametrize("value, expected", [
+    (None, None),
+    (15000, 15000.0),
+    ("15000", 15000.0),
+    ("$15,000", 15000.0),
+    (" $1,250.50 ", 1250.5),
+    ("a lot", None),
+])
+def test_parse_cost_usd(value, expected):
+    assert parse_cost_usd(value) == expected
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("1970-01-01T00:00:00Z", 0.0),
+    ("1970-01-01T01:00:00", 3600.0),
+    ("1970-01-01T02:00:00+01:00", 3600.0),
+    (86400, 86400.0),
+    ("yesterday", None),
+    (None, None),
+])
+def test_to_epoch(value, expected):
+    assert to_epoch(value) == expected
+
+
+def test_metadata_typed_fields_and_upgrade():
+    metadata = build_incident_metadata({
+        "incident_id": "INC-1",
+        "incident_type": "WATER_CONTAMINATION",
+        "facility_id": "Atlanta_WTP",
+        "timestamp": "2024-01-15T10:30:00Z",
+        "details": {"outcome": "SUCCESS", "resolution_time": "6 hours", "cost": "$15,000"}
+    })
+    assert metadata["cost_usd"] == 15000.0
+    assert metadata["resolution_hours"] == 6.0
+    assert metadata["timestamp_epoch"] == to_epoch("2024-01-15T10:30:00Z")
+
+    assert upgrade_metadata(metadata) is None
+    legacy = {"cost": "500", "resolution_time": "2 days", "timestamp": "unreadable"}
+    assert upgrade_metadata(legacy) == {"cost_usd": 500.0, "resolution_hours": 48.0, "schema_version": 2}
+
+
+def test_group_outcomes_skips_missing_values():
+    rows = [
+        {"incident_type": "SPILL", "outcome": "SUCCESS", "cost_usd": 100.0, "resolution_hours": 2.0},
+        {"incident_type": "SPILL", "outcome": "FAILURE", "cost_usd": 300.0},
+        {"incident_type": "LEAK", "outcome": "SUCCESS"},
+    ]
+    groups = group_outcomes(rows, "incident_type")
+
+    assert list(groups) == ["SPILL", "LEAK"]
+    assert groups["SPILL"] == {
+        "count": 2, "successes": 1, "success_rate": 0.5,
+        "average_cost_usd": 200.0, "average_resolution_hours": 2.0
+    }
+    assert groups["LEAK"]["average_cost_usd"] is None
+    assert summarize_outcomes(rows)["count"] == 3
+    assert summarize_outcomes([])["count"] == 0
@@ -0,0 +1,226 @@
+"""
+Tests for the memory agent's incident store, on hashing embeddings
+"""
+
+import chromadb
+import numpy as np
+import pytest
+
+from agents.memory_agent import MemoryEnabledAgent
+
+
+def test_bulk_store_embeds_and_writes_in_batches(memory_agent, make_incident, monkeypatch):
+    embed_sizes, write_sizes = [], []
+    embed = memory_agent.embedding_function.__call__
+    add = memory_agent._add_embedded
+    monkeypatch.setattr(
+        memory_agent, "embedding_function", lambda texts: embed_sizes.append(len(texts)) or embed(texts)
+    )
+    monkeypatch.setattr(memory_agent, "_add_embedded", lambda batch: write_sizes.append(len(batch)) or add(batch))
+
+    result = memory_agent.store_incidents_bulk(
+        [make_incident(i) for i in range(25)], embed_batch_size=10, write_batch_size=8
+    )
+
+    assert result["status"] == "success"
+    assert result["stored"] == 25 and memory_agent.collection.count() == 25
+    assert embed_sizes == [10, 10, 5]
+    assert write_sizes == [8, 8, 8, 1]
+
+
+def test_bulk_store_reports_bad_records_individually(memory_agent, make_incident):
+    incidents = [make_incident(1), make_incident(1), {"incident_id": "INC-bad"}, make_incident(2)]
+
+    result = memory_agent.store_incidents_bulk(incidents)
+
+    assert result["status"] == "partial"
+    assert [r["status"] for r in result["results"]] == ["success", "error", "error", "success"]
+    assert "Duplicate incident_id" in result["results"][1]["message"]
+    assert result["results"][2]["incident_id"] == "INC-bad"
+    assert memory_agent.collection.count() == 2
+
+
+def test_rejected_chunk_is_retried_record_by_record(memory_agent, make_incident, monkeypatch):
+    add = memory_agent._add_embedded
+
+    def reject_chunks_and_inc_3(batch):
+        if len(batch) > 1 or batch[0][1] == "INC-3":
+            raise ValueError("rejected")
+        add(batch)
+
+    monkeypatch.setattr(memory_agent, "_add_embedded", reject_chunks_and_inc_3)
+    result = memory_agent.store_incidents_bulk([make_incident(i) for i in range(5)])
+
+    assert result["stored"] == 4 and result["failed"] == 1
+    assert result["results"][3] == {"incident_id": "INC-3", "status": "error", "message": "rejected"}
+    assert sorted(memory_agent.collection.get()["ids"]) == ["INC-0", "INC-1", "INC-2", "INC-4"]
+
+
+def test_upsert_operations(memory_agent, make_incident):
+    incident = make_incident(1)
+    assert memory_agent.store_incident(incident)["operation"] == "created"
+    assert memory_agent.store_incident(incident)["operation"] == "unchanged"
+
+    incident["details"]["cost"] = 22000
+    assert memory_agent.store_incident(incident)["operation"] == "metadata_updated"
+
+    incident["details"]["outcome"] = "FAILURE"
+    assert memory_agent.store_incident(incident)["operation"] == "updated"
+
+    assert memory_agent.collection.count() == 1
+    assert memory_agent.get_statistics()["writes"]["unchanged"] == 1
+
+
+def test_only_new_and_changed_texts_are_embedded(memory_agent, make_incident):
+    incidents = [make_incident(i) for i in range(10)]
+    memory_agent.store_incidents_bulk(incidents)
+    misses = memory_agent.embedding_function.get_statistics()["misses"]
+
+    incidents[0]["details"]["cost"] = 1
+    incidents[1]["context"] = "changed context"
+    result = memory_agent.store_incidents_bulk(incidents)
+
+    assert result["operations"] == {"created": 0, "updated": 1, "metadata_updated": 1, "unchanged": 8}
+    assert memory_agent.embedding_function.get_statistics()["misses"] == misses + 1
+
+
+def test_pattern_index_matches_the_store(memory_agent, make_incident):
+    incidents = [
+        make_incident(i, incident_type=("SPILL" if i % 3 else "LEAK"), outcome=("SUCCESS" if i % 2 else "FAILURE"),
+                      cost=1000 * i, resolution_time=f"{i} hours")
+        for i in range(1, 13)
+    ]
+    memory_agent.store_incidents_bulk(incidents)
+    incidents[0]["details"]["outcome"] = "SUCCESS"
+    incidents[1]["details"]["cost"] = 99000
+    memory_agent.store_incidents_bulk(incidents[:2])
+
+    indexed = memory_agent.aggregate_patterns("incident_type")
+    stored = memory_agent.aggregate_patterns("incident_type", {"outcome": ["SUCCESS", "FAILURE"]})
+
+    assert indexed["source"] == "index" and stored["source"] == "store"
+    assert indexed["groups"] == stored["groups"]
+    assert indexed["overall"] == stored["overall"]
+    assert memory_agent.pattern_index.incident_count == 12
+
+
+def test_pattern_index_survives_reopen(memory_agent, make_incident, tmp_path):
+    memory_agent.store_incidents_bulk([make_incident(i) for i in range(5)])
+    expected = memory_agent.pattern_index.lookup()
+    memory_agent.stop()
+
+    reopened = MemoryEnabledAgent(persist_directory=str(tmp_path / "chroma"), embedding_backend="hashing")
+    try:
+        assert reopened.pattern_index.incident_count == 5
+        assert reopened.pattern_index.lookup() == expected
+    finally:
+        reopened.stop()
+
+
+def test_near_duplicates_are_flagged_and_collapsed(memory_agent, make_incident):
+    original = make_incident(1, context="pump failure after storm surge")
+    copy = dict(original, incident_id="INC-1-copy")
+    other = make_incident(2, incident_type="AIR_QUALITY", context="stack emissions above permit",
+                          outcome="FAILURE")
+
+    memory_agent.store_incident(original)
+    assert memory_agent.store_incident(copy)["duplicate_of"] == "INC-1"
+    assert memory_agent.store_incident(other)["duplicate_of"] is None
+
+    recall = memory_agent.recall_similar_incidents(original, top_k=5)
+    ids = [incident["incident_id"] for incident in recall["similar_incidents"]]
+    assert ids.count("INC-1") + ids.count("INC-1-copy") == 1
+    assert recall["recall"]["duplicates_collapsed"] == 1
+
+
+def _cosine(memory_agent, first: str, second: str) -> float:
+    a, b = (np.asarray(v) for v in memory_agent.embedding_function([first, second]))
+    return float(a @ b / (np.linalg.norm(a) * np.linalg.norm(b)))
+
+
+def test_similarity_is_cosine_in_collection_and_archive(memory_agent, make_incident):
+    assert memory_agent.collection.metadata["hnsw:space"] == "cosine"
+    stored = make_incident(1, timestamp="2020-01-01T00:00:00Z", context="pump failure after storm surge")
+    query = make_incident(2, context="pump failure after heavy rain")
+    memory_agent.store_incident(stored)
+    expected = _cosine(
+        memory_agent, memory_agent._create_incident_text(query), memory_agent._create_incident_text(stored)
+    )
+
+    recalled = memory_agent.recall_similar_incidents(query, top_k=1)["similar_incidents"][0]
+    assert recalled["similarity_score"] == pytest.approx(expected, abs=1e-3)
+
+    memory_agent.apply_retention(max_age_days=30)
+    archived = memory_agent.recall_similar_incidents(query, top_k=1, include_archive=True)["similar_incidents"][0]
+    assert archived["archived"] and archived["similarity_score"] == pytest.approx(expected, abs=2e-3)
+
+
+def test_legacy_l2_collection_reports_cosine(tmp_path, make_incident):
+    path = str(tmp_path / "legacy")
+    client = chromadb.PersistentClient(path=path)
+    client.create_collection(MemoryEnabledAgent.COLLECTION_NAME, metadata={"schema_version": 2})
+    del client
+
+    agent = MemoryEnabledAgent(persist_directory=path, embedding_backend="hashing")
+    try:
+        assert agent.distance_space == "l2"
+        stored = make_incident(1, context="pump failure after storm surge")
+        query = make_incident(2, context="pump failure after heavy rain")
+        agent.store_incident(stored)
+        expected = _cosine(agent, agent._create_incident_text(query), agent._create_incident_text(stored))
+
+        recalled = agent.recall_similar_incidents(query, top_k=1)["similar_incidents"][0]
+        assert recalled["similarity_score"] == pytest.approx(expected, abs=1e-3)
+    finally:
+        agent.stop()
+
+
+def test_migration_does_not_overwrite_a_concurrent_write(memory_agent, make_incident, monkeypatch):
+    memory_agent.store_incidents_bulk([make_incident(i) for i in range(3)])
+    # Back to schema version 1, with a legacy cost string the migration would parse
+    ids = ["INC-0", "INC-1", "INC-2"]
+    memory_agent.collection.update(ids=ids, metadatas=[{"schema_version": 1, "cost": "$500"}] * 3)
+
+    scan = memory_agent._iter_metadata
+    scans = []
+
+    def scan_then_store(batch_size=None):
+        yield from scan(batch_size)
+        scans.append(1)
+        if len(scans) == 1:
+            # A store lands between the migration's scan and its batch updates
+            memory_agent.store_incident(make_incident(1, cost=20000))
+
+    monkeypatch.setattr(memory_agent, "_iter_metadata", scan_then_store)
+    result = memory_agent.migrate_metadata(batch_size=2)
+
+    assert (result["scanned"], result["migrated"]) == (3, 2)
+    stored = memory_agent.collection.get(ids=ids, include=["metadatas"])
+    costs = {record_id: metadata["cost_usd"] for record_id, metadata in zip(stored["ids"], stored["metadatas"])}
+    assert costs == {"INC-0": 500.0, "INC-1": 20000.0, "INC-2": 500.0}
+
+
+def test_restoring_an_archived_incident_is_counted_once(memory_agent, make_incident, tmp_path):
+    old = [make_incident(i, timestamp="2020-01-01T00:00:00Z", outcome="FAILURE") for i in range(3)]
+    memory_agent.store_incidents_bulk(old)
+    memory_agent.apply_retention(max_age_days=30)
+    assert memory_agent.archive.count == 3 and memory_agent.collection.count() == 0
+
+    old[0]["details"]["outcome"] = "SUCCESS"
+    assert memory_agent.store_incident(old[0])["operation"] == "created"
+
+    assert memory_agent.archive.count == 2 and memory_agent.collection.count() == 1
+    assert memory_agent.pattern_index.incident_count == 3
+    assert memory_agent.pattern_index.lookup()["successes"] == 1
+    archived_ids = {hit["id"] for hit in memory_agent.archive.search(
+        memory_agent.embedding_function(["incident"])[0], 10
+    )}
+    assert archived_ids == {"INC-1", "INC-2"}
+
+    memory_agent.stop()
+    reopened = MemoryEnabledAgent(persist_directory=str(tmp_path / "chroma"), embedding_backend="hashing")
+    try:
+        assert reopened.pattern_index.incident_count == 3
+        assert reopened.pattern_index.lookup()["successes"] == 1
+    finally:
+        reopened.stop()
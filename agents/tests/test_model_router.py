@@ -0,0 +1,89 @@
+"""
+Tests for small/large model routing and escalation
+"""
+
+import json
+
+from langchain_core.messages import AIMessage
+
+from agents.model_router import LARGE_TIER, SMALL_TIER, ModelRouter
+
+ANALYSIS_REQUEST = {
+    "incident_id": "INC-ROUTE",
+    "incident_type": "WATER_CONTAMINATION",
+    "facility_id": "Atlanta_WTP",
+    "sensor_data": {"ecoli": 2},
+    "urgency": "MEDIUM"
+}
+
+
+def _submit(confidence: float, action: str = "BOIL_WATER_NOTICE") -> AIMessage:
+    recommendation = {
+        "action": action, "urgency": "MEDIUM", "confidence": confidence,
+        "reasoning": "E. coli detected", "fallback_plan": "Switch to the backup intake"
+    }
+    return AIMessage(content="Thought: done", additional_kwargs={
+        "function_call": {"name": "submit_recommendation", "arguments": json.dumps(recommendation)}
+    })
+
+
+def test_routing_is_disabled_without_a_distinct_small_model():
+    for router in (ModelRouter(), ModelRouter(large_model="gpt-4o", small_model="gpt-4o")):
+        assert not router.enabled
+        assert router.initial_tier({"urgency": "LOW"}) == (LARGE_TIER, "routing_disabled")
+
+
+def test_initial_tier_by_urgency():
+    router = ModelRouter(small_model="gpt-4o-mini")
+
+    assert router.initial_tier({"urgency": "critical"}) == (LARGE_TIER, "urgency")
+    assert router.initial_tier({"urgency": "HIGH"}) == (LARGE_TIER, "urgency")
+    assert router.initial_tier({"urgency": "LOW"}) == (SMALL_TIER, "default")
+    assert router.initial_tier({}) == (SMALL_TIER, "default")
+    assert router.get_statistics()["initial_routes"] == {"urgency": 2, "default": 2}
+
+
+def test_escalation_reasons():
+    router = ModelRouter(small_model="gpt-4o-mini", escalation_confidence=0.7)
+
+    assert router.escalation_reason(SMALL_TIER, None) == "parse_failure"
+    assert router.escalation_reason(SMALL_TIER, {"confidence": 0.5}) == "low_confidence"
+    assert router.escalation_reason(SMALL_TIER, {"confidence": "n/a"}) == "low_confidence"
+    assert router.escalation_reason(SMALL_TIER, {"confidence": 0.7}) is None
+    assert router.escalation_reason(LARGE_TIER, None) is None
+    assert router.get_statistics()["escalations"] == {"parse_failure": 1, "low_confidence": 2}
+
+
+def test_confident_small_tier_answers_are_kept(make_reasoning_agent):
+    agent = make_reasoning_agent([], fast_replies=[_submit(0.9)], fast_model="gpt-4o-mini")
+
+    result = agent.analyze_incident(ANALYSIS_REQUEST)
+
+    assert result["routing"] == {
+        "initial_tier": SMALL_TIER, "reason": "default", "final_tier": SMALL_TIER,
+        "model": "gpt-4o-mini", "escalation_reason": None
+    }
+    assert agent.llm.calls == []
+
+
+def test_low_confidence_small_tier_answers_escalate(make_reasoning_agent):
+    agent = make_reasoning_agent(
+        [_submit(0.9, action="CHLORINE_BOOST")], fast_replies=[_submit(0.4)], fast_model="gpt-4o-mini"
+    )
+
+    result = agent.analyze_incident(ANALYSIS_REQUEST)
+
+    assert result["routing"]["initial_tier"] == SMALL_TIER
+    assert result["routing"]["final_tier"] == LARGE_TIER
+    assert result["routing"]["escalation_reason"] == "low_confidence"
+    assert result["final_recommendation"]["action"] == "CHLORINE_BOOST"
+    assert len(agent.fast_llm.calls) == 1 and len(agent.llm.calls) == 1
+
+
+def test_high_urgency_starts_on_the_large_tier(make_reasoning_agent):
+    agent = make_reasoning_agent([_submit(0.9)], fast_model="gpt-4o-mini")
+
+    result = agent.analyze_incident({**ANALYSIS_REQUEST, "urgency": "HIGH"})
+
+    assert result["routing"]["initial_tier"] == LARGE_TIER and result["routing"]["reason"] == "urgency"
+    assert agent.fast_llm.calls == []
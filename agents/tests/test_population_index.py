@@ -0,0 +1,97 @@
+"""
+Tests for the census-block population index
+"""
+
+import csv
+import json
+import math
+
+import pytest
+
+from agents.population_index import BLOCK_COUNT_COLUMNS, EARTH_RADIUS_KM, PopulationIndex
+
+# (geoid, lat, lon, population, vulnerable, schools, hospitals, nursing_homes)
+BLOCKS = [
+    ("B-IN", 33.75, -84.40, 100, 10, 1, 0, 0),
+    ("B-HOLE", 33.70, -84.35, 200, 20, 0, 1, 0),
+    ("B-OVERLAP", 33.78, -84.22, 300, 30, 0, 0, 1),
+    ("B-SECOND", 33.60, -84.10, 400, 40, 2, 0, 0),
+    ("B-OUT", 34.50, -83.50, 500, 50, 0, 0, 0)
+]
+
+
+def _square(min_lon, min_lat, max_lon, max_lat):
+    return [[min_lon, min_lat], [max_lon, min_lat], [max_lon, max_lat], [min_lon, max_lat], [min_lon, min_lat]]
+
+
+@pytest.fixture
+def index(tmp_path):
+    blocks_path = tmp_path / "blocks.csv"
+    with open(blocks_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(("geoid", "latitude", "longitude") + BLOCK_COUNT_COLUMNS)
+        writer.writerows(BLOCKS)
+
+    zones_path = tmp_path / "zones.geojson"
+    zones_path.write_text(json.dumps({"type": "FeatureCollection", "features": [
+        {
+            "type": "Feature",
+            "properties": {"facility_id": "North_WTP", "facility_name": "North Plant"},
+            "geometry": {"type": "Polygon", "coordinates": [
+                _square(-84.45, 33.65, -84.20, 33.80),
+                _square(-84.37, 33.68, -84.33, 33.72)
+            ]}
+        },
+        {
+            "type": "Feature",
+            "properties": {"facility_id": "South_WTP"},
+            "geometry": {"type": "MultiPolygon", "coordinates": [
+                [_square(-84.25, 33.76, -84.15, 33.82)],
+                [_square(-84.15, 33.55, -84.05, 33.65)]
+            ]}
+        }
+    ]}))
+    return PopulationIndex(str(zones_path), str(blocks_path), cell_size_deg=0.05)
+
+
+def test_facility_aggregates_respect_holes_and_multipolygons(index):
+    north = index.facility_impact("North_WTP")
+    south = index.facility_impact("South_WTP")
+
+    assert north["facility_name"] == "North Plant"
+    assert (north["total_customers"], north["census_blocks"], north["schools"], north["nursing_homes"]) == (400, 2, 1, 1)
+    assert north["vulnerable_population_percentage"] == 10.0
+    assert (south["total_customers"], south["census_blocks"]) == (700, 2)
+    assert index.facility_impact("Unknown_WTP") is None
+
+
+def test_overlapping_blocks_are_attributed_to_the_first_zone(index):
+    stats = index.get_statistics()
+
+    assert stats["facilities"] == 2
+    assert stats["unserved_blocks"] == 2
+    impact = index.radius_impact(33.78, -84.22, 1)
+    assert impact["population"] == 300
+    assert impact["service_zones_affected"] == ["North_WTP"]
+
+
+def test_radius_impact_matches_a_brute_force_scan():
+    index = PopulationIndex()
+
+    for latitude, longitude, radius_km in ((33.75, -84.39, 5), (33.70, -84.30, 12.5), (34.0, -84.0, 0.5)):
+        lat1, lon1 = math.radians(latitude), math.radians(longitude)
+        expected = 0
+        for lat, lon, population in zip(index.lats, index.lons, index.counts[:, 0]):
+            lat2, lon2 = math.radians(lat), math.radians(lon)
+            a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+            if 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a)) <= radius_km:
+                expected += int(population)
+
+        assert index.radius_impact(latitude, longitude, radius_km)["population"] == expected
+
+
+def test_radius_outside_the_api_bounds_is_rejected(index):
+    with pytest.raises(ValueError):
+        index.radius_impact(33.75, -84.40, 0.05)
+    with pytest.raises(ValueError):
+        index.radius_impact(33.75, -84.40, 150)
@@ -0,0 +1,88 @@
+"""
+Tests for prompt compaction and the per-analysis token budget
+"""
+
+import json
+
+from langchain.schema import AgentAction
+
+from agents.prompt_budget import FINALIZE_NOTICE, PromptBudget, compact_json
+
+
+def _step(tool: str, observation: dict) -> tuple:
+    action = AgentAction(tool=tool, tool_input="{}", log=f"Thought: check\nAction: {tool}\nAction Input: {{}}")
+    return action, json.dumps(observation, indent=2)
+
+
+def _observation(i: int) -> dict:
+    return {
+        "facility_name": f"Facility {i}",
+        "capacity_mgd": 100 + i,
+        "notes": "long free-text description of the facility history " * 5,
+        "readings": list(range(10))
+    }
+
+
+def test_compact_json_drops_whitespace_and_nulls():
+    assert compact_json({"a": 1, "b": None, "c": [1, None, {"d": None}]}) == '{"a":1,"c":[1,{}]}'
+
+
+def test_scratchpad_keeps_recent_steps_and_digests_older_ones():
+    budget = PromptBudget(max_tokens=0, summarize_after_tokens=50, keep_recent_steps=1)
+    steps = [_step("get_facility_data", _observation(i)) for i in range(3)]
+
+    scratchpad = budget.format_scratchpad(steps)
+
+    observations = [line[len("Observation: "):] for line in scratchpad.splitlines() if line.startswith("Observation: ")]
+    assert len(observations) == 3
+    for digested in observations[:2]:
+        digest = json.loads(digested)
+        assert "notes" not in digest and digest["readings"][-1] == "+7 more"
+    assert json.loads(observations[2]) == _observation(2)
+    assert budget.step_report(steps)[1] == 2
+
+
+def test_small_scratchpads_are_only_compacted():
+    budget = PromptBudget(max_tokens=0, summarize_after_tokens=100000)
+    steps = [_step("get_facility_data", _observation(0))]
+
+    scratchpad = budget.format_scratchpad(steps)
+
+    assert compact_json(_observation(0)) in scratchpad
+    assert budget.step_report(steps)[1] == 0
+
+
+def test_finalize_notice_near_the_ceiling():
+    steps = [_step("get_facility_data", _observation(i)) for i in range(2)]
+    relaxed = PromptBudget(max_tokens=100000)
+    tight = PromptBudget(max_tokens=relaxed.estimate_spent(steps) + 50)
+
+    assert FINALIZE_NOTICE not in relaxed.format_scratchpad(steps)
+    assert tight.format_scratchpad(steps).endswith(f"{FINALIZE_NOTICE}\nThought: ")
+
+
+def test_exhaustion_and_disabled_ceiling():
+    steps = [_step("get_facility_data", _observation(i)) for i in range(3)]
+    spent = PromptBudget(max_tokens=1).estimate_spent(steps, "incident")
+
+    assert spent > 0
+    assert PromptBudget(max_tokens=spent).is_exhausted(steps, "incident")
+    assert not PromptBudget(max_tokens=spent + 1).is_exhausted(steps, "incident")
+    assert not PromptBudget(max_tokens=0).is_exhausted(steps, "incident")
+
+
+def test_spend_grows_with_each_iteration():
+    budget = PromptBudget()
+    budget.set_base_prompt("You are an environmental compliance analyst. " * 20)
+    steps = [_step("get_facility_data", _observation(i)) for i in range(3)]
+
+    spends = [budget.estimate_spent(steps[:n]) for n in range(1, 4)]
+
+    assert spends[0] > budget.base_prompt_tokens
+    assert spends[0] < spends[1] < spends[2]
+
+
+def test_cost_by_longest_model_prefix():
+    assert PromptBudget.cost("gpt-4o-mini-2024-07-18", 1000, 1000) == 0.00075
+    assert PromptBudget.cost("gpt-4o", 1000, 1000) == 0.0125
+    assert PromptBudget.cost("local-llama", 1000, 1000) == 0.0
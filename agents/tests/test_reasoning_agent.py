@@ -0,0 +1,172 @@
+"""
+Tests for the reasoning agent's tools and run control, with a scripted chat model
+"""
+
+import json
+
+from langchain_core.messages import AIMessage
+
+
+def _tool_call(tool: str, tool_input: str) -> AIMessage:
+    return AIMessage(content=f"Thought: next step\nAction: {tool}\nAction Input: {tool_input}")
+
+
+def _submit(recommendation: dict) -> AIMessage:
+    return AIMessage(content="Thought: done", additional_kwargs={
+        "function_call": {"name": "submit_recommendation", "arguments": json.dumps(recommendation)}
+    })
+
+
+def _analysis_request(urgency: str) -> dict:
+    return {
+        "incident_id": "INC-NEW",
+        "incident_type": "WATER_CONTAMINATION",
+        "facility_id": "Atlanta_WTP",
+        "sensor_data": {"ecoli": 1, "ph": 7.1},
+        "context": {"note": "after heavy rain"},
+        "urgency": urgency
+    }
+
+
+def test_recall_tool_reports_a_strong_precedent(memory_agent, make_incident, make_reasoning_agent):
+    memory_agent.store_incident(make_incident(1))
+    agent = make_reasoning_agent([], memory_agent=memory_agent)
+
+    recall = json.loads(agent.recall_similar_incidents(json.dumps(make_incident(1))))
+
+    assert recall["precedents"][0]["id"] == "INC-1"
+    assert recall["strong_precedent"] is True
+    assert recall["final_answer"]["action"] == "CHLORINE_BOOST"
+    assert recall["final_answer"]["precedent_incident_id"] == "INC-1"
+    assert recall["final_answer"]["precedent_actions"] == ["Chlorine boost", "Flushing"]
+    assert "urgency" not in recall["final_answer"]
+
+
+def test_recall_tool_without_precedents(memory_agent, make_reasoning_agent):
+    agent = make_reasoning_agent([], memory_agent=memory_agent)
+
+    recall = json.loads(agent.recall_similar_incidents("pump failure"))
+
+    assert recall["precedents"] == [] and recall["strong_precedent"] is False
+
+
+def test_strong_precedent_ends_a_medium_urgency_run(memory_agent, make_incident, make_reasoning_agent):
+    memory_agent.store_incident(make_incident(1))
+    # The model claims CRITICAL in the tool input; the incident itself is MEDIUM
+    tool_input = json.dumps({**make_incident(1), "urgency": "CRITICAL"})
+    agent = make_reasoning_agent([_tool_call("recall_similar_incidents", tool_input)], memory_agent=memory_agent)
+
+    result = agent.analyze_incident(_analysis_request("MEDIUM"))
+
+    assert result["final_recommendation"]["action"] == "CHLORINE_BOOST"
+    assert result["final_recommendation"]["urgency"] == "MEDIUM"
+    assert result["usage"]["early_stop"] is True
+    assert result["usage"]["final_answer_mode"] == "internal"
+    assert len(agent.llm.calls) == 1
+
+
+def test_strong_precedent_does_not_end_a_high_urgency_run(memory_agent, make_incident, make_reasoning_agent):
+    memory_agent.store_incident(make_incident(1))
+    recommendation = {
+        "action": "BOIL_WATER_NOTICE", "urgency": "HIGH", "confidence": 0.85,
+        "reasoning": "E. coli detected", "fallback_plan": "Switch to the backup intake"
+    }
+    agent = make_reasoning_agent(
+        [_tool_call("recall_similar_incidents", json.dumps(make_incident(1))), _submit(recommendation)],
+        memory_agent=memory_agent
+    )
+
+    result = agent.analyze_incident(_analysis_request("HIGH"))
+
+    assert result["final_recommendation"]["action"] == "BOIL_WATER_NOTICE"
+    assert result["usage"]["early_stop"] is False
+    observation = json.loads(result["reasoning_steps"][0]["finding"])
+    assert observation["strong_precedent"] is False and "final_answer" not in observation
+    assert len(agent.llm.calls) == 2
+
+
+def _triage_request(urgency: str, **sensor_data) -> dict:
+    return {
+        "incident_id": "INC-FAST",
+        "incident_type": "WATER_CONTAMINATION",
+        "facility_id": "Atlanta_WTP",
+        "sensor_data": sensor_data,
+        "urgency": urgency
+    }
+
+
+def test_fast_path_answers_a_single_known_violation(make_reasoning_agent):
+    agent = make_reasoning_agent([], fast_path_enabled=True)
+
+    result = agent.analyze_incident(_triage_request("MEDIUM", chlorine=0.2))
+
+    assert result["path"] == "fast"
+    assert result["final_recommendation"]["action"] == "CHLORINE_BOOST"
+    assert result["final_recommendation"]["urgency"] == "MEDIUM"
+    assert [step["action"] for step in result["reasoning_steps"]] == [
+        "analyze_sensor_data", "evaluate_response_options", "assess_regulatory_risk"
+    ]
+    assert agent.llm.calls == []
+
+
+def test_fast_path_answers_all_normal_readings(make_reasoning_agent):
+    agent = make_reasoning_agent([], fast_path_enabled=True)
+
+    result = agent.analyze_incident(_triage_request("LOW", chlorine=1.5, ph=7.2))
+
+    assert result["path"] == "fast"
+    assert result["final_recommendation"]["action"] == "CONTINUE_MONITORING"
+
+
+def test_fast_path_declines_other_incidents(make_reasoning_agent):
+    agent = make_reasoning_agent([], fast_path_enabled=True)
+
+    for urgency in ("HIGH", "CRITICAL", "URGENT"):
+        assert agent._fast_path_triage(_triage_request(urgency, chlorine=0.2)) is None
+        assert agent._fast_path_triage(_triage_request(urgency, chlorine=1.5)) is None
+    assert agent._fast_path_triage(_triage_request("MEDIUM", chlorine=0.2, ph=9.5)) is None
+    assert agent._fast_path_triage(_triage_request("MEDIUM", turbidity=3.0)) is None
+
+
+def test_high_urgency_single_violation_reaches_the_model(make_reasoning_agent):
+    recommendation = {
+        "action": "CHLORINE_BOOST", "urgency": "HIGH", "confidence": 0.9,
+        "reasoning": "Chlorine below minimum", "fallback_plan": "Flush the distribution lines"
+    }
+    agent = make_reasoning_agent([_submit(recommendation)], fast_path_enabled=True)
+
+    result = agent.analyze_incident(_triage_request("HIGH", chlorine=0.2))
+
+    assert result["path"] == "llm"
+    assert result["final_recommendation"]["urgency"] == "HIGH"
+    assert len(agent.llm.calls) == 1
+
+
+def test_budget_notice_names_the_final_step_in_use(make_reasoning_agent):
+    from agents.prompt_budget import FINALIZE_NOTICE, PromptBudget
+    from agents.reasoning_agent import FINALIZE_NOTICE_FUNCTION
+
+    recommendation = {
+        "action": "BOIL_WATER_NOTICE", "urgency": "HIGH", "confidence": 0.85,
+        "reasoning": "E. coli detected", "fallback_plan": "Switch to the backup intake"
+    }
+    sensor_step = _tool_call("analyze_sensor_data", '{"ecoli": 1}')
+    final_steps = {
+        True: (_submit(recommendation), FINALIZE_NOTICE_FUNCTION, FINALIZE_NOTICE),
+        False: (
+            AIMessage(content=f"Thought: done\nFinal Answer: {json.dumps(recommendation)}"),
+            FINALIZE_NOTICE, FINALIZE_NOTICE_FUNCTION
+        )
+    }
+    for structured_output, (final_step, notice, other_notice) in final_steps.items():
+        agent = make_reasoning_agent(
+            [sensor_step, final_step],
+            structured_output=structured_output,
+            prompt_budget=PromptBudget(max_tokens=100000, finalize_ratio=0.0)
+        )
+
+        result = agent.analyze_incident(_analysis_request("HIGH"))
+
+        prompt = agent.llm.calls[1]["messages"][0].content
+        assert notice in prompt and other_notice not in prompt
+        assert result["final_recommendation"]["action"] == "BOIL_WATER_NOTICE"
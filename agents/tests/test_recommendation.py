@@ -0,0 +1,75 @@
+"""
+Tests for final-answer parsing and validation
+"""
+
+import json
+
+from langchain.schema import AgentAction, AgentFinish
+from langchain_core.messages import AIMessage
+
+from agents.recommendation import (
+    FUNCTION_CALL_MODE,
+    TEXT_MODE,
+    RecommendationValidator,
+    StructuredReActOutputParser
+)
+
+RECOMMENDATION = {
+    "action": "chlorine boost",
+    "urgency": "high",
+    "confidence": 0.8,
+    "reasoning": "Chlorine 0.1 mg/L is below the 0.2 mg/L minimum",
+    "fallback_plan": "Switch to the backup source"
+}
+
+
+def test_parser_turns_submit_recommendation_call_into_final_answer():
+    message = AIMessage(
+        content="Thought: I now have enough information",
+        additional_kwargs={"function_call": {"name": "submit_recommendation", "arguments": json.dumps(RECOMMENDATION)}}
+    )
+    finish = StructuredReActOutputParser().invoke(message)
+
+    assert isinstance(finish, AgentFinish)
+    assert finish.return_values["final_answer_mode"] == FUNCTION_CALL_MODE
+    assert json.loads(finish.return_values["output"]) == RECOMMENDATION
+
+
+def test_parser_still_parses_react_tool_steps():
+    message = AIMessage(content="Thought: check limits\nAction: analyze_sensor_data\nAction Input: {\"ph\": 7.1}")
+    action = StructuredReActOutputParser().invoke(message)
+
+    assert isinstance(action, AgentAction)
+    assert action.tool == "analyze_sensor_data"
+
+
+def test_function_arguments_are_validated_without_slicing():
+    validator = RecommendationValidator(repair_enabled=False)
+    result = validator.finalize(None, json.dumps(RECOMMENDATION), "{}", [], mode=FUNCTION_CALL_MODE)
+
+    assert result["source"] == "first_pass"
+    assert result["recommendation"]["action"] == "CHLORINE_BOOST"
+    assert result["recommendation"]["urgency"] == "HIGH"
+
+    # Text around the object is legacy-mode only
+    wrapped = validator.finalize(None, f"Here: {json.dumps(RECOMMENDATION)}", "{}", [], mode=FUNCTION_CALL_MODE)
+    assert wrapped["source"] == "failed"
+
+
+def test_schema_errors_are_reported():
+    recommendation, error = RecommendationValidator.validate_arguments(json.dumps({**RECOMMENDATION, "confidence": 3}))
+
+    assert recommendation is None
+    assert "confidence" in error
+
+
+def test_first_pass_rate_is_reported_per_mode():
+    validator = RecommendationValidator(repair_enabled=False)
+    validator.finalize(None, json.dumps(RECOMMENDATION), "{}", [], mode=FUNCTION_CALL_MODE)
+    validator.finalize(None, f"Final Answer: {json.dumps(RECOMMENDATION)}", "{}", [], mode=TEXT_MODE)
+    validator.finalize(None, "Final Answer: boost the chlorine", "{}", [], mode=TEXT_MODE)
+
+    stats = validator.get_statistics()
+    assert stats["validated"] == 3
+    assert stats["by_mode"][FUNCTION_CALL_MODE]["first_pass_parse_rate"] == 1.0
+    assert stats["by_mode"][TEXT_MODE]["first_pass_parse_rate"] == 0.5
@@ -0,0 +1,112 @@
+"""
+Tests for the versioned regulatory rule store and its hot reload
+"""
+
+import json
+import os
+import time
+
+import pytest
+
+from agents.regulatory_rules import RegulatoryRuleStore, RuleSet
+
+
+def _rules(version: str, ph_max: float = 8.5) -> dict:
+    return {
+        "version": version,
+        "default_jurisdiction": "US-EPA",
+        "jurisdictions": {
+            "US-EPA": {
+                "limits": {"ph": {"min": 6.5, "max": ph_max, "regulation": "EPA SDWA"}},
+                "fines": {"ph": {"regulation": "EPA SDWA", "violation_fine": 25000}},
+                "default_fine": {"regulation": "Varies", "violation_fine": 10000}
+            },
+            "US-GA": {
+                "inherits": "US-EPA",
+                "limits": {"ph": {"min": 6.5, "max": 8.0, "regulation": "GA EPD"}}
+            }
+        }
+    }
+
+
+def _write(path, rules: dict, mtime: float = None) -> None:
+    path.write_text(json.dumps(rules))
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+
+
+def test_bundled_rules_load():
+    store = RegulatoryRuleStore()
+
+    assert "US-EPA" in store.current.jurisdictions
+    assert store.current.engine().evaluate({"ph": 9.2})["violations"]
+
+
+def test_jurisdictions_inherit_and_fall_back_to_the_default():
+    rules = RuleSet(_rules("1"), source="test")
+
+    assert rules.engine("US-GA").evaluate({"ph": 8.2})["violations"]
+    assert rules.engine("US-EPA").evaluate({"ph": 8.2})["violations"] == []
+    assert rules.fine_info("ph", "US-GA")["violation_fine"] == 25000
+    assert rules.fine_info("turbidity")["violation_fine"] == 10000
+    assert rules.jurisdiction("XX-UNKNOWN") == "US-EPA"
+
+
+def test_fine_info_is_a_copy():
+    rules = RuleSet(_rules("1"), source="test")
+    rules.fine_info("ph")["violation_fine"] = 0
+
+    assert rules.fine_info("ph")["violation_fine"] == 25000
+
+
+def test_circular_inheritance_is_rejected():
+    rules = _rules("1")
+    rules["jurisdictions"]["US-EPA"]["inherits"] = "US-GA"
+
+    with pytest.raises(ValueError, match="Circular"):
+        RuleSet(rules, source="test")
+
+
+def test_reload_swaps_versions_and_keeps_old_snapshots(tmp_path):
+    path = tmp_path / "rules.json"
+    _write(path, _rules("1"))
+    store = RegulatoryRuleStore(str(path))
+    snapshot = store.current
+
+    _write(path, _rules("2", ph_max=8.0))
+    assert store.reload() is True
+
+    assert store.current.version == "2"
+    assert store.current.engine().evaluate({"ph": 8.2})["violations"]
+    assert snapshot.version == "1" and snapshot.engine().evaluate({"ph": 8.2})["violations"] == []
+
+
+def test_a_broken_file_keeps_the_previous_version(tmp_path):
+    path = tmp_path / "rules.json"
+    _write(path, _rules("1"))
+    store = RegulatoryRuleStore(str(path))
+
+    path.write_text("{not json")
+    assert store.reload() is False
+    assert store.current.version == "1"
+
+    rules = _rules("2")
+    rules["default_jurisdiction"] = "US-TX"
+    _write(path, rules)
+    assert store.reload() is False
+    assert store.current.version == "1"
+
+
+def test_watcher_hot_reloads_a_changed_file(tmp_path):
+    path = tmp_path / "rules.json"
+    _write(path, _rules("1"), mtime=1_700_000_000)
+    store = RegulatoryRuleStore(str(path), reload_interval=0.02)
+    try:
+        _write(path, _rules("2"), mtime=1_700_000_100)
+        deadline = time.monotonic() + 5
+        while store.current.version != "2":
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+        assert store.get_statistics()["version"] == "2"
+    finally:
+        store.stop()
@@ -0,0 +1,101 @@
+"""
+Tests for the coalescing analysis result cache
+"""
+
+import threading
+import time
+
+import pytest
+
+from agents.result_cache import AnalysisResultCache
+
+REQUEST = {"incident_id": "INC-1", "facility_id": "Atlanta_WTP", "sensor_data": {"ph": 9.1}}
+
+
+def test_concurrent_identical_requests_compute_once():
+    cache = AnalysisResultCache(ttl_seconds=60)
+    calls = []
+    statuses = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.2)
+        return {"status": "success", "recommendation": "isolate"}
+
+    def request():
+        statuses.append(cache.get_or_compute(dict(REQUEST), compute)[1])
+
+    threads = [threading.Thread(target=request) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert sorted(statuses) == ["coalesced"] * 5 + ["miss"]
+    assert cache.get_or_compute(REQUEST, compute) == ({"status": "success", "recommendation": "isolate"}, "hit")
+
+
+def test_key_ignores_dict_order():
+    reordered = {"sensor_data": {"ph": 9.1}, "facility_id": "Atlanta_WTP", "incident_id": "INC-1"}
+
+    assert AnalysisResultCache.make_key(REQUEST) == AnalysisResultCache.make_key(reordered)
+
+
+def test_results_are_copied():
+    cache = AnalysisResultCache(ttl_seconds=60)
+    result, _ = cache.get_or_compute(REQUEST, lambda: {"status": "success", "steps": []})
+    result["steps"].append("mutated")
+
+    assert cache.get_or_compute(REQUEST, lambda: {})[0]["steps"] == []
+
+
+def test_errors_and_exceptions_are_not_cached():
+    cache = AnalysisResultCache(ttl_seconds=60)
+    assert cache.get_or_compute(REQUEST, lambda: {"status": "error"})[1] == "miss"
+    assert cache.get_or_compute(REQUEST, lambda: {"status": "error"})[1] == "miss"
+
+    def fail():
+        raise RuntimeError("llm unavailable")
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_compute(REQUEST, fail)
+    assert cache.get_statistics()["in_flight"] == 0
+
+
+def test_ttl_expiry_and_invalidate():
+    cache = AnalysisResultCache(ttl_seconds=0.05)
+    cache.get_or_compute(REQUEST, lambda: {"status": "success"})
+    time.sleep(0.1)
+    assert cache.get_or_compute(REQUEST, lambda: {"status": "success"})[1] == "miss"
+
+    cache.ttl_seconds = 60
+    cache.get_or_compute(REQUEST, lambda: {"status": "success"})
+    other = dict(REQUEST, incident_id="INC-2", facility_id="Macon_WTP")
+    cache.get_or_compute(other, lambda: {"status": "success"})
+
+    assert cache.invalidate(facility_id="Atlanta_WTP") == 1
+    assert cache.get_or_compute(other, lambda: {})[1] == "hit"
+    assert cache.invalidate() == 1
+
+
+def test_a_compute_overlapping_invalidate_is_not_stored():
+    cache = AnalysisResultCache(ttl_seconds=60)
+    started, release = threading.Event(), threading.Event()
+
+    def stale_compute():
+        started.set()
+        release.wait(5)
+        return {"status": "success", "recommendation": "stale"}
+
+    worker = threading.Thread(target=cache.get_or_compute, args=(REQUEST, stale_compute))
+    worker.start()
+    started.wait(5)
+    cache.invalidate(incident_id="INC-1")
+    release.set()
+    worker.join()
+
+    assert cache.get_statistics()["entries"] == 0
+    assert cache.get_or_compute(REQUEST, lambda: {"status": "success", "recommendation": "fresh"}) == (
+        {"status": "success", "recommendation": "fresh"}, "miss"
+    )
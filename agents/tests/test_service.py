@@ -0,0 +1,93 @@
+"""
+Tests for the FastAPI service wiring: agent creation and the combined workflow
+"""
+
+import threading
+import time
+
+from fastapi.testclient import TestClient
+
+ANALYSIS_REQUEST = {
+    "incident_id": "INC-1",
+    "incident_type": "WATER_CONTAMINATION",
+    "facility_id": "Atlanta_WTP",
+    "sensor_data": {"ecoli": 3},
+    "context": {"note": "after heavy rain"}
+}
+
+
+class SlowMemoryAgent:
+    def __init__(self, delay: float):
+        self.delay = delay
+
+    def recall_similar_incidents(self, current_incident, top_k, filters):
+        time.sleep(self.delay)
+        return {"status": "success", "similar_incidents": [], "patterns": {}, "recommendation": "none"}
+
+
+class SlowReasoningAgent:
+    def __init__(self, delay: float):
+        self.delay = delay
+
+    def analyze_incident(self, incident_data):
+        time.sleep(self.delay)
+        return {
+            "status": "success",
+            "reasoning_steps": [],
+            "final_recommendation": {"action": "BOIL_WATER_NOTICE", "urgency": "HIGH", "confidence": 0.8},
+            "raw_analysis": ""
+        }
+
+
+def _override(service, memory_delay: float, reasoning_delay: float) -> TestClient:
+    service.app.dependency_overrides[service.get_memory_agent] = lambda: SlowMemoryAgent(memory_delay)
+    service.app.dependency_overrides[service.get_reasoning_agent] = lambda: SlowReasoningAgent(reasoning_delay)
+    return TestClient(service.app)
+
+
+def test_recall_and_reasoning_run_concurrently(service):
+    client = _override(service, memory_delay=0.4, reasoning_delay=0.4)
+
+    started = time.perf_counter()
+    response = client.post("/api/agents/analyze-with-memory", json=ANALYSIS_REQUEST)
+    elapsed = time.perf_counter() - started
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["status"] == "success"
+    assert body["reasoning_analysis"]["recommendation"]["action"] == "BOIL_WATER_NOTICE"
+    assert elapsed < 0.75
+
+
+def test_a_timed_out_branch_gives_a_partial_result(service, monkeypatch):
+    monkeypatch.setattr(service, "MEMORY_RECALL_TIMEOUT_SECONDS", 0.1)
+    client = _override(service, memory_delay=0.5, reasoning_delay=0.0)
+
+    body = client.post("/api/agents/analyze-with-memory", json=ANALYSIS_REQUEST).json()
+
+    assert body["status"] == "partial"
+    assert body["branches"]["memory"]["status"] == "timeout"
+    assert body["branches"]["reasoning"]["status"] == "success"
+    assert body["memory_insights"]["similar_incidents"] == []
+
+
+def test_concurrent_first_requests_create_one_memory_agent(service, monkeypatch):
+    created = []
+
+    def slow_agent(**kwargs):
+        time.sleep(0.1)
+        created.append(kwargs)
+        return object()
+
+    monkeypatch.setattr(service, "memory_agent_instance", None)
+    monkeypatch.setattr(service, "EMBEDDING_BACKEND", "hashing")
+    monkeypatch.setattr(service, "MemoryEnabledAgent", slow_agent)
+    agents = []
+    threads = [threading.Thread(target=lambda: agents.append(service.get_memory_agent())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(created) == 1
+    assert all(agent is agents[0] for agent in agents)
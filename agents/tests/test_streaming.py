@@ -0,0 +1,110 @@
+"""
+Tests for reasoning event streaming: the callback handler and the SSE endpoint
+"""
+
+import json
+
+from fastapi.testclient import TestClient
+from langchain.schema import AgentAction, AgentFinish
+from langchain_core.messages import AIMessage
+
+from agents.streaming import ReasoningEventHandler, format_sse
+
+STREAM_URL = "/api/agents/reasoning/analyze/stream"
+
+
+def _stream_request(urgency: str, **sensor_data) -> dict:
+    return {
+        "incident_id": "INC-STREAM",
+        "incident_type": "WATER_CONTAMINATION",
+        "facility_id": "Atlanta_WTP",
+        "sensor_data": sensor_data,
+        "context": {"note": "routine sampling"},
+        "urgency": urgency
+    }
+
+
+def _events(response) -> list:
+    """Parse an SSE body into (event, data) pairs"""
+    events = []
+    for message in response.text.strip().split("\n\n"):
+        event_line, data_line = message.split("\n")
+        events.append((event_line[len("event: "):], json.loads(data_line[len("data: "):])))
+    return events
+
+
+def test_format_sse():
+    assert format_sse("done", {"incident_id": "INC-1"}) == 'event: done\ndata: {"incident_id": "INC-1"}\n\n'
+
+
+def test_handler_emits_thought_action_observation_and_final_answer():
+    emitted = []
+    handler = ReasoningEventHandler(lambda event, data: emitted.append((event, data)))
+
+    handler.on_agent_action(AgentAction(
+        tool="analyze_sensor_data", tool_input='{"ph": 9}',
+        log='Thought: check the readings\nAction: analyze_sensor_data\nAction Input: {"ph": 9}'
+    ))
+    handler.on_tool_end('{"severity": "HIGH"}', name="analyze_sensor_data")
+    handler.on_agent_finish(AgentFinish(return_values={"output": "{}"}, log="Thought: done\nFinal Answer: {}"))
+
+    assert emitted == [
+        ("thought", {"step": 1, "thought": "check the readings"}),
+        ("action", {"step": 1, "tool": "analyze_sensor_data", "tool_input": '{"ph": 9}'}),
+        ("observation", {"step": 1, "tool": "analyze_sensor_data", "observation": '{"severity": "HIGH"}'}),
+        ("final_answer", {"step": 1, "thought": "done", "output": "{}"})
+    ]
+
+
+def test_llm_path_streams_each_reasoning_step(service, make_reasoning_agent):
+    recommendation = {
+        "action": "PH_CORRECTION", "urgency": "HIGH", "confidence": 0.85,
+        "reasoning": "pH above the maximum", "fallback_plan": "Switch to the backup intake"
+    }
+    agent = make_reasoning_agent([
+        AIMessage(content='Thought: check the readings\nAction: analyze_sensor_data\nAction Input: {"ph": 9.5}'),
+        AIMessage(content="Thought: done", additional_kwargs={
+            "function_call": {"name": "submit_recommendation", "arguments": json.dumps(recommendation)}
+        })
+    ])
+    service.app.dependency_overrides[service.get_reasoning_agent] = lambda: agent
+
+    response = TestClient(service.app).post(STREAM_URL, json=_stream_request("HIGH", ph=9.5))
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = _events(response)
+    names = [event for event, _ in events]
+    assert names[0] == "started" and names[-1] == "done"
+    assert names.index("thought") < names.index("action") < names.index("observation") < names.index("final_recommendation")
+    observation = dict(events)["observation"]
+    assert observation["tool"] == "analyze_sensor_data"
+    assert json.loads(observation["observation"])["violations"]
+    final = dict(events)["final_recommendation"]
+    assert final["path"] == "llm" and final["final_recommendation"]["action"] == "PH_CORRECTION"
+    assert "slotify_briefing" in names
+
+
+def test_fast_path_streams_its_tool_steps(service, make_reasoning_agent):
+    agent = make_reasoning_agent([], fast_path_enabled=True)
+    service.app.dependency_overrides[service.get_reasoning_agent] = lambda: agent
+
+    events = _events(TestClient(service.app).post(STREAM_URL, json=_stream_request("MEDIUM", chlorine=0.2)))
+
+    assert [event for event, _ in events] == [
+        "started", "step", "step", "step", "final_recommendation", "slotify_briefing", "done"
+    ]
+    assert dict(events)["final_recommendation"]["path"] == "fast"
+
+
+def test_a_failed_analysis_streams_an_error_event(service):
+    class FailingAgent:
+        def analyze_incident(self, incident_data, callbacks=None):
+            raise RuntimeError("model unavailable")
+
+    service.app.dependency_overrides[service.get_reasoning_agent] = lambda: FailingAgent()
+
+    events = _events(TestClient(service.app).post(STREAM_URL, json=_stream_request("HIGH", ph=9.5)))
+
+    assert [event for event, _ in events] == ["started", "error", "done"]
+    assert events[1][1] == {"message": "model unavailable"}
@@ -0,0 +1,89 @@
+"""
+Tests for tool memoization and per-tool latency accounting
+"""
+
+import json
+
+from agents.tool_cache import ToolCache, canonicalize_tool_input
+
+
+def _counting(result_for=lambda tool_input: json.dumps({"echo": tool_input})):
+    calls = []
+
+    def tool(tool_input: str) -> str:
+        calls.append(tool_input)
+        return result_for(tool_input)
+    return tool, calls
+
+
+def test_canonicalize_tool_input():
+    assert canonicalize_tool_input('{"b": 1, "a": 2}') == canonicalize_tool_input(' {"a":2,"b":1} ')
+    assert canonicalize_tool_input('"Atlanta_WTP"') == canonicalize_tool_input("'Atlanta_WTP'") == "Atlanta_WTP"
+
+
+def test_equivalent_inputs_hit_the_cache():
+    cache = ToolCache()
+    tool, calls = _counting()
+    cached = cache.wrap("analyze_sensor_data", tool)
+
+    first = cached('{"ph": 9.1, "ecoli": 2}')
+    second = cached('{"ecoli": 2,  "ph": 9.1}')
+
+    assert first == second and len(calls) == 1
+    stats = cache.get_statistics()["tools"]["analyze_sensor_data"]
+    assert (stats["calls"], stats["hits"], stats["hit_rate"]) == (2, 1, 0.5)
+    assert sum(stats["latency_histogram"].values()) == 2
+
+
+def test_scope_is_part_of_the_key():
+    cache = ToolCache()
+    version = ["2024.1"]
+    tool, calls = _counting()
+    cached = cache.wrap("assess_regulatory_risk", tool, scope=lambda: version[0])
+
+    cached("ph")
+    cached("ph")
+    version[0] = "2024.2"
+    cached("ph")
+
+    assert len(calls) == 2
+
+
+def test_errors_and_uncacheable_tools_are_not_memoized():
+    cache = ToolCache()
+    failing, failing_calls = _counting(lambda tool_input: json.dumps({"error": "bad input"}))
+    live, live_calls = _counting()
+    failing = cache.wrap("analyze_sensor_data", failing)
+    live = cache.wrap("get_facility_data", live, cacheable=False)
+
+    for _ in range(2):
+        failing("{}")
+        live("Atlanta_WTP")
+
+    assert len(failing_calls) == 2 and len(live_calls) == 2
+    stats = cache.get_statistics()["tools"]
+    assert stats["get_facility_data"]["cacheable"] is False
+    assert stats["get_facility_data"]["calls"] == 2 and stats["get_facility_data"]["cached_entries"] == 0
+
+
+def test_lru_eviction_per_tool():
+    cache = ToolCache(max_entries=2)
+    tool, calls = _counting()
+    cached = cache.wrap("evaluate_response_options", tool)
+
+    for tool_input in ("A", "B", "A", "C", "A", "B"):
+        cached(tool_input)
+
+    assert calls == ["A", "B", "C", "B"]
+    assert cache.get_statistics()["tools"]["evaluate_response_options"]["cached_entries"] == 2
+
+
+def test_zero_max_entries_disables_caching():
+    cache = ToolCache(max_entries=0)
+    tool, calls = _counting()
+    cached = cache.wrap("analyze_sensor_data", tool)
+
+    cached("{}")
+    cached("{}")
+
+    assert len(calls) == 2